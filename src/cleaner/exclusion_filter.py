@@ -3,44 +3,75 @@ exclusion_filter.py - Módulo para filtrar emails según listas de exclusión.
 """
 
 import os
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import matplotlib.pyplot as plt
-from openpyxl import load_workbook
-from openpyxl.drawing.image import Image as OpenpyxlImage
 from pandas.plotting import table
-from src.settings import XCLUSION_INPUTS_DIR, XCLUSION_OUTPUTS_DIR, EXCLUSIONES_FOLDER, HOJA_DATA, HOJA_STATS, IMAGE_SIZE
+from src.settings import XCLUSION_INPUTS_DIR, XCLUSION_OUTPUTS_DIR, EXCLUIDOS_DIR, EXCLUSIONES_FOLDER, HOJA_DATA, HOJA_STATS, HOJA_COPYRIGHT, IMAGE_SIZE
 from src.utils.status_manager import load_status, update_status, is_stage_done, log_error
+from src.utils.tablas_intermedias import leer_tablas, guardar_tablas
+from .exclusion_index import IndiceExclusiones, cargar_indice
 
-def cargar_exclusiones(carpeta=EXCLUSIONES_FOLDER):
-    exclusiones = set()
-    for fn in os.listdir(carpeta):
-        if fn.endswith(".txt"):
-            with open(os.path.join(carpeta, fn), encoding="utf-8") as f:
-                exclusiones.update(line.strip().lower() for line in f if line.strip())
-    return exclusiones
+def cargar_exclusiones(carpeta=EXCLUSIONES_FOLDER, listas=None, omitir=None, idiomas=None):
+    """
+    Índice compilado (IndiceExclusiones) con los tokens de las listas .txt de la carpeta.
+    listas / omitir / idiomas: selección de listas (ver exclusion_index.seleccionar_listas).
+    """
+    return cargar_indice(carpeta, listas, omitir, idiomas)
 
-def filtrar_y_contar(df: pd.DataFrame, exclusiones: set):
-    orig_listas = df["email"].fillna("").apply(
-        lambda cell: [e.strip() for e in str(cell).replace(';', ',').split(',') if e.strip()]
+def emails_en_largo(celdas: pd.Series):
+    """Separa las celdas de email (por ',' o ';') en un frame largo (fila, email), con fila la posición en la serie."""
+    emails = (
+        celdas.reset_index(drop=True).fillna("").astype(str)
+        .str.replace(';', ',', regex=False).str.split(',')
+        .explode().str.strip()
     )
-    orig_counts = orig_listas.apply(len)
-    filt_listas = orig_listas.apply(
-        lambda lst: [e for e in lst if not any(tok in e.lower() for tok in exclusiones)]
-    )
-    filt_counts = filt_listas.apply(len)
+    emails = emails[emails.notna() & (emails != "")]
+    return pd.DataFrame({"fila": emails.index.to_numpy(), "email": emails.to_numpy(dtype=object)})
+
+def unir_por_fila(largo: pd.DataFrame, filas: int):
+    """Inverso de emails_en_largo: una celda 'a, b' por fila (NA si la fila se queda sin emails)."""
+    celdas = np.full(filas, pd.NA, dtype=object)
+    if not largo.empty:
+        # Las filas del frame largo están agrupadas y en orden: ", " delante de todo email que no abre su fila
+        posiciones = largo["fila"].to_numpy()
+        primero = np.r_[True, posiciones[1:] != posiciones[:-1]]
+        partes = np.where(primero, "", ", ").astype(object) + largo["email"].to_numpy(dtype=object)
+        unidas = pd.Series(partes).groupby(posiciones, sort=False).sum()
+        celdas[unidas.index.to_numpy()] = unidas.to_numpy(dtype=object)
+    return celdas
+
+def filtrar_y_contar(df: pd.DataFrame, exclusiones: IndiceExclusiones):
+    """
+    Elimina de la columna email las direcciones que contienen algún token de exclusión.
+    Las celdas se separan una sola vez en un frame largo; la exclusión se calcula una vez
+    por email distinto y las celdas filtradas y los recuentos salen de ese mismo frame.
+    Retorna (df filtrado, total eliminadas, emails únicos restantes, DataFrame email/lista/token de las excluidas).
+    """
+    if not isinstance(exclusiones, IndiceExclusiones):
+        exclusiones = IndiceExclusiones({tok: "exclusiones" for tok in exclusiones})
+    largo = emails_en_largo(df["email"])
+    motivos = {e: exclusiones.buscar(e) for e in largo["email"].unique()}
+    motivo = largo["email"].map(motivos)
+    excluido = motivo.notna()
+    restantes = largo[~excluido]
     df_filtrado = df.copy()
-    df_filtrado["email"] = filt_listas.apply(lambda lst: ", ".join(lst) if lst else pd.NA)
-    total_eliminadas = (orig_counts - filt_counts).sum()
-    total_restantes = filt_counts.explode().dropna().nunique()
-    return df_filtrado, total_eliminadas, total_restantes
+    df_filtrado["email"] = unir_por_fila(restantes, len(df))
+    total_eliminadas = int(excluido.sum())
+    total_restantes = restantes["email"].nunique()
+    df_excluidos = pd.DataFrame(
+        motivo[excluido].tolist(), columns=["lista", "token"]
+    ).assign(email=largo.loc[excluido, "email"].to_numpy())[["email", "lista", "token"]]
+    return df_filtrado, total_eliminadas, total_restantes, df_excluidos
 
-def generar_estadisticas(df_data, df_sectors):
+def generar_estadisticas(df_data, df_sectors, emails_unicos=None):
+    """emails_unicos: recuento ya calculado por filtrar_y_contar (si no, se obtiene de la columna email)."""
+    if emails_unicos is None:
+        emails_unicos = emails_en_largo(df_data["email"])["email"].nunique()
     stats = {
         "Number of companies": len(df_data),
-        "Number of emails (unique)": df_data["email"].dropna().apply(
-            lambda x: [e.strip() for e in str(x).split(",") if e.strip()]
-        ).explode().nunique(),
+        "Number of emails (unique)": emails_unicos,
         "Number of phone numbers": df_data["phone"].dropna().count(),
         "Mobile phones": df_data["phone"].dropna().count(),
         "Number of domains": df_data["website"].dropna().nunique() if "website" in df_data else 0,
@@ -49,13 +80,6 @@ def generar_estadisticas(df_data, df_sectors):
     }
     return pd.DataFrame([stats])
 
-def insertar_imagen_en_excel(path_excel, path_imagen, hoja=HOJA_STATS, cell='A10'):
-    wb = load_workbook(path_excel)
-    ws = wb[hoja]
-    img = OpenpyxlImage(path_imagen)
-    ws.add_image(img, cell)
-    wb.save(path_excel)
-
 def guardar_tabla_como_imagen(df, path_imagen, title=None, columns=None):
     max_chars = 40
     max_columns = 5
@@ -65,7 +89,7 @@ def guardar_tabla_como_imagen(df, path_imagen, title=None, columns=None):
     if df.shape[1] > max_columns:
         df = df.iloc[:, :max_columns]
     df = df.head(max_rows)
-    df = df.copy().astype(str).apply(
+    df = df.astype(object).where(df.notna(), "").astype(str).apply(
         lambda col: col.map(lambda x: x[:max_chars] + "…" if len(x) > max_chars else x)
     )
     fig, ax = plt.subplots(figsize=(IMAGE_SIZE[0] / 100, IMAGE_SIZE[1] / 100))
@@ -113,37 +137,76 @@ def guardar_tabla_como_imagen(df, path_imagen, title=None, columns=None):
     fig.savefig(path_imagen, dpi=100)
     plt.close(fig)
 
-def procesar_archivo(path_entrada: str, exclusiones: set):
+def leer_hojas(path_entrada):
+    """Hojas del Excel de entrada: desde sus tablas intermedias si están al día, si no del propio Excel."""
+    hojas = leer_tablas(path_entrada)
+    if hojas is not None:
+        return hojas
     hojas = pd.read_excel(path_entrada, sheet_name=None)
+    if HOJA_COPYRIGHT in hojas:
+        hojas[HOJA_COPYRIGHT] = pd.read_excel(path_entrada, sheet_name=HOJA_COPYRIGHT, header=None)
+    return hojas
+
+def procesar_archivo(path_entrada: str, exclusiones: IndiceExclusiones):
+    hojas = leer_hojas(path_entrada)
     if HOJA_DATA not in hojas:
         raise RuntimeError(f"No existe la hoja '{HOJA_DATA}' en {path_entrada}")
     df_data = hojas[HOJA_DATA]
-    df_limpia, tot_elim, tot_rest = filtrar_y_contar(df_data, exclusiones)
+    df_limpia, tot_elim, tot_rest, df_excluidos = filtrar_y_contar(df_data, exclusiones)
     hojas_out = {}
     hojas_out[HOJA_DATA] = df_limpia
     for name, df in hojas.items():
         if name not in (HOJA_DATA, HOJA_STATS):
             hojas_out[name] = df.copy()
-    df_stats = generar_estadisticas(df_limpia, hojas.get("sectors", pd.DataFrame(columns=["Sector"])))
+    df_stats = generar_estadisticas(df_limpia, hojas.get("sectors", pd.DataFrame(columns=["Sector"])), tot_rest)
     hojas_out[HOJA_STATS] = df_stats
-    return hojas_out, df_stats
+    return hojas_out, df_stats, df_excluidos
+
+def _escribir_por_filas(writer, nombre: str, df: pd.DataFrame, cabecera=True):
+    """Escribe la hoja fila a fila (to_excel la escribe por columnas, incompatible con constant_memory)."""
+    worksheet = writer.book.add_worksheet(nombre)
+    if cabecera:
+        formato = writer.book.add_format({"bold": True, "border": 1, "align": "center"})
+        worksheet.write_row(0, 0, [str(c) for c in df.columns], formato)
+    valores = df.astype(object).where(df.notna(), None)
+    for fila, registro in enumerate(valores.itertuples(index=False, name=None), start=int(cabecera)):
+        worksheet.write_row(fila, 0, registro)
+    return worksheet
 
-def guardar_hojas(hojas_dict: dict, path_salida: str):
+def guardar_hojas(hojas_dict: dict, path_salida: str, imagen_stats=None, memoria_constante=False, celda_imagen='A10'):
+    """
+    Escribe el Excel de salida en una sola pasada con xlsxwriter.
+    - imagen_stats: gráfico que se inserta en la hoja de estadísticas durante la escritura.
+    - memoria_constante: modo constant_memory de xlsxwriter (cada fila se vuelca a disco
+      al escribir la siguiente); para hojas de datos muy grandes.
+    """
     os.makedirs(os.path.dirname(path_salida), exist_ok=True)
-    with pd.ExcelWriter(path_salida, engine="openpyxl") as writer:
-        for nombre in (HOJA_DATA, HOJA_STATS):
-            if nombre in hojas_dict:
-                hojas_dict[nombre].to_excel(writer, sheet_name=nombre, index=False)
-        for nombre, df in hojas_dict.items():
-            if nombre not in (HOJA_DATA, HOJA_STATS):
-                df.to_excel(writer, sheet_name=nombre, index=False)
+    opciones = {"strings_to_urls": False, "constant_memory": memoria_constante}
+    orden = [n for n in (HOJA_DATA, HOJA_STATS) if n in hojas_dict]
+    orden += [n for n in hojas_dict if n not in (HOJA_DATA, HOJA_STATS)]
+    with pd.ExcelWriter(path_salida, engine="xlsxwriter", engine_kwargs={"options": opciones}) as writer:
+        for nombre in orden:
+            cabecera = nombre != HOJA_COPYRIGHT
+            if memoria_constante:
+                worksheet = _escribir_por_filas(writer, nombre, hojas_dict[nombre], cabecera)
+            else:
+                hojas_dict[nombre].to_excel(writer, sheet_name=nombre, index=False, header=cabecera)
+                worksheet = writer.sheets[nombre]
+            if nombre == HOJA_STATS and imagen_stats is not None:
+                worksheet.insert_image(celda_imagen, str(imagen_stats))
 
-def run_filter(overwrite=False, test_mode=False, resume=False):
+def run_filter(overwrite=False, test_mode=False, resume=False, listas=None, omitir_listas=None, idiomas=None,
+               memoria_constante=False):
     """
     Ejecuta el filtrado de emails según exclusiones.
+    memoria_constante: escribir los Excel en modo constant_memory (hojas de datos muy grandes).
+    listas / omitir_listas: listas de exclusión a usar / desactivar (nombre del .txt sin extensión).
+    idiomas: códigos de las listas de idioma a usar (p. ej. ['EN', 'IT']); las listas comunes siempre se usan.
     """
-    exclusiones = cargar_exclusiones()
-    print(f"Cargadas {len(exclusiones)} palabras de exclusión\n")
+    exclusiones = cargar_exclusiones(listas=listas, omitir=omitir_listas, idiomas=idiomas)
+    origen = "desde caché" if exclusiones.desde_cache else "índice reconstruido"
+    print(f"Cargadas {len(exclusiones)} palabras de exclusión ({origen})\n")
+    os.makedirs(XCLUSION_OUTPUTS_DIR, exist_ok=True)
     for fn in os.listdir(XCLUSION_INPUTS_DIR):
         try:
             if not overwrite and is_stage_done(fn, 'excluded'):
@@ -154,20 +217,27 @@ def run_filter(overwrite=False, test_mode=False, resume=False):
             entrada = XCLUSION_INPUTS_DIR / fn
             salida = XCLUSION_OUTPUTS_DIR / fn
             print(f"🔄 Procesando: {fn}")
-            hojas_out, estadisticas = procesar_archivo(entrada, exclusiones)
+            hojas_out, estadisticas, df_excluidos = procesar_archivo(entrada, exclusiones)
+            # Qué lista y qué token ha excluido cada email (fuera de exclusions_outputs, que es la entrada de la demo)
+            os.makedirs(EXCLUIDOS_DIR, exist_ok=True)
+            df_excluidos.to_csv(EXCLUIDOS_DIR / fn.replace(".xlsx", "_excluidos.csv"), index=False, encoding="utf-8")
+            if not df_excluidos.empty:
+                por_lista = ", ".join(f"{lista}: {n}" for lista, n in df_excluidos["lista"].value_counts().items())
+                print(f"Emails excluidos por lista → {por_lista}")
             df_data = hojas_out[HOJA_DATA]
             if "reviews" in df_data.columns:
                 df_data["reviews"] = pd.to_numeric(df_data["reviews"], errors="coerce")
                 df_data = df_data.sort_values("reviews", ascending=False)
                 hojas_out[HOJA_DATA] = df_data
-            guardar_hojas(hojas_out, salida)
+            # El gráfico se genera antes para insertarlo mientras se escribe el Excel
             graph_path = XCLUSION_OUTPUTS_DIR / fn.replace(".xlsx", "_stats.jpg")
             estadisticas.T.plot(kind="bar", legend=False, figsize=(12, 6), title="Statistics Overview", color="#3498db")
             plt.xticks(rotation=45, ha="right")
             plt.tight_layout()
             plt.savefig(graph_path, dpi=100)
             plt.close()
-            insertar_imagen_en_excel(salida, graph_path)
+            guardar_hojas(hojas_out, salida, imagen_stats=graph_path, memoria_constante=memoria_constante)
+            guardar_tablas(hojas_out, salida)  # Entrada de la etapa demo
             guardar_tabla_como_imagen(
                 df_data.head(20),
                 XCLUSION_OUTPUTS_DIR / fn.replace(".xlsx", "_data.jpg"),
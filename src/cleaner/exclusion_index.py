@@ -0,0 +1,184 @@
+"""
+exclusion_index.py - Índice compilado de las listas de exclusión de emails.
+
+Comprobar cada email contra cada token (any(tok in email ...)) cuesta
+emails × tokens operaciones en Python. El índice reúne los tokens de todas las
+listas en un trie y lo compila en una única expresión regular: en cada posición
+del email el motor de re (en C) recorre el trie, así que el coste depende de la
+longitud del email y no del número de tokens, y escala a listas de decenas de
+miles de nombres. Cada token recuerda la lista de la que procede, de modo que
+cada exclusión se puede atribuir a una lista y un token.
+
+El índice (tokens y patrón) se guarda en data/cache como JSON junto con la huella
+de cada lista (mtime, tamaño y sha256). Mientras las listas no cambien se carga
+desde ahí sin leerlas ni reconstruir el trie; un cambio de fecha sin cambio de
+contenido no lo invalida. Las listas se pueden activar o desactivar por nombre y
+las de idioma (spamEN, spamIT, spamPT: sufijo de dos mayúsculas) elegir por código.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+
+from src.settings import EXCLUSIONES_FOLDER, CACHE_DIR
+
+VERSION_INDICE = 1
+_RE_IDIOMA = re.compile(r"[A-Z]{2}$")
+
+
+def _patron_trie(tokens):
+    """Expresión regular equivalente a la alternativa de todos los tokens, agrupada por prefijos."""
+    trie = {}
+    for token in tokens:
+        nodo = trie
+        for caracter in token:
+            nodo = nodo.setdefault(caracter, {})
+        nodo[''] = True
+
+    def compilar(nodo):
+        final = '' in nodo
+        ramas = [re.escape(c) + compilar(hijo) for c, hijo in sorted(nodo.items()) if c]
+        if not ramas:
+            return ''
+        cuerpo = ramas[0] if len(ramas) == 1 and len(ramas[0]) == 1 else f"(?:{'|'.join(ramas)})"
+        return f"{cuerpo}?" if final else cuerpo
+
+    return compilar(trie)
+
+
+class IndiceExclusiones:
+    """
+    Tokens de exclusión compilados en un solo patrón.
+
+    - tokens: dict token -> nombre de la lista (fichero sin extensión) que lo aporta.
+    """
+
+    def __init__(self, tokens, patron=None):
+        self.tokens = dict(tokens)
+        if patron is None and self.tokens:
+            patron = _patron_trie(sorted(self.tokens))
+        self.fuente = patron or ''
+        self.patron = re.compile(patron) if patron else None
+        self.desde_cache = False
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def buscar(self, email):
+        """Retorna (lista, token) del primer token contenido en el email, o None."""
+        if self.patron is None:
+            return None
+        m = self.patron.search(email.lower())
+        if m is None:
+            return None
+        return self.tokens[m.group(0)], m.group(0)
+
+
+def idioma_lista(nombre):
+    """Código de idioma de una lista (spamEN -> 'EN') o None si es común a todos."""
+    m = _RE_IDIOMA.search(nombre)
+    return m.group(0) if m and len(nombre) > 2 else None
+
+
+def seleccionar_listas(carpeta=EXCLUSIONES_FOLDER, listas=None, omitir=None, idiomas=None):
+    """
+    {nombre: ruta} de los .txt de la carpeta que entran en el índice, en orden alfabético.
+    - listas: nombres a usar (None = todos).
+    - omitir: nombres a desactivar.
+    - idiomas: códigos de idioma de las listas con sufijo (None = todos); las listas sin sufijo siempre entran.
+    """
+    idiomas = {i.upper() for i in idiomas} if idiomas else None
+    seleccion = {}
+    for fn in sorted(os.listdir(carpeta)):
+        nombre = os.path.splitext(fn)[0]
+        if not fn.endswith(".txt") or (listas and nombre not in listas) or (omitir and nombre in omitir):
+            continue
+        idioma = idioma_lista(nombre)
+        if idiomas is not None and idioma is not None and idioma not in idiomas:
+            continue
+        seleccion[nombre] = Path(carpeta) / fn
+    return seleccion
+
+
+def leer_listas(carpeta=EXCLUSIONES_FOLDER, listas=None, omitir=None, idiomas=None):
+    """{nombre de lista: [tokens]} de las listas seleccionadas, en orden alfabético de fichero."""
+    contenido = {}
+    for nombre, ruta in seleccionar_listas(carpeta, listas, omitir, idiomas).items():
+        with open(ruta, encoding="utf-8") as f:
+            contenido[nombre] = [line.strip().lower() for line in f if line.strip()]
+    return contenido
+
+
+def construir_indice(listas):
+    """Índice a partir de {lista: tokens}; un token repetido se atribuye a la primera lista."""
+    tokens = {}
+    for nombre, lista in listas.items():
+        for token in lista:
+            tokens.setdefault(token, nombre)
+    return IndiceExclusiones(tokens)
+
+
+def _sha256(ruta):
+    with open(ruta, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _huellas(rutas, previas):
+    """Huella de cada lista; el sha256 solo se recalcula si cambian mtime o tamaño."""
+    huellas = {}
+    for nombre, ruta in rutas.items():
+        st = ruta.stat()
+        previa = previas.get(nombre)
+        if previa and previa['mtime_ns'] == st.st_mtime_ns and previa['tamano'] == st.st_size:
+            huellas[nombre] = previa
+        else:
+            huellas[nombre] = {'mtime_ns': st.st_mtime_ns, 'tamano': st.st_size, 'sha256': _sha256(ruta)}
+    return huellas
+
+
+def _ruta_cache(carpeta, listas, omitir, idiomas, cache_dir):
+    clave = json.dumps([str(Path(carpeta).resolve()), sorted(listas or []), sorted(omitir or []),
+                        sorted(i.upper() for i in idiomas) if idiomas else None])
+    return Path(cache_dir) / f"indice_exclusiones_{hashlib.sha1(clave.encode()).hexdigest()[:12]}.json"
+
+
+def cargar_indice(carpeta=EXCLUSIONES_FOLDER, listas=None, omitir=None, idiomas=None, cache_dir=CACHE_DIR):
+    """
+    Índice de las listas seleccionadas (ver seleccionar_listas), desde la caché si
+    ninguna ha cambiado o reconstruido y guardado si no.
+    """
+    rutas = seleccionar_listas(carpeta, listas, omitir, idiomas)
+    ruta_cache = _ruta_cache(carpeta, listas, omitir, idiomas, cache_dir)
+    guardado = {}
+    if ruta_cache.exists():
+        try:
+            with open(ruta_cache, encoding="utf-8") as f:
+                guardado = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"[EXCLUSIÓN] Caché del índice ilegible, se reconstruye: {e}")
+    previas = guardado.get('huellas', {}) if guardado.get('version') == VERSION_INDICE else {}
+    huellas = _huellas(rutas, previas)
+    valido = 'tokens' in guardado and previas.keys() == huellas.keys() and all(
+        previas[n]['sha256'] == huellas[n]['sha256'] for n in huellas
+    )
+    if valido:
+        indice = IndiceExclusiones(guardado['tokens'], guardado['patron'] or None)
+        indice.desde_cache = True
+        if huellas != previas:  # Solo han cambiado fechas: actualizar las huellas
+            _guardar_indice(ruta_cache, indice, huellas)
+        return indice
+    indice = construir_indice(leer_listas(carpeta, listas, omitir, idiomas))
+    _guardar_indice(ruta_cache, indice, huellas)
+    return indice
+
+
+def _guardar_indice(ruta, indice, huellas):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_suffix(".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': VERSION_INDICE, 'huellas': huellas, 'tokens': indice.tokens, 'patron': indice.fuente},
+                  f, ensure_ascii=False, sort_keys=True)
+    tmp.replace(ruta)
@@ -8,6 +8,7 @@ import openpyxl
 from pathlib import Path
 from src.settings import DEMO_INPUTS_DIR, DEMO_OUTPUTS_DIR
 from src.utils.status_manager import load_status, update_status, is_stage_done, log_error
+from src.utils.tablas_intermedias import leer_tablas
 
 def mask_email(email):
     if pd.isna(email) or "@" not in str(email):
@@ -42,6 +43,19 @@ def process_csv(file_path, output_path):
     df = mask_dataframe(df)
     df.to_csv(output_path, index=False)
 
+def mask_cell(value):
+    """Enmascara una celda de Excel según su contenido (email, red social o teléfono)."""
+    if not isinstance(value, str):
+        return value
+    val = value.lower()
+    if "@" in val:
+        return mask_email(value)
+    if any(s in val for s in ["facebook", "instagram", "linkedin", "x.com", "twitter"]):
+        return mask_social(value)
+    if any(char.isdigit() for char in val) and len(val) >= 7:
+        return mask_phone(value)
+    return value
+
 def process_xlsx(file_path, output_path):
     wb = openpyxl.load_workbook(file_path)
     for sheet in wb.sheetnames:
@@ -49,15 +63,18 @@ def process_xlsx(file_path, output_path):
         for row in ws.iter_rows(min_row=2):
             for cell in row:
                 if isinstance(cell.value, str):
-                    val = cell.value.lower()
-                    if "@" in val:
-                        cell.value = mask_email(cell.value)
-                    elif any(s in val for s in ["facebook", "instagram", "linkedin", "x.com", "twitter"]):
-                        cell.value = mask_social(cell.value)
-                    elif any(char.isdigit() for char in val) and len(val) >= 7:
-                        cell.value = mask_phone(cell.value)
+                    cell.value = mask_cell(cell.value)
     wb.save(output_path)
 
+def process_tablas(hojas, output_path, stats_image=None):
+    """
+    Como process_xlsx, pero a partir de las tablas intermedias de la exclusión:
+    enmascara los DataFrames y escribe el Excel demo en una pasada, sin leer el Excel de entrada.
+    """
+    from src.cleaner.exclusion_filter import guardar_hojas
+    hojas = {nombre: df.map(mask_cell) for nombre, df in hojas.items()}
+    guardar_hojas(hojas, output_path, imagen_stats=stats_image)
+
 def run_demo(overwrite=False, test_mode=False, resume=False):
     """
     Genera versiones demo enmascaradas de los archivos en DEMO_INPUTS_DIR.
@@ -84,7 +101,12 @@ def run_demo(overwrite=False, test_mode=False, resume=False):
                 process_csv(src, dest)
                 print(f"✅ Procesado CSV:  {filename} → {dest_name}")
             else:
-                process_xlsx(src, dest)
+                hojas = leer_tablas(src)
+                if hojas is not None:
+                    stats_image = input_folder / f"{stem}_stats.jpg"
+                    process_tablas(hojas, dest, stats_image if stats_image.exists() else None)
+                else:
+                    process_xlsx(src, dest)
                 print(f"✅ Procesado Excel: {filename} → {dest_name}")
             update_status(filename, 'demo_generated', True)
         except Exception as e:
@@ -0,0 +1,154 @@
+"""
+async_scraper.py - Motor asyncio para descargar muchas páginas estáticas en paralelo.
+
+Mantiene cientos de descargas HTTP en vuelo con una única sesión aiohttp
+(reutilización de conexiones), con límites de concurrencia global y por host y
+timeouts por petición. El procesado de cada snapshot (parseo, extractores,
+verificación de emails) es bloqueante, así que se delega a un pool de hilos para
+no frenar el event loop.
+
+No depende de Selenium: las páginas que necesiten navegador las decide el
+callback `procesar` y se escalan fuera de este módulo.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .http_fetcher import cabeceras_http, decodificar_html, analizar_html, CONTENT_TYPES_HTML, MAX_BYTES_HTML
+from .page_snapshot import crear_snapshot
+from .host_scheduler import clave_host, intercalar
+
+MAX_CONCURRENCIA_ASYNC = 200  # Descargas simultáneas en total
+MAX_POR_HOST = 4              # Descargas simultáneas contra un mismo host
+HILOS_EXTRACCION = 16         # Hilos para parseo y verificación de emails
+
+
+async def _descargar(session, url):
+    """
+    Descarga la URL. Retorna (url_final, bytes, Content-Type) o None si no es HTML
+    válido; el texto se decodifica después, en el hilo de extracción.
+    """
+    async with session.get(url, allow_redirects=True) as resp:
+        if resp.status >= 400:
+            logging.info(f"[ASYNC] {url} respondió {resp.status}")
+            return None
+        content_type = resp.headers.get("Content-Type", "").lower()
+        if content_type and not content_type.startswith(CONTENT_TYPES_HTML):
+            logging.info(f"[ASYNC] {url} no es HTML ({content_type})")
+            return None
+        contenido = await resp.content.read(MAX_BYTES_HTML)
+        return str(resp.url), contenido, content_type
+
+
+def _completar_y_procesar(procesar, clave, url, descarga):
+    # Decodificar (chardet) y parsear enlaces también es CPU: se hace en el hilo, no en el event loop
+    snapshot = None
+    if descarga is not None:
+        url_final, contenido, content_type = descarga
+        html = decodificar_html(contenido, content_type)
+        enlaces, texto_visible = analizar_html(html, url_final)
+        snapshot = crear_snapshot(url, url_final, html, enlaces, 'http', texto_visible=texto_visible)
+    return procesar(clave, snapshot)
+
+
+async def _scrapear(tareas, procesar, max_concurrencia, max_por_host, timeout, hilos_extraccion, hosts):
+    loop = asyncio.get_running_loop()
+    cola = asyncio.Queue(maxsize=max_concurrencia * 2)
+    semaforos_host = {}
+    resultados = {}
+    stats = Counter()
+
+    connector = aiohttp.TCPConnector(
+        limit=max_concurrencia,
+        limit_per_host=max_por_host,
+        ttl_dns_cache=300,
+    )
+    client_timeout = aiohttp.ClientTimeout(total=timeout, connect=min(timeout, 5))
+
+    async def worker(session, pool):
+        while True:
+            item = await cola.get()
+            if item is None:
+                cola.task_done()
+                return
+            clave, url = item
+            host = clave_host(url) if hosts else (urlparse(url).hostname or '')
+            sem = semaforos_host.setdefault(host, asyncio.Semaphore(max_por_host))
+            descarga = None
+            espera = inicio = 0.0
+            try:
+                async with sem:
+                    if hosts:
+                        espera = hosts.reservar_inicio(host)
+                        if espera > 0:
+                            await asyncio.sleep(espera)
+                    inicio = time.monotonic()
+                    descarga = await _descargar(session, url)
+                stats['ok' if descarga is not None else 'sin_html'] += 1
+            except asyncio.TimeoutError:
+                stats['timeout'] += 1
+                logging.info(f"[ASYNC] Timeout descargando {url}")
+            except Exception as e:
+                stats['error'] += 1
+                logging.info(f"[ASYNC] Error descargando {url}: {e}")
+            if hosts:
+                hosts.registrar(host, time.monotonic() - inicio if inicio else 0.0, espera, descarga is None)
+            try:
+                resultados[clave] = await loop.run_in_executor(
+                    pool, _completar_y_procesar, procesar, clave, url, descarga
+                )
+            except Exception as e:
+                logging.error(f"[ASYNC] Error procesando {url}: {e}")
+                resultados[clave] = None
+            finally:
+                cola.task_done()
+
+    with ThreadPoolExecutor(max_workers=hilos_extraccion) as pool:
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=client_timeout, headers=cabeceras_http()
+        ) as session:
+            workers = [asyncio.create_task(worker(session, pool)) for _ in range(max_concurrencia)]
+            for tarea in tareas:
+                await cola.put(tarea)
+            for _ in workers:
+                await cola.put(None)
+            await asyncio.gather(*workers)
+
+    logging.info(f"[ASYNC] Descargas: {dict(stats)}")
+    return resultados
+
+
+def scrapear_async(
+    tareas,
+    procesar,
+    max_concurrencia: int = MAX_CONCURRENCIA_ASYNC,
+    max_por_host: int = MAX_POR_HOST,
+    timeout: int = 10,
+    hilos_extraccion: int = HILOS_EXTRACCION,
+    hosts=None,
+):
+    """
+    Descarga en paralelo las URLs de `tareas` y procesa cada snapshot.
+
+    - tareas: iterable de (clave, url).
+    - procesar: función(clave, snapshot) que se ejecuta en un hilo; snapshot es None
+      si la descarga falló o no era HTML.
+    - max_concurrencia / max_por_host: límites de descargas simultáneas.
+    - timeout: segundos máximos por descarga.
+    - hosts: PlanificadorHosts opcional; agrupa por dominio registrado con su
+      concurrencia y retardo mínimo, alterna dominios y anota sus estadísticas.
+
+    Retorna dict {clave: valor devuelto por procesar}.
+    """
+    if hosts:
+        tareas = intercalar(tareas, lambda tarea: tarea[1])
+        max_por_host = hosts.max_por_host
+    return asyncio.run(
+        _scrapear(tareas, procesar, max_concurrencia, max_por_host, timeout, hilos_extraccion, hosts)
+    )
@@ -0,0 +1,112 @@
+"""
+checkpoint.py - Checkpoint incremental (JSONL) de las filas ya scrapeadas de un archivo.
+
+Cada fila resuelta se añade a data/checkpoints/<archivo>.jsonl como una línea
+{"id": <índice de la fila en el CSV>, "fila": {...}}. Las escrituras se agrupan
+en lotes y se vuelcan a disco cada pocas filas o segundos, así que una caída
+solo pierde el último lote. --resume parte del conjunto de ids ya completados
+(no de un índice, que con hilos terminando en cualquier orden no es fiable) y
+el Excel final se construye leyendo el checkpoint, no una lista en memoria.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from src.settings import CHECKPOINT_DIR
+
+FILAS_POR_LOTE = 50     # Volcar a disco cada 50 filas...
+SEGUNDOS_POR_LOTE = 2   # ...o cada 2 segundos, lo que ocurra antes
+
+
+class CheckpointFilas:
+    """
+    Escritor thread-safe del checkpoint de un archivo.
+
+    - nombre_archivo: CSV de clean_inputs al que corresponde.
+    - filas_por_lote / segundos_por_lote: política de volcado a disco.
+    """
+
+    def __init__(self, nombre_archivo, carpeta=CHECKPOINT_DIR, filas_por_lote=FILAS_POR_LOTE,
+                 segundos_por_lote=SEGUNDOS_POR_LOTE):
+        carpeta.mkdir(parents=True, exist_ok=True)
+        self.ruta = carpeta / f"{os.path.splitext(nombre_archivo)[0]}.jsonl"
+        self.filas_por_lote = filas_por_lote
+        self.segundos_por_lote = segundos_por_lote
+        self._lock = threading.Lock()
+        self._pendientes = []
+        self._ultimo_volcado = time.monotonic()
+        self._f = None
+        self.escritas = 0
+
+    def _leer_lineas(self):
+        """Itera (id, fila) del fichero; ignora una última línea truncada por una caída."""
+        if not self.ruta.exists():
+            return
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            for n, linea in enumerate(f, start=1):
+                try:
+                    registro = json.loads(linea)
+                    yield registro['id'], registro['fila']
+                except (ValueError, KeyError):
+                    logging.warning(f"[CHECKPOINT] Línea {n} ilegible en {self.ruta.name}, se ignora.")
+
+    def ids_completados(self):
+        return {idx for idx, _ in self._leer_lineas()}
+
+    def reiniciar(self):
+        """Descarta un checkpoint anterior (ejecución sin --resume)."""
+        with self._lock:
+            self._cerrar_fichero()
+            self.ruta.unlink(missing_ok=True)
+
+    def escribir(self, idx, fila):
+        linea = json.dumps({'id': idx, 'fila': fila}, ensure_ascii=False, default=str)
+        with self._lock:
+            self._pendientes.append(linea)
+            self.escritas += 1
+            if (len(self._pendientes) >= self.filas_por_lote
+                    or time.monotonic() - self._ultimo_volcado >= self.segundos_por_lote):
+                self._volcar()
+
+    def _volcar(self):
+        if self._pendientes:
+            if self._f is None:
+                self._f = open(self.ruta, 'a', encoding='utf-8')
+                if self._f.tell() and not self._termina_en_salto():
+                    self._f.write('\n')  # Aislar la línea truncada de una caída anterior
+            self._f.write('\n'.join(self._pendientes) + '\n')
+            self._f.flush()
+            os.fsync(self._f.fileno())
+            self._pendientes = []
+        self._ultimo_volcado = time.monotonic()
+
+    def _termina_en_salto(self):
+        with open(self.ruta, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _cerrar_fichero(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def cerrar(self):
+        """Vuelca lo pendiente y cierra el fichero (el checkpoint se conserva)."""
+        with self._lock:
+            self._volcar()
+            self._cerrar_fichero()
+
+    def leer_dataframe(self):
+        """DataFrame con las filas del checkpoint en el orden original del CSV."""
+        filas = dict(self._leer_lineas())  # Si una fila se escribió dos veces, gana la última
+        return pd.DataFrame([filas[idx] for idx in sorted(filas)])
+
+    def eliminar(self):
+        """Borra el checkpoint una vez generado el Excel final."""
+        self.cerrar()
+        self.ruta.unlink(missing_ok=True)
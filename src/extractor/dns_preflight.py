@@ -0,0 +1,150 @@
+"""
+dns_preflight.py - Comprobación DNS masiva de las webs antes de lanzar navegadores.
+
+Buena parte de las columnas 'website' de Google Maps apuntan a dominios
+caducados, y cada uno cuesta un timeout de carga completo en Chrome. Antes de
+scrapear un bloque se resuelven en paralelo todos sus hosts con dnspython:
+los que no existen (NXDOMAIN) o no tienen dirección (sin A/AAAA, o sin servidores
+de nombres que respondan) se marcan y no llegan al pool de navegadores.
+
+Los resultados negativos se guardan en una caché SQLite con TTL para no volver a
+consultarlos en las siguientes ejecuciones; los positivos solo se recuerdan en
+memoria durante la ejecución. Un timeout no se considera concluyente.
+"""
+
+import ipaddress
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import dns.exception
+import dns.resolver
+
+from src.settings import CACHE_DIR
+
+ESTADO_OK = "ok"
+ESTADO_NXDOMAIN = "nxdomain"
+ESTADO_SIN_DNS = "sin_dns"          # El dominio existe pero no resuelve a ninguna dirección
+ESTADO_DESCONOCIDO = "desconocido"  # Timeout o SERVFAIL: no concluyente, la fila sigue adelante
+ESTADO_SIN_WEB = "sin_web"
+ESTADOS_MUERTOS = (ESTADO_NXDOMAIN, ESTADO_SIN_DNS)
+
+DNS_CACHE_PATH = CACHE_DIR / "dns_negativo.sqlite"
+TTL_NEGATIVO_DIAS = 7  # Un dominio caducado puede volver a registrarse
+HILOS_DNS = 64
+TIMEOUT_DNS = 3.0
+_LOTE_SQL = 500
+
+
+def _resolver_host(resolver, host):
+    """Estado DNS de un host: ok, nxdomain, sin_dns o desconocido."""
+    for tipo in ("A", "AAAA"):
+        try:
+            resolver.resolve(host, tipo)
+            return ESTADO_OK
+        except dns.resolver.NXDOMAIN:
+            return ESTADO_NXDOMAIN
+        except dns.resolver.NoAnswer:
+            continue
+        except (dns.resolver.NoNameservers, dns.exception.Timeout):
+            # NoNameservers suele ser SERVFAIL o un fallo del resolver local, a menudo pasajero:
+            # no concluyente, no se guarda como dominio muerto
+            return ESTADO_DESCONOCIDO
+        except Exception as e:
+            logging.info(f"[DNS] Error resolviendo {host}: {e}")
+            return ESTADO_DESCONOCIDO
+    return ESTADO_SIN_DNS
+
+
+class PreflightDNS:
+    """
+    Resolución masiva thread-safe con caché negativa persistente.
+
+    - ruta: fichero SQLite de la caché negativa.
+    - ttl_dias: validez de un resultado negativo.
+    - hilos / timeout: consultas simultáneas y segundos máximos por host.
+    """
+
+    def __init__(self, ruta=DNS_CACHE_PATH, ttl_dias=TTL_NEGATIVO_DIAS, hilos=HILOS_DNS, timeout=TIMEOUT_DNS):
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl_dias * 86400
+        self.hilos = hilos
+        self._resolver = dns.resolver.Resolver()
+        self._resolver.lifetime = timeout
+        self._lock = threading.Lock()
+        self._vivos = {}  # host -> estado no negativo de esta ejecución
+        self._conn = sqlite3.connect(str(ruta), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS dns_negativo (
+                host TEXT PRIMARY KEY,
+                estado TEXT NOT NULL,
+                fecha REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("DELETE FROM dns_negativo WHERE fecha < ?", (time.time() - self.ttl,))
+        self._conn.commit()
+        self.stats = {"consultados": 0, "cache_negativa": 0, "muertos": 0, "desconocidos": 0}
+
+    def _negativos_en_cache(self, hosts):
+        limite = time.time() - self.ttl
+        encontrados = {}
+        with self._lock:
+            for i in range(0, len(hosts), _LOTE_SQL):
+                lote = hosts[i:i + _LOTE_SQL]
+                marcas = ",".join("?" * len(lote))
+                filas = self._conn.execute(
+                    f"SELECT host, estado FROM dns_negativo WHERE fecha >= ? AND host IN ({marcas})",
+                    [limite, *lote],
+                ).fetchall()
+                encontrados.update(filas)
+        return encontrados
+
+    def comprobar(self, hosts):
+        """Resuelve los hosts en paralelo. Retorna {host: estado}."""
+        hosts = {h.lower() for h in hosts if h}
+        estados = {}
+        for host in hosts:
+            if host == "localhost":
+                estados[host] = ESTADO_OK
+                continue
+            try:
+                ipaddress.ip_address(host)
+                estados[host] = ESTADO_OK
+            except ValueError:
+                pass
+        with self._lock:
+            estados.update({h: self._vivos[h] for h in hosts if h in self._vivos})
+        restantes = [h for h in hosts if h not in estados]
+        negativos = self._negativos_en_cache(restantes)
+        estados.update(negativos)
+        restantes = [h for h in restantes if h not in negativos]
+
+        if restantes:
+            with ThreadPoolExecutor(max_workers=min(self.hilos, len(restantes))) as executor:
+                resueltos = dict(zip(restantes, executor.map(lambda h: _resolver_host(self._resolver, h), restantes)))
+            estados.update(resueltos)
+            ahora = time.time()
+            with self._lock:
+                for host, estado in resueltos.items():
+                    if estado not in ESTADOS_MUERTOS:
+                        self._vivos[host] = estado
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO dns_negativo (host, estado, fecha) VALUES (?, ?, ?)",
+                    [(h, e, ahora) for h, e in resueltos.items() if e in ESTADOS_MUERTOS],
+                )
+                self._conn.commit()
+                self.stats["consultados"] += len(resueltos)
+                self.stats["desconocidos"] += sum(e == ESTADO_DESCONOCIDO for e in resueltos.values())
+        with self._lock:
+            self.stats["cache_negativa"] += len(negativos)
+            self.stats["muertos"] += sum(e in ESTADOS_MUERTOS for e in estados.values())
+        return estados
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
+        logging.info(f"[DNS] Estadísticas: {self.stats}")
@@ -0,0 +1,160 @@
+"""
+driver_pool.py - Pool de drivers de Selenium con reciclado y comprobación de salud.
+
+Los hilos piden un driver prestado (adquirir) y lo devuelven al terminar
+(liberar). Cada driver se recicla al llegar a un número máximo de URLs o cuando
+el navegador supera un consumo de memoria (RSS), se comprueba que sigue vivo
+antes de reutilizarlo y cerrar() garantiza que no queda ningún navegador abierto.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+
+import psutil
+
+MAX_URLS_POR_DRIVER = 50  # Reciclar el navegador tras 50 URLs
+MAX_RSS_MB = 1500         # Reciclar si el navegador (con sus procesos hijos) supera este RSS
+
+
+def rss_driver_mb(driver):
+    """RSS en MB del proceso del driver y todos sus hijos (navegador, renderers...)."""
+    try:
+        proceso = psutil.Process(driver.service.process.pid)
+        procesos = [proceso] + proceso.children(recursive=True)
+    except Exception:
+        return 0.0
+    total = 0
+    for p in procesos:
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 ** 2)
+
+
+def driver_sano(driver):
+    """Comprueba con una llamada barata que la sesión del navegador sigue respondiendo."""
+    try:
+        return driver.execute_script("return 1") == 1
+    except Exception:
+        return False
+
+
+class DriverPool:
+    """
+    Pool thread-safe de drivers de Selenium.
+
+    - fabrica: función sin argumentos que crea un driver configurado.
+    - max_drivers: número máximo de navegadores abiertos a la vez.
+    - max_urls_por_driver / max_rss_mb: umbrales de reciclado.
+    """
+
+    def __init__(self, fabrica, max_drivers, max_urls_por_driver=MAX_URLS_POR_DRIVER, max_rss_mb=MAX_RSS_MB):
+        self.fabrica = fabrica
+        self.max_drivers = max(1, max_drivers)
+        self.max_urls_por_driver = max_urls_por_driver
+        self.max_rss_mb = max_rss_mb
+        self._libres = []  # drivers devueltos, listos para reutilizar
+        self._usos = {}    # id(driver) -> URLs procesadas
+        self._todos = {}   # id(driver) -> driver (libres y prestados)
+        self._creando = 0
+        self._cond = threading.Condition()
+        self._cerrado = False
+        self.stats = {"creados": 0, "reciclados": 0, "descartados": 0}
+
+    def _crear(self):
+        try:
+            driver = self.fabrica()
+        except Exception:
+            with self._cond:
+                self._creando -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._creando -= 1
+            self._todos[id(driver)] = driver
+            self._usos[id(driver)] = 0
+            self.stats["creados"] += 1
+        return driver
+
+    def _cerrar_driver(self, driver):
+        with self._cond:
+            conocido = self._todos.pop(id(driver), None) is not None
+            self._usos.pop(id(driver), None)
+            # Queda hueco para crear otro driver
+            self._cond.notify()
+        if not conocido:
+            return  # Ya cerrado (p. ej. por cerrar() mientras estaba prestado)
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.error(f"Error cerrando driver: {e}")
+
+    def adquirir(self, timeout=None):
+        """Presta un driver sano; lo crea si hay hueco o espera a que se libere uno."""
+        while True:
+            with self._cond:
+                while True:
+                    if self._cerrado:
+                        raise RuntimeError("El pool de drivers está cerrado.")
+                    if self._libres:
+                        driver = self._libres.pop()
+                        break
+                    if len(self._todos) + self._creando < self.max_drivers:
+                        self._creando += 1
+                        driver = None
+                        break
+                    if not self._cond.wait(timeout):
+                        raise TimeoutError("No hay drivers libres en el pool.")
+            if driver is None:
+                return self._crear()
+            if driver_sano(driver):
+                return driver
+            logging.warning("Driver sin respuesta en el pool, se descarta.")
+            self.stats["descartados"] += 1
+            self._cerrar_driver(driver)
+
+    def liberar(self, driver, descartar=False):
+        """Devuelve el driver al pool, reciclándolo si alcanzó sus límites."""
+        with self._cond:
+            usos = self._usos.get(id(driver), 0) + 1
+            self._usos[id(driver)] = usos
+        if self._cerrado or descartar:
+            self._cerrar_driver(driver)
+            return
+        rss = rss_driver_mb(driver) if self.max_rss_mb else 0
+        if usos >= self.max_urls_por_driver or (self.max_rss_mb and rss > self.max_rss_mb):
+            logging.info(f"Reciclando driver tras {usos} URLs ({rss:.0f} MB).")
+            self.stats["reciclados"] += 1
+            self._cerrar_driver(driver)
+            return
+        with self._cond:
+            self._libres.append(driver)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Context manager: with pool.driver() as drv: ..."""
+        drv = self.adquirir(timeout=timeout)
+        try:
+            yield drv
+        finally:
+            self.liberar(drv)
+
+    def cerrar(self):
+        """Cierra todos los navegadores, prestados o libres."""
+        with self._cond:
+            self._cerrado = True
+            drivers = list(self._todos.values())
+            self._libres.clear()
+            self._cond.notify_all()
+        for drv in drivers:
+            self._cerrar_driver(drv)
+        logging.info(f"Pool de drivers cerrado: {self.stats}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
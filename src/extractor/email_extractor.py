@@ -1,12 +1,39 @@
 import re
 from pathlib import Path
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
 import logging
 
 from .utils import setup_driver
-from .email_verifier import verificar_existencia_email, determinar_estado
+from .email_verifier import verificar_lote, determinar_estado
+from .page_snapshot import registrar_extractor, capturar_selenium
+
+
+EMAIL_REGEX = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+
+
+def extraer_candidatos(html: str):
+    """Emails candidatos (sin verificar) presentes en un HTML, sin duplicados y ordenados."""
+    return sorted(set(EMAIL_REGEX.findall(html or '')))
+
+
+def extract_emails_from_html(html: str, modo_verificacion: str = 'avanzado'):
+    """
+    Extrae y verifica los emails presentes en un HTML ya descargado.
+
+    Retorna lista de emails válidos.
+    """
+    # Todos los dominios de la página se verifican a la vez
+    verificados = verificar_lote(extraer_candidatos(html), modo=modo_verificacion)
+    return [e for e, resultados in verificados.items()
+            if determinar_estado(resultados, modo=modo_verificacion) == 'Válido']
+
+
+@registrar_extractor('email')
+def extractor_emails(snapshot, **_):
+    """
+    Plug-in de extracción de emails sobre un snapshot de página.
+    Solo devuelve candidatos: la verificación es una etapa aparte (verification_stage.py).
+    """
+    return {'email': extraer_candidatos(snapshot['html'])}
 
 
 def extract_emails_from_url(
@@ -17,6 +44,7 @@ def extract_emails_from_url(
 ):
     """
     Extrae emails de la URL dada usando Selenium driver compartido.
+    Para extraer también redes sin recargar la página, usar capturar_selenium + ejecutar_extractores.
     - url: dirección HTTP/HTTPS.
     - modo_verificacion: 'avanzado' o 'ultra-avanzado'.
     - driver: instancia de Selenium; si no se pasa, se crea y cierra internamente.
@@ -35,25 +63,8 @@ def extract_emails_from_url(
         driver_created = True
 
     try:
-        driver.get(url)
-        # Espera explícita a que el <body> esté presente (carga completa)
-        WebDriverWait(driver, wait_timeout).until(
-            EC.presence_of_element_located((By.TAG_NAME, 'body'))
-        )
-        html = driver.page_source
-
-        # Extraer con regex
-        raw_emails = set(re.findall(
-            r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+",
-            html
-        ))
-
-        valid_emails = []
-        for e in raw_emails:
-            resultados = verificar_existencia_email(e, modo=modo_verificacion)
-            estado = determinar_estado(resultados, modo=modo_verificacion)
-            if estado == 'Válido':
-                valid_emails.append(e)
+        snapshot = capturar_selenium(url, driver, wait_timeout=wait_timeout)
+        valid_emails = extract_emails_from_html(snapshot['html'], modo_verificacion=modo_verificacion)
 
         logging.info(f"Emails extraídos: {valid_emails}")
         print(f"🔍 {url} → Emails extraídos: {valid_emails}")
@@ -0,0 +1,100 @@
+"""
+email_prefilter.py - Descarte local de candidatos a email antes de cualquier consulta de red.
+
+La regex de email_extractor también captura nombres de recursos (logo@2x.png),
+claves de Sentry y otros hash@dominio, direcciones de ejemplo y dominios de
+seguimiento. Cada uno de ellos costaría una validación con pyisemail y varias
+consultas DNS. Aquí se rechazan con reglas locales, comprobadas en orden, y
+se cuenta cuántos candidatos descarta cada regla:
+
+- extension: el "dominio" termina en una extensión de fichero (imágenes, CSS, JS, fuentes...).
+- resolucion: sufijos de imágenes retina (@2x, @3x...).
+- hash: la parte local es un hash hexadecimal (DSN de Sentry, identificadores de seguimiento).
+- tld: el TLD no es alfabético (versiones, IPs, restos de JS).
+- placeholder: dominio de ejemplo o de seguimiento (config/txt_config/dominios_placeholder.txt)
+  o parte local de plantilla (tuemail@, your.email@...).
+- desechable: dominio de email desechable (config/txt_config/dominios_desechables.txt).
+"""
+
+import re
+from collections import Counter
+
+from src.settings import TXT_CONFIG_DIR
+
+DESECHABLES_TXT = TXT_CONFIG_DIR / "dominios_desechables.txt"
+PLACEHOLDER_TXT = TXT_CONFIG_DIR / "dominios_placeholder.txt"
+
+# Solo extensiones que no son TLD delegados: .zip, .mov o .map son dominios reales
+EXTENSIONES_RECURSOS = (
+    'png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp', 'tif', 'tiff', 'heic',
+    'css', 'scss', 'js', 'mjs', 'json', 'xml', 'php', 'html', 'htm',
+    'woff', 'woff2', 'ttf', 'otf', 'eot', 'mp3', 'mp4', 'webm', 'avi', 'pdf',
+)
+PARTES_LOCALES_PLANTILLA = {
+    'you', 'your', 'yourname', 'youremail', 'your.email', 'your-email', 'your_email', 'name', 'username',
+    'example', 'tuemail', 'tu.email', 'tucorreo', 'tunombre', 'nombre', 'usuario', 'ejemplo',
+}
+
+REGLA_EXTENSION = "extension"
+REGLA_RESOLUCION = "resolucion"
+REGLA_HASH = "hash"
+REGLA_TLD = "tld"
+REGLA_PLACEHOLDER = "placeholder"
+REGLA_DESECHABLE = "desechable"
+
+_RE_EXTENSION = re.compile(r"\.(?:%s)$" % "|".join(EXTENSIONES_RECURSOS), re.IGNORECASE)
+_RE_RESOLUCION = re.compile(r"@\d+(?:\.\d+)?x(?:[.\-_]|$)", re.IGNORECASE)
+_RE_HASH = re.compile(r"^[0-9a-f]{16,}@", re.IGNORECASE)
+_RE_TLD = re.compile(r"\.(?:[a-z]{2,63}|xn--[a-z0-9-]+)$", re.IGNORECASE)
+
+
+def cargar_dominios(ruta):
+    if not ruta.exists():
+        return frozenset()
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return frozenset(line.strip().lower() for line in f if line.strip() and not line.startswith('#'))
+
+
+DOMINIOS_DESECHABLES = cargar_dominios(DESECHABLES_TXT)
+DOMINIOS_PLACEHOLDER = cargar_dominios(PLACEHOLDER_TXT)
+
+
+def _en_lista(dominio, dominios):
+    """El dominio o alguno de sus dominios padre está en la lista."""
+    partes = dominio.split('.')
+    return any('.'.join(partes[i:]) in dominios for i in range(len(partes) - 1))
+
+
+def es_desechable(dominio):
+    return _en_lista(dominio.lower().rstrip('.'), DOMINIOS_DESECHABLES)
+
+
+def motivo_rechazo(email):
+    """Nombre de la regla que descarta el candidato, o None si hay que verificarlo."""
+    if _RE_EXTENSION.search(email):
+        return REGLA_EXTENSION
+    if _RE_RESOLUCION.search(email):
+        return REGLA_RESOLUCION
+    if _RE_HASH.match(email):
+        return REGLA_HASH
+    local, _, dominio = email.lower().rpartition('@')
+    if not _RE_TLD.search(dominio):
+        return REGLA_TLD
+    if local in PARTES_LOCALES_PLANTILLA or _en_lista(dominio, DOMINIOS_PLACEHOLDER):
+        return REGLA_PLACEHOLDER
+    if _en_lista(dominio, DOMINIOS_DESECHABLES):
+        return REGLA_DESECHABLE
+    return None
+
+
+def filtrar_candidatos(emails):
+    """Separa los candidatos que merecen verificación. Retorna (aceptados, Counter de rechazos por regla)."""
+    aceptados = []
+    rechazos = Counter()
+    for email in emails:
+        motivo = motivo_rechazo(email)
+        if motivo is None:
+            aceptados.append(email)
+        else:
+            rechazos[motivo] += 1
+    return aceptados, rechazos
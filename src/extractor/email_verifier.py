@@ -1,7 +1,17 @@
+import asyncio
+import dns.asyncresolver
 import dns.resolver
 import pyisemail
 from pathlib import Path
-import smtplib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .email_prefilter import motivo_rechazo, es_desechable
+from .smtp_probe import (
+    SondeadorSMTP, BUZON_INEXISTENTE, BUZON_SIN_COMPROBAR, PUERTO_SMTP, MAX_SESIONES_POR_MX, INTERVALO_MIN_MX
+)
 
 # Configuración de rutas (adaptar según necesidad)
 # CARPETA_BASE = Path("C:/Users/Usuario/Desktop/CSVExtractorProyect")
@@ -19,6 +29,136 @@ CARPETA_INPUTS.mkdir(parents=True, exist_ok=True)
 CARPETA_OUTPUTS.mkdir(parents=True, exist_ok=True)
 
 
+# Caché de consultas DNS y veredictos por dominio
+TTL_DNS = 3600            # Segundos de validez de una respuesta DNS o un veredicto
+TTL_DNS_NEGATIVO = 300    # Los fallos (timeouts incluidos) se recuerdan menos tiempo
+MAX_ENTRADAS_DNS = 50_000
+MAX_ENTRADAS_VEREDICTOS = 20_000
+
+# Verificación por lotes (verificar_lote)
+MAX_CONSULTAS_ASYNC = 100  # Consultas DNS y sondeos SMTP simultáneos
+TIMEOUT_ASYNC = 5          # Segundos máximos por consulta o sondeo
+SELECTORES_DKIM = ['default', 'dkim', 'selector1', 'selector2', 'mail']
+HILOS_SMTP = 16  # Comprobaciones de buzón simultáneas en verificar_lote (ultra-avanzado)
+
+
+class CacheDNS:
+    """
+    Caché thread-safe con TTL y expulsión LRU.
+    Las claves son tuplas (dominio, tipo) o (dominio, modo); los valores para los
+    que es_negativo(valor) es cierto caducan antes (ttl_negativo), porque pueden
+    deberse a un timeout pasajero.
+    """
+
+    def __init__(self, max_entradas, ttl=TTL_DNS, ttl_negativo=TTL_DNS_NEGATIVO, es_negativo=lambda v: v is None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.ttl_negativo = ttl_negativo
+        self.es_negativo = es_negativo
+        self._datos = OrderedDict()  # clave -> (caduca, valor)
+        self._lock = threading.Lock()
+        self.stats = {"aciertos": 0, "fallos": 0, "expulsiones": 0}
+
+    def obtener(self, clave, calcular):
+        """Devuelve el valor en caché o lo calcula con calcular() y lo guarda."""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[0] > ahora:
+                self._datos.move_to_end(clave)
+                self.stats["aciertos"] += 1
+                return entrada[1]
+            self.stats["fallos"] += 1
+        valor = calcular()
+        self.guardar(clave, valor)
+        return valor
+
+    def guardar(self, clave, valor):
+        ttl = self.ttl_negativo if self.es_negativo(valor) else self.ttl
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.stats["expulsiones"] += 1
+
+    def contiene(self, clave):
+        """Si hay un valor vigente para la clave (sin contar acierto ni fallo)."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            return entrada is not None and entrada[0] > time.monotonic()
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+
+_cache_dns = CacheDNS(MAX_ENTRADAS_DNS)
+_cache_veredictos = CacheDNS(
+    MAX_ENTRADAS_VEREDICTOS,
+    es_negativo=lambda v: v.get('Dominio') != 'Válido' or v.get('MX', 'Válido') != 'Válido',
+)
+# Sesiones SMTP reutilizadas por MX para los sondeos de ultra-avanzado (ver configurar_sondeo)
+_sondeo = SondeadorSMTP()
+
+
+def configurar_sondeo(puerto=PUERTO_SMTP, max_sesiones_por_mx=MAX_SESIONES_POR_MX, intervalo_min=INTERVALO_MIN_MX):
+    """
+    Sustituye el sondeador SMTP por uno nuevo con este puerto y estos límites por MX,
+    cerrando las sesiones del anterior. almacen_verificaciones lo llama al empezar
+    cada ejecución. Retorna el sondeador nuevo.
+    """
+    global _sondeo
+    anterior = _sondeo
+    _sondeo = SondeadorSMTP(max_sesiones_por_mx=max_sesiones_por_mx, intervalo_min=intervalo_min, puerto=puerto)
+    anterior.cerrar()
+    return _sondeo
+
+
+# Almacén persistente opcional (AlmacenVerificaciones), activado por la etapa de scraping
+_almacen = None
+_leer_almacen = True
+
+
+def activar_almacen(almacen, leer=True):
+    """
+    Respaldar las verificaciones con un almacén persistente.
+    leer=False solo escribe (se vuelve a verificar todo y se sobrescribe lo guardado).
+    """
+    global _almacen, _leer_almacen
+    _almacen = almacen
+    _leer_almacen = leer
+
+
+def desactivar_almacen():
+    activar_almacen(None)
+
+
+def estadisticas_cache():
+    """Aciertos/fallos de la caché DNS y de veredictos por dominio, y contadores de los sondeos SMTP."""
+    return {"dns": dict(_cache_dns.stats), "veredictos": dict(_cache_veredictos.stats), "smtp": dict(_sondeo.stats)}
+
+
+def _consultar(nombre, tipo):
+    """
+    Resuelve (con caché) los registros `tipo` de `nombre`.
+    Retorna la lista de registros como texto ((preferencia, servidor) para MX) o None si falla.
+    """
+    def resolver():
+        try:
+            return _registros(tipo, dns.resolver.resolve(nombre, tipo))
+        except dns.exception.DNSException:
+            return None
+
+    return _cache_dns.obtener((nombre.lower(), tipo), resolver)
+
+
+def _registros(tipo, respuesta):
+    if tipo == 'MX':
+        return [(r.preference, str(r.exchange)) for r in respuesta]
+    return [str(r) for r in respuesta]
+
+
 # Funciones de verificación
 def verificar_formato_email(email):
     """Verifica que el formato del email sea correcto utilizando pyisemail."""
@@ -28,84 +168,79 @@ def verificar_formato_email(email):
 def verificar_dominio(email):
     """Verifica que el dominio del email tenga registros DNS válidos."""
     dominio = email.split('@')[-1]
-    try:
-        dns.resolver.resolve(dominio, 'A')
-        return True
-    except dns.exception.DNSException:
-        return False
+    return _consultar(dominio, 'A') is not None
 
 
 def verificar_MX(email):
     """Verifica que el dominio del email tenga registros MX válidos."""
     dominio = email.split('@')[-1]
-    try:
-        registros_mx = dns.resolver.resolve(dominio, 'MX')
-        return len(registros_mx) > 0
-    except dns.exception.DNSException:
-        return False
+    return bool(_consultar(dominio, 'MX'))
 
 
 def verificar_registros_SPF(dominio):
     """Verifica si el dominio tiene registros SPF válidos."""
-    try:
-        registros_spf = dns.resolver.resolve(dominio, 'TXT')
-        for txt_record in registros_spf:
-            if 'v=spf1' in str(txt_record).lower():
-                return True
-        return False
-    except dns.exception.DNSException:
-        return False
+    return any('v=spf1' in txt.lower() for txt in _consultar(dominio, 'TXT') or [])
 
 
 def verificar_registros_DMARC(dominio):
     """Verifica si el dominio tiene una política DMARC."""
-    try:
-        registros_dmarc = dns.resolver.resolve('_dmarc.' + dominio, 'TXT')
-        for txt_record in registros_dmarc:
-            if 'v=dmarc1' in str(txt_record).lower():
-                return True
-        return False
-    except dns.exception.DNSException:
-        return False
+    return any('v=dmarc1' in txt.lower() for txt in _consultar('_dmarc.' + dominio, 'TXT') or [])
 
 
 def verificar_registros_DKIM(dominio):
     """Verifica si el dominio tiene registros DKIM."""
-    try:
-        selectores = ['default', 'dkim', 'selector1', 'selector2', 'mail']
-        for selector in selectores:
-            registros_dkim = dns.resolver.resolve(f'{selector}._domainkey.{dominio}', 'TXT')
-            for txt_record in registros_dkim:
-                if 'v=dkim1' in str(txt_record).lower():
-                    return True
-        return False
-    except dns.exception.DNSException:
-        return False
+    for selector in SELECTORES_DKIM:
+        # Un selector inexistente no descarta los siguientes
+        registros_dkim = _consultar(f'{selector}._domainkey.{dominio}', 'TXT') or []
+        if any('v=dkim1' in txt.lower() for txt in registros_dkim):
+            return True
+    return False
 
 
 def verificar_servidor_SMTP(email):
     """Verifica si el servidor SMTP del dominio está activo."""
     dominio = email.split('@')[-1]
-    try:
-        registros_mx = dns.resolver.resolve(dominio, 'MX')
-        mx_record = str(min(registros_mx, key=lambda r: r.preference).exchange)
-        server = smtplib.SMTP(timeout=5)
-        server.connect(mx_record)
-        server.quit()
-        return True
-    except Exception:
-        return False
+    mx_record = _mx_principal(dominio)
+    return mx_record is not None and _sondeo.esta_vivo(mx_record)
+
+
+def verificar_buzon_SMTP(email):
+    """Comprueba con RCPT TO si el MX del dominio acepta el buzón (ver smtp_probe.py)."""
+    mx_record = _mx_principal(email.split('@')[-1])
+    if mx_record is None:
+        return BUZON_SIN_COMPROBAR
+    return _sondeo.comprobar_buzon(mx_record, email)
+
+
+def _mx_principal(dominio):
+    registros_mx = _consultar(dominio, 'MX')  # Misma consulta que verificar_MX: sale de la caché
+    return min(registros_mx)[1] if registros_mx else None
+
+
+def cerrar_sesiones_smtp():
+    """Cierra las sesiones SMTP reutilizables que queden abiertas."""
+    _sondeo.cerrar()
 
 
 def verificar_disposable_email(email):
-    """Verifica si el email es de un dominio desechable conocido."""
-    disposable_domains = set(['mailinator.com', 'trashmail.com', 'tempmail.com', '10minutemail.com'])
-    dominio = email.split('@')[-1]
-    return dominio in disposable_domains
+    """Verifica si el email es de un dominio desechable conocido (config/txt_config/dominios_desechables.txt)."""
+    return es_desechable(email.split('@')[-1])
 
 
 def verificar_existencia_email(email, modo='avanzado'):
     """Verifica la existencia del correo electrónico según el modo seleccionado."""
+    almacen = _almacen
+    if almacen is not None and _leer_almacen:
+        guardados = almacen.obtener_email(email, modo)
+        if guardados is not None:
+            return dict(guardados)
+    resultados = _verificar_email(email, modo)
+    if almacen is not None:
+        almacen.guardar_email(email, modo, resultados, determinar_estado(resultados, modo))
+    return resultados
+
+
+def _verificar_email(email, modo):
     resultados = {}
     if not verificar_formato_email(email):
         resultados['Formato'] = 'Formato inválido'
@@ -113,6 +248,31 @@ def verificar_existencia_email(email, modo='avanzado'):
     else:
         resultados['Formato'] = 'Válido'
 
+    # El resto de comprobaciones solo dependen del dominio: se calculan una vez por dominio y modo
+    dominio = email.split('@')[-1].lower()
+    resultados.update(_cache_veredictos.obtener((dominio, modo), lambda: _veredicto_dominio(dominio, modo)))
+    if modo == 'ultra-avanzado' and resultados.get('Servidor SMTP') == 'Activo':
+        resultados['Buzón'] = verificar_buzon_SMTP(email)
+    return resultados
+
+
+def _veredicto_dominio(dominio, modo):
+    """Veredicto del dominio: del almacén persistente si lo hay, si no se verifica y se guarda."""
+    almacen = _almacen
+    if almacen is not None and _leer_almacen:
+        guardado = almacen.obtener_dominio(dominio, modo)
+        if guardado is not None:
+            return guardado
+    resultados = _verificar_dominio_completo(dominio, modo)
+    if almacen is not None:
+        almacen.guardar_dominio(dominio, modo, resultados)
+    return resultados
+
+
+def _verificar_dominio_completo(dominio, modo):
+    """Comprobaciones a nivel de dominio de verificar_existencia_email."""
+    email = f"@{dominio}"
+    resultados = {}
     if not verificar_dominio(email):
         resultados['Dominio'] = 'Dominio inválido'
         return resultados
@@ -131,8 +291,6 @@ def verificar_existencia_email(email, modo='avanzado'):
     if modo == 'avanzado':
         return resultados
 
-    dominio = email.split('@')[-1]
-
     resultados['SPF'] = 'Válido' if verificar_registros_SPF(dominio) else 'Sin registros SPF'
     resultados['DMARC'] = 'Válido' if verificar_registros_DMARC(dominio) else 'Sin registros DMARC'
     resultados['DKIM'] = 'Válido' if verificar_registros_DKIM(dominio) else 'Sin registros DKIM'
@@ -142,6 +300,115 @@ def verificar_existencia_email(email, modo='avanzado'):
     return resultados
 
 
+def _consultas_dominio(dominio, modo):
+    """(nombre, tipo) de todas las consultas DNS que hace verificar_existencia_email para el dominio."""
+    consultas = [(dominio, 'A')]
+    if modo != 'normal':
+        consultas.append((dominio, 'MX'))
+    if modo == 'ultra-avanzado':
+        consultas.append((dominio, 'TXT'))
+        consultas.append(('_dmarc.' + dominio, 'TXT'))
+        consultas.extend((f'{selector}._domainkey.{dominio}', 'TXT') for selector in SELECTORES_DKIM)
+    return consultas
+
+
+async def _consultar_async(resolver, limite, nombre, tipo):
+    clave = (nombre.lower(), tipo)
+    if _cache_dns.contiene(clave):
+        return
+    async with limite:
+        try:
+            valor = _registros(tipo, await resolver.resolve(nombre, tipo))
+        except dns.exception.DNSException:
+            valor = None
+    _cache_dns.guardar(clave, valor)
+
+
+async def _precargar_dominios(dominios, modo, max_concurrencia, timeout):
+    """Lanza a la vez todas las consultas (y sondeos SMTP) de los dominios y las deja en la caché."""
+    resolver = dns.asyncresolver.Resolver()
+    resolver.lifetime = timeout
+    limite = asyncio.Semaphore(max_concurrencia)
+
+    async def precargar(dominio):
+        await asyncio.gather(*(
+            _consultar_async(resolver, limite, nombre, tipo) for nombre, tipo in _consultas_dominio(dominio, modo)
+        ))
+        if modo == 'ultra-avanzado':
+            mx_record = _mx_principal(dominio)
+            if mx_record:
+                # El sondeador aplica sus propios límites por MX y recuerda si cada MX está vivo
+                async with limite:
+                    await asyncio.to_thread(_sondeo.esta_vivo, mx_record)
+
+    await asyncio.gather(*(precargar(d) for d in dominios))
+
+
+def verificar_lote(emails, modo='avanzado', max_concurrencia=MAX_CONSULTAS_ASYNC, timeout=TIMEOUT_ASYNC):
+    """
+    Verifica varios emails a la vez. Retorna {email: resultados} como verificar_existencia_email.
+
+    Los emails se agrupan por dominio y, para los dominios sin veredicto en caché,
+    todas las consultas (A, MX, SPF, DMARC, los selectores DKIM) y el sondeo SMTP se
+    lanzan concurrentemente con asyncio, con un límite global de concurrencia y un
+    timeout por consulta. La latencia pasa a ser la de la consulta más lenta, no la
+    suma de todas. Con los registros ya en caché, el veredicto se compone igual que
+    en la verificación individual. Los candidatos que descarta el prefiltro local
+    (email_prefilter.py) no llegan a la red.
+    """
+    emails = list(dict.fromkeys(emails))
+    resultados = {}
+    for email in emails:
+        motivo = motivo_rechazo(email)
+        if motivo is not None:
+            resultados[email] = {'Formato': f'Descartado ({motivo})'}
+    emails = [e for e in emails if e not in resultados]
+    almacen = _almacen if _leer_almacen else None
+    dominios = set()
+    for email in emails:
+        if almacen is not None and almacen.contiene_email(email, modo):
+            continue
+        if not verificar_formato_email(email):
+            continue
+        dominio = email.split('@')[-1].lower()
+        if _cache_veredictos.contiene((dominio, modo)):
+            continue
+        if almacen is not None and almacen.contiene_dominio(dominio, modo):
+            continue
+        dominios.add(dominio)
+    if dominios:
+        try:
+            asyncio.get_running_loop()
+            en_event_loop = True
+        except RuntimeError:
+            en_event_loop = False
+        # Desde dentro de un event loop no se puede usar asyncio.run: se verifica de forma síncrona
+        if not en_event_loop:
+            asyncio.run(_precargar_dominios(sorted(dominios), modo, max_concurrencia, timeout))
+    if modo == 'ultra-avanzado' and len(emails) > 1:
+        # Cada email necesita su RCPT TO: en paralelo, dentro de los límites por MX del sondeador
+        with ThreadPoolExecutor(max_workers=min(HILOS_SMTP, len(emails))) as executor:
+            resultados.update(zip(emails, executor.map(lambda e: verificar_existencia_email(e, modo), emails)))
+    else:
+        resultados.update((email, verificar_existencia_email(email, modo)) for email in emails)
+    return resultados
+
+
+def _es_error_ultra(clave, valor):
+    """
+    True si el resultado de ultra-avanzado descarta el email. Cada comprobación se
+    compara con su valor positivo: 'No' en dominio desechable, 'Activo' en servidor
+    SMTP y 'Válido' en el resto. El buzón solo descarta si no existe.
+    """
+    if clave == 'Dominio desechable':
+        return valor != 'No'
+    if clave == 'Servidor SMTP':
+        return valor != 'Activo'
+    if clave == 'Buzón':
+        return valor == BUZON_INEXISTENTE  # Sin comprobar (greylisting, puerto 25 bloqueado...) no descarta
+    return valor != 'Válido'
+
+
 def determinar_estado(resultados, modo):
     """Determina el estado final del email basado en los resultados de verificación."""
     if 'Formato' in resultados and resultados['Formato'] != 'Válido':
@@ -151,9 +418,9 @@ def determinar_estado(resultados, modo):
     elif modo == 'avanzado' and resultados.get('MX', '') != 'Válido':
         return resultados['MX']
     elif modo == 'ultra-avanzado':
-        errores_ultra = [k for k, v in resultados.items() if v != 'Válido' and k not in ['Formato', 'Dominio']]
+        errores_ultra = [k for k, v in resultados.items() if _es_error_ultra(k, v) and k not in ['Formato', 'Dominio']]
         if errores_ultra:
-            return ', '.join([f"{k}: {v}" for k, v in resultados.items() if v != 'Válido'])
+            return ', '.join([f"{k}: {v}" for k, v in resultados.items() if _es_error_ultra(k, v)])
         else:
             return 'Válido'
     else:
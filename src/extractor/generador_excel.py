@@ -1,7 +1,8 @@
 import pandas as pd
 from pathlib import Path
 from urllib.parse import urlparse
-from src.settings import OUTPUTS_DIR
+from src.settings import OUTPUTS_DIR, HOJA_DATA, HOJA_STATS, HOJA_COPYRIGHT
+from src.utils.tablas_intermedias import guardar_tablas
 
 # Ruta base: suponiendo que este archivo está en extractor/
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -13,6 +14,8 @@ def generar_excel(df_resultado, nombre_archivo):
       - Hoja `statistics` con métricas.
       - Hoja `sectors` (si existe `main_category`).
       - Hoja `copyright` con aviso legal.
+    Las hojas se guardan también en formato columnar junto al Excel
+    (ver utils.tablas_intermedias) para que la exclusión no tenga que leerlo.
     """
     # --- Cálculo de métricas adicionales ---
     if "website" in df_resultado.columns:
@@ -30,12 +33,9 @@ def generar_excel(df_resultado, nombre_archivo):
     num_socials = 0
     for col in social_cols:
         if col in df_resultado.columns:
-            counts = (
-                df_resultado[col]
-                .dropna()
-                .astype(str)
-                .apply(lambda s: sum(1 for link in s.split(",") if link.strip()))
-                .sum()
+            counts = sum(
+                sum(1 for link in s.split(",") if link.strip())
+                for s in df_resultado[col].dropna().astype(str)
             )
             num_socials += counts
 
@@ -49,8 +49,9 @@ def generar_excel(df_resultado, nombre_archivo):
     ) as writer:
 
         # Hoja de datos
-        df_resultado.to_excel(writer, sheet_name="data", index=False)
-        worksheet = writer.sheets["data"]
+        hojas = {HOJA_DATA: df_resultado}
+        df_resultado.to_excel(writer, sheet_name=HOJA_DATA, index=False)
+        worksheet = writer.sheets[HOJA_DATA]
         last_col = len(df_resultado.columns)
         if last_col > 0:
             last_letter = chr(ord('A') + last_col - 1)
@@ -65,7 +66,8 @@ def generar_excel(df_resultado, nombre_archivo):
             "Number of social networks": [num_socials],
         }
         df_stats = pd.DataFrame(stats)
-        df_stats.to_excel(writer, sheet_name="statistics", index=False)
+        df_stats.to_excel(writer, sheet_name=HOJA_STATS, index=False)
+        hojas[HOJA_STATS] = df_stats
 
         # Sectores (main_category)
         if "main_category" in df_resultado.columns:
@@ -76,6 +78,7 @@ def generar_excel(df_resultado, nombre_archivo):
                 .rename(columns={"index": "Sector", "main_category": "Number of companies"})
             )
             df_sectors.to_excel(writer, sheet_name="sectors", index=False)
+            hojas["sectors"] = df_sectors
 
         # Copyright
         copyright_text = """
@@ -104,9 +107,12 @@ The data has been collected from public sources and complies with current regula
         )
         df_copyright.to_excel(
             writer,
-            sheet_name="copyright",
+            sheet_name=HOJA_COPYRIGHT,
             index=False,
             header=False
         )
+        hojas[HOJA_COPYRIGHT] = df_copyright
+
+    guardar_tablas(hojas, excel_path)
 
     print(f"Excel generado con estadísticas y datos: {excel_path}")
@@ -0,0 +1,180 @@
+"""
+host_scheduler.py - Cortesía por host: concurrencia máxima, retardo mínimo e intercalado.
+
+Los CSV vienen ordenados por ciudad o sector, así que es habitual que decenas de
+filas seguidas compartan dominio (cadenas, franquicias, webs de un mismo
+proveedor). Lanzadas a la vez provocan limitaciones y timeouts que consumen el
+wait_timeout de cada fila. El planificador agrupa las URLs por dominio
+registrado, limita cuántas cargas simultáneas recibe cada uno, separa los
+inicios de carga un retardo mínimo y reordena el trabajo para alternar dominios.
+Las estadísticas por dominio permiten ver quién nos está frenando.
+"""
+
+import ipaddress
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+MAX_POR_HOST = 2          # Cargas simultáneas por dominio registrado
+RETARDO_MIN_HOST = 0.5    # Segundos mínimos entre dos inicios de carga en el mismo dominio
+
+# Segundos niveles habituales bajo un TLD de país (ejemplo.com.es, ejemplo.co.uk...)
+_SEGUNDOS_NIVELES = {'com', 'co', 'org', 'net', 'gob', 'gov', 'edu', 'ac', 'nom', 'ltd', 'plc'}
+
+
+def dominio_registrado(host):
+    """Aproxima el dominio registrado de un host sin lista de sufijos públicos."""
+    host = (host or '').lower().rstrip('.')
+    if not host:
+        return ''
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    partes = host.split('.')
+    if len(partes) >= 3 and len(partes[-1]) == 2 and partes[-2] in _SEGUNDOS_NIVELES:
+        return '.'.join(partes[-3:])
+    return '.'.join(partes[-2:])
+
+
+def clave_host(url):
+    return dominio_registrado(urlparse(url if '://' in url else f"http://{url}").hostname) if url else ''
+
+
+def intercalar(items, url_de):
+    """
+    Reordena `items` alternando dominios (round-robin), respetando el orden
+    original dentro de cada dominio. url_de: función(item) -> URL.
+    """
+    grupos = defaultdict(list)
+    for item in items:
+        grupos[clave_host(url_de(item))].append(item)
+    colas = [iter(g) for g in grupos.values()]
+    resultado = []
+    while colas:
+        siguientes = []
+        for cola in colas:
+            item = next(cola, None)
+            if item is not None:
+                resultado.append(item)
+                siguientes.append(cola)
+        colas = siguientes
+    return resultado
+
+
+class PlanificadorHosts:
+    """
+    Limitador thread-safe por dominio registrado.
+
+    - max_por_host: cargas simultáneas permitidas en un mismo dominio.
+    - retardo_min: segundos mínimos entre inicios de carga en un mismo dominio.
+    """
+
+    def __init__(self, max_por_host=MAX_POR_HOST, retardo_min=RETARDO_MIN_HOST):
+        self.max_por_host = max(1, max_por_host)
+        self.retardo_min = max(0.0, retardo_min)
+        self._cond = threading.Condition()
+        self._activos = Counter()
+        self._proximo = {}  # dominio -> instante (monotonic) del próximo inicio permitido
+        self._stats = defaultdict(Counter)
+
+    def reservar_inicio(self, dominio):
+        """Reserva el próximo inicio del dominio. Retorna los segundos que hay que esperar."""
+        with self._cond:
+            ahora = time.monotonic()
+            inicio = max(ahora, self._proximo.get(dominio, 0.0))
+            self._proximo[dominio] = inicio + self.retardo_min
+            return inicio - ahora
+
+    def registrar(self, dominio, segundos, espera=0.0, fallo=False):
+        with self._cond:
+            stats = self._stats[dominio]
+            stats['peticiones'] += 1
+            stats['fallos'] += int(bool(fallo))
+            stats['espera_s'] += espera
+            stats['carga_s'] += segundos
+
+    @contextmanager
+    def turno(self, url):
+        """
+        Espera hueco y retardo para el dominio de la URL y lo ocupa durante el bloque.
+        Cede un dict en el que el llamador puede marcar 'fallo'; una excepción también cuenta como fallo.
+        """
+        dominio = clave_host(url)
+        inicio_espera = time.monotonic()
+        with self._cond:
+            while self._activos[dominio] >= self.max_por_host:
+                self._cond.wait()
+            self._activos[dominio] += 1
+        estado = {'fallo': False}
+        try:
+            retardo = self.reservar_inicio(dominio)
+            if retardo > 0:
+                time.sleep(retardo)
+            espera = time.monotonic() - inicio_espera
+            inicio = time.monotonic()
+            try:
+                yield estado
+            except Exception:
+                estado['fallo'] = True
+                raise
+            finally:
+                self.registrar(dominio, time.monotonic() - inicio, espera, estado['fallo'])
+        finally:
+            self._soltar(dominio)
+
+    def _soltar(self, dominio):
+        with self._cond:
+            self._activos[dominio] -= 1
+            if not self._activos[dominio]:
+                del self._activos[dominio]
+            self._cond.notify_all()
+
+    def ocupar(self, url, desde=None):
+        """
+        Versión sin espera de turno() para quien atiende varias cargas desde un mismo
+        hilo (el motor de pestañas): ocupa el dominio solo si tiene hueco y ya ha
+        pasado su retardo. Retorna un testigo para liberar(), o None si hay que
+        volver a intentarlo más tarde. desde: instante (monotonic) en que empezó a esperar.
+        """
+        dominio = clave_host(url)
+        with self._cond:
+            ahora = time.monotonic()
+            if self._activos[dominio] >= self.max_por_host or self._proximo.get(dominio, 0.0) > ahora:
+                return None
+            self._activos[dominio] += 1
+            self._proximo[dominio] = ahora + self.retardo_min
+        return dominio, ahora, ahora - (desde if desde is not None else ahora)
+
+    def liberar(self, testigo, fallo=False):
+        """Libera el turno de ocupar() y anota la carga en las estadísticas del dominio."""
+        dominio, inicio, espera = testigo
+        self.registrar(dominio, time.monotonic() - inicio, espera, fallo)
+        self._soltar(dominio)
+
+    def resumen(self, n=None):
+        """Estadísticas por dominio, primero los que más fallan y más nos hacen esperar."""
+        with self._cond:
+            filas = [
+                {
+                    'dominio': dominio,
+                    'peticiones': s['peticiones'],
+                    'fallos': s['fallos'],
+                    'espera_media_s': round(s['espera_s'] / s['peticiones'], 2),
+                    'carga_media_s': round(s['carga_s'] / s['peticiones'], 2),
+                }
+                for dominio, s in self._stats.items() if s['peticiones']
+            ]
+        filas.sort(key=lambda f: (f['fallos'] / f['peticiones'], f['carga_media_s'], f['espera_media_s']), reverse=True)
+        return filas[:n] if n else filas
+
+    def guardar_resumen(self, ruta):
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.resumen(), f, indent=2, ensure_ascii=False)
+        logging.info(f"[HOSTS] Estadísticas por dominio guardadas en {ruta}")
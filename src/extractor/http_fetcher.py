@@ -0,0 +1,139 @@
+"""
+http_fetcher.py - Descarga ligera de páginas vía HTTP (sin navegador).
+
+Es el primer nivel del motor de scraping: la mayoría de webs de pequeños negocios
+sirven emails y enlaces sociales en HTML plano, así que solo se recurre a Selenium
+cuando la página parece renderizada por JavaScript o no aporta resultados.
+"""
+
+import re
+import logging
+import threading
+import requests
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+from fake_useragent import UserAgent
+
+# Una sesión por hilo para reutilizar conexiones (keep-alive) sin compartir estado
+_thread_local = threading.local()
+
+CONTENT_TYPES_HTML = ("text/html", "application/xhtml+xml")
+MAX_BYTES_HTML = 3 * 1024 * 1024  # No descargar más de 3 MB por página
+
+# Indicadores típicos de una SPA cuyo contenido se genera en el navegador
+_PATRONES_JS = re.compile(
+    r'<div[^>]+id=["\'](?:root|app|__next|__nuxt)["\'][^>]*>\s*</div>'
+    r'|<noscript>[^<]*(?:enable|activa|habilita)[^<]*javascript',
+    re.IGNORECASE
+)
+_RE_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+MIN_TEXTO_VISIBLE = 200  # Caracteres de texto visible por debajo de los cuales se asume render JS
+
+
+def cabeceras_http():
+    """Cabeceras de navegador para las descargas HTTP, con User-Agent aleatorio."""
+    try:
+        user_agent = UserAgent().random
+    except Exception:
+        user_agent = "Mozilla/5.0"
+    return {
+        "User-Agent": user_agent,
+        "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+    }
+
+
+def _get_session():
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(cabeceras_http())
+        _thread_local.session = session
+    return session
+
+
+def decodificar_html(contenido: bytes, content_type: str) -> str:
+    """
+    Texto de la página con el charset de la cabecera Content-Type. Sin charset (o
+    con uno desconocido), requests asumiría ISO-8859-1 para text/html; en su lugar
+    se prueba UTF-8 y, si no lo es, el <meta charset> de la página o el que detecte
+    chardet. Lo usan tanto la descarga con requests como el motor asyncio.
+    """
+    content_type = content_type or ""
+    if "charset=" in content_type:
+        encoding = requests.utils.get_encoding_from_headers({"content-type": content_type})
+        try:
+            return contenido.decode(encoding, errors="replace")
+        except LookupError:
+            logging.info(f"[HTTP] Charset desconocido en la cabecera: {encoding}")
+    try:
+        return contenido.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    meta = _RE_META_CHARSET.search(contenido[:4096])
+    encoding = meta.group(1).decode("ascii") if meta else None
+    try:
+        return contenido.decode(encoding or requests.compat.chardet.detect(contenido)["encoding"] or "utf-8",
+                                errors="replace")
+    except LookupError:  # <meta charset> desconocido
+        return contenido.decode("utf-8", errors="replace")
+
+
+def obtener_html(url: str, timeout: int = 10):
+    """
+    Descarga el HTML de la URL con una petición GET simple.
+
+    Retorna (html, url_final) o (None, None) si la respuesta no es HTML válido.
+    """
+    try:
+        resp = _get_session().get(url, timeout=timeout, allow_redirects=True, stream=True)
+        try:
+            if resp.status_code >= 400:
+                logging.info(f"[HTTP] {url} respondió {resp.status_code}")
+                return None, None
+            content_type = resp.headers.get("Content-Type", "").lower()
+            if content_type and not content_type.startswith(CONTENT_TYPES_HTML):
+                logging.info(f"[HTTP] {url} no es HTML ({content_type})")
+                return None, None
+            contenido = resp.raw.read(MAX_BYTES_HTML, decode_content=True)
+            return decodificar_html(contenido, content_type), resp.url
+        finally:
+            resp.close()
+    except (requests.RequestException, Urllib3HTTPError, OSError) as e:
+        # Urllib3HTTPError: cuerpo truncado o lectura detenida (ProtocolError, ReadTimeoutError).
+        # En todos los casos la fila escala a Selenium
+        logging.info(f"[HTTP] Error descargando {url}: {e}")
+        return None, None
+
+
+def extraer_enlaces(html: str, base_url: str):
+    """Devuelve la lista de href absolutos de todos los <a> del HTML."""
+    soup = BeautifulSoup(html, "html.parser")
+    return [urljoin(base_url, a["href"]) for a in soup.find_all("a", href=True)]
+
+
+def analizar_html(html: str, base_url: str):
+    """
+    Parsea el HTML una sola vez para el nivel HTTP. Retorna (enlaces, texto_visible):
+    los href absolutos de todos los <a> y los caracteres de texto visible, que
+    parece_renderizado_js usa sin volver a parsear.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    enlaces = [urljoin(base_url, a["href"]) for a in soup.find_all("a", href=True)]
+    return enlaces, len(soup.get_text(" ", strip=True))
+
+
+def parece_renderizado_js(html: str, texto_visible: int = None) -> bool:
+    """
+    Heurística: True si el HTML parece un contenedor vacío que se rellena con JavaScript.
+    texto_visible: caracteres de texto visible ya calculados (analizar_html); si no se
+    indica, se parsea el HTML.
+    """
+    if not html:
+        return True
+    if _PATRONES_JS.search(html):
+        return True
+    if texto_visible is None:
+        texto_visible = len(BeautifulSoup(html, "html.parser").get_text(" ", strip=True))
+    return texto_visible < MIN_TEXTO_VISIBLE
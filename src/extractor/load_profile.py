@@ -0,0 +1,75 @@
+"""
+load_profile.py - Perfiles de carga de página para los navegadores del scraper.
+
+- 'completo': comportamiento clásico (ventana visible, espera a la carga completa).
+- 'ligero': headless, estrategia de carga 'eager' y bloqueo por patrón de URL de
+  imágenes, fuentes, CSS, vídeo, analítica y anuncios (config/txt_config/urls_bloqueadas.txt).
+  Solo necesitamos el HTML y los enlaces, así que todo lo demás es tráfico y tiempo perdidos.
+"""
+
+import logging
+from src.settings import TXT_CONFIG_DIR
+
+PERFIL_COMPLETO = "completo"
+PERFIL_LIGERO = "ligero"
+
+URLS_BLOQUEADAS_TXT = TXT_CONFIG_DIR / "urls_bloqueadas.txt"
+
+
+def cargar_urls_bloqueadas(ruta=URLS_BLOQUEADAS_TXT):
+    if not ruta.exists():
+        return []
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+PERFILES_CARGA = {
+    PERFIL_COMPLETO: {
+        "headless": False,
+        "page_load_strategy": "normal",
+        "imagenes": True,
+        "bloquear": [],
+    },
+    PERFIL_LIGERO: {
+        "headless": True,
+        "page_load_strategy": "eager",
+        "imagenes": False,
+        "bloquear": cargar_urls_bloqueadas(),
+    },
+}
+
+
+def obtener_perfil(nombre):
+    if nombre not in PERFILES_CARGA:
+        raise ValueError(f"Perfil de carga no soportado: {nombre}. Use uno de {tuple(PERFILES_CARGA)}.")
+    return PERFILES_CARGA[nombre]
+
+
+def aplicar_perfil_opciones(options, browser, perfil):
+    """Añade a las opciones del navegador los flags del perfil (headless, imágenes)."""
+    if browser in ("chrome", "edge"):
+        if perfil["headless"]:
+            options.add_argument("--headless=new")
+            options.add_argument("--disable-gpu")
+        if not perfil["imagenes"]:
+            options.add_argument("--blink-settings=imagesEnabled=false")
+    elif browser == "firefox":
+        if perfil["headless"]:
+            options.add_argument("-headless")
+        if not perfil["imagenes"]:
+            options.set_preference("permissions.default.image", 2)
+
+
+def aplicar_perfil_driver(driver, perfil):
+    """
+    Activa el bloqueo de URLs del perfil vía DevTools (Chrome/Edge).
+    En Firefox no hay CDP: solo se aplica el bloqueo de imágenes de las opciones.
+    """
+    patrones = perfil["bloquear"]
+    if not patrones or not hasattr(driver, "execute_cdp_cmd"):
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patrones})
+    except Exception as e:
+        logging.warning(f"No se pudo activar el bloqueo de recursos: {e}")
@@ -0,0 +1,104 @@
+"""
+page_archive.py - Archivo comprimido del HTML descargado para re-extraer sin volver a cargar.
+
+Cada snapshot se guarda como objeto gzip direccionado por contenido (sha256 del
+HTML) en data/page_archive/objects/, y un índice SQLite asocia la URL canónica al
+último objeto, con la URL final, el nivel y los enlaces resueltos. Las páginas
+idénticas (plantillas de cadenas, parkings de dominios) se almacenan una sola vez.
+
+Con --engine offline los extractores se vuelven a ejecutar sobre el archivo, así
+que un cambio en la regex de emails o en las reglas de redes sociales se aplica
+en minutos en lugar de repetir horas de scraping.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from src.settings import ARCHIVE_DIR
+from .scrape_cache import clave_cache
+from .page_snapshot import crear_snapshot
+
+
+class ArchivoPaginas:
+    """Almacén thread-safe de snapshots de página (HTML + enlaces)."""
+
+    def __init__(self, carpeta=ARCHIVE_DIR):
+        self.objetos = carpeta / "objects"
+        self.objetos.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(carpeta / "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS paginas (
+                clave TEXT PRIMARY KEY,
+                url TEXT,
+                url_final TEXT,
+                sha256 TEXT NOT NULL,
+                enlaces TEXT,
+                nivel TEXT,
+                fecha REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+        self.stats = {"guardadas": 0, "objetos_nuevos": 0, "leidas": 0}
+
+    def _ruta_objeto(self, sha):
+        return self.objetos / sha[:2] / f"{sha}.html.gz"
+
+    def guardar(self, snapshot):
+        clave = clave_cache(snapshot['url'])
+        if not clave or not snapshot.get('html'):
+            return
+        datos = snapshot['html'].encode('utf-8', errors='replace')
+        sha = hashlib.sha256(datos).hexdigest()
+        ruta = self._ruta_objeto(sha)
+        if not ruta.exists():
+            ruta.parent.mkdir(exist_ok=True)
+            tmp = ruta.with_suffix(f".tmp{threading.get_ident()}")
+            with gzip.open(tmp, 'wb', compresslevel=6) as f:
+                f.write(datos)
+            tmp.replace(ruta)
+            with self._lock:
+                self.stats["objetos_nuevos"] += 1
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paginas (clave, url, url_final, sha256, enlaces, nivel, fecha) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (clave, snapshot['url'], snapshot.get('url_final'), sha,
+                 json.dumps(snapshot.get('enlaces') or [], ensure_ascii=False), snapshot.get('nivel'), time.time()),
+            )
+            self._conn.commit()
+            self.stats["guardadas"] += 1
+
+    def cargar(self, url):
+        """Retorna el último snapshot archivado de la URL (nivel 'archivo') o None."""
+        clave = clave_cache(url)
+        if not clave:
+            return None
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT url_final, sha256, enlaces FROM paginas WHERE clave = ?", (clave,)
+            ).fetchone()
+        if fila is None:
+            return None
+        url_final, sha, enlaces = fila
+        try:
+            with gzip.open(self._ruta_objeto(sha), 'rb') as f:
+                html = f.read().decode('utf-8', errors='replace')
+        except OSError as e:
+            logging.warning(f"[ARCHIVO] Objeto {sha} de {url} ilegible: {e}")
+            return None
+        with self._lock:
+            self.stats["leidas"] += 1
+        return crear_snapshot(url, url_final, html, json.loads(enlaces or '[]'), 'archivo')
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
+        logging.info(f"[ARCHIVO] Estadísticas: {self.stats}")
@@ -0,0 +1,141 @@
+"""
+page_snapshot.py - Adquisición única de página y registro de extractores.
+
+Cada web se carga una sola vez (por HTTP o con Selenium) y se convierte en un
+snapshot: un dict con el HTML y los enlaces ya resueltos. Los extractores
+(emails, redes sociales, ...) son plug-ins que trabajan sobre ese snapshot, así que
+añadir uno nuevo no supone otra carga de página.
+
+Formato del snapshot:
+    {
+        'url':       URL solicitada,
+        'url_final': URL tras redirecciones,
+        'html':      código fuente de la página,
+        'enlaces':   lista de href absolutos de los <a>,
+        'nivel':     'http' o 'selenium',
+        'metricas':  {'bytes': bytes transferidos, 'ms': tiempo de carga} (aproximado),
+    }
+"""
+
+import logging
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException
+
+from .http_fetcher import obtener_html, extraer_enlaces, analizar_html
+
+# nombre -> función(snapshot, **opciones) que devuelve {columna: [valores]}
+EXTRACTORES = {}
+
+SCROLL_WAIT = 1  # Segundos máximos a esperar tras el scroll por contenido diferido
+
+
+def registrar_extractor(nombre):
+    """Decorador para registrar un extractor que trabaja sobre snapshots."""
+    def decorador(funcion):
+        EXTRACTORES[nombre] = funcion
+        return funcion
+    return decorador
+
+
+def ejecutar_extractores(snapshot, nombres=None, **opciones):
+    """
+    Ejecuta los extractores registrados (o solo los de `nombres`) sobre el snapshot.
+
+    Retorna dict {columna: lista de valores} combinando la salida de todos ellos.
+    Un extractor que falla no impide que se ejecuten los demás.
+    """
+    columnas = {}
+    for nombre, extractor in EXTRACTORES.items():
+        if nombres is not None and nombre not in nombres:
+            continue
+        try:
+            columnas.update(extractor(snapshot, **opciones) or {})
+        except Exception as e:
+            logging.error(f"Error en extractor '{nombre}' para {snapshot.get('url')}: {e}")
+    return columnas
+
+
+def crear_snapshot(url, url_final, html, enlaces, nivel, metricas=None, texto_visible=None):
+    """texto_visible: caracteres de texto visible, si ya se calcularon al parsear (nivel HTTP)."""
+    return {
+        'url': url,
+        'url_final': url_final or url,
+        'html': html or '',
+        'enlaces': enlaces or [],
+        'nivel': nivel,
+        'metricas': metricas or {},
+        'texto_visible': texto_visible,
+    }
+
+
+def capturar_http(url, timeout=10):
+    """Carga la página con una petición HTTP simple. Retorna snapshot o None."""
+    html, url_final = obtener_html(url, timeout=timeout)
+    if not html:
+        return None
+    enlaces, texto_visible = analizar_html(html, url_final)
+    return crear_snapshot(url, url_final, html, enlaces, 'http', texto_visible=texto_visible)
+
+
+def capturar_selenium(url, driver, wait_timeout=10):
+    """
+    Carga la página una única vez en el driver de Selenium.
+
+    Espera al <body>, desplaza hasta el final para forzar el contenido diferido y
+    espera a que el documento termine de cargar (sin pausas fijas).
+    Lanza la excepción de Selenium si la página no carga.
+    """
+    driver.get(url)
+    WebDriverWait(driver, wait_timeout).until(
+        EC.presence_of_element_located((By.TAG_NAME, 'body'))
+    )
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    try:
+        WebDriverWait(driver, SCROLL_WAIT).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except TimeoutException:
+        pass
+    return leer_snapshot_dom(url, driver)
+
+
+def leer_snapshot_dom(url, driver):
+    """Construye el snapshot a partir del DOM actual de la pestaña activa del driver."""
+    html, url_final, enlaces, metricas = _leer_dom(driver)
+    if enlaces is None:
+        enlaces = extraer_enlaces(html, url_final)
+    return crear_snapshot(url, url_final, html, enlaces, 'selenium', metricas)
+
+
+# HTML, URL final, href ya resueltos y métricas de carga en una sola llamada.
+# transferSize es 0 en recursos de terceros sin Timing-Allow-Origin: los bytes son un mínimo.
+_SCRIPT_LEER_DOM = """
+const nav = performance.getEntriesByType('navigation')[0];
+let bytes = nav ? (nav.transferSize || 0) : 0;
+for (const r of performance.getEntriesByType('resource')) {
+    bytes += r.transferSize || 0;
+}
+const fin = nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd || performance.now()) : performance.now();
+return [
+    document.documentElement.outerHTML,
+    window.location.href,
+    Array.from(document.querySelectorAll('a[href]'), a => a.href),
+    {bytes: bytes, ms: Math.round(fin - (nav ? nav.startTime : 0))}
+];
+"""
+
+
+def _leer_dom(driver):
+    """
+    Lee HTML y enlaces del DOM en un único round trip de WebDriver, en lugar de
+    find_elements + get_attribute por cada <a>. Si el script falla, recurre a
+    page_source y deja los enlaces (None) para parsearlos localmente.
+    """
+    try:
+        html, url_final, enlaces, metricas = driver.execute_script(_SCRIPT_LEER_DOM)
+        return html, url_final, [e for e in enlaces if e], metricas
+    except Exception as e:
+        logging.info(f"No se pudo leer el DOM en bloque, usando page_source: {e}")
+        return driver.page_source, driver.current_url, None, {}
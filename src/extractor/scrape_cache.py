@@ -0,0 +1,155 @@
+"""
+scrape_cache.py - Caché persistente (SQLite) de resultados de scraping por URL.
+
+Los CSV de Google Maps repiten las mismas webs entre archivos y entre
+ejecuciones mensuales, y las cadenas comparten dominio. La caché guarda las
+columnas extraídas (emails y redes) por URL canónica con su fecha, de modo que
+una web ya scrapeada dentro del TTL no vuelve a pasar por HTTP ni por el navegador.
+
+Modos (--cache-mode):
+  - use:     leer y escribir (por defecto).
+  - refresh: no leer, pero sí sobrescribir con resultados nuevos.
+  - bypass:  ni leer ni escribir.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from src.settings import CACHE_DIR
+
+CACHE_USE = "use"
+CACHE_REFRESH = "refresh"
+CACHE_BYPASS = "bypass"
+CACHE_MODES = (CACHE_USE, CACHE_REFRESH, CACHE_BYPASS)
+
+SCRAPE_CACHE_PATH = CACHE_DIR / "scrape_cache.sqlite"
+TTL_DIAS = 30
+MAX_ENTRADAS = 500_000
+_LOTE_SQL = 500  # Parámetros por consulta IN (...)
+
+
+def clave_cache(url):
+    """URL canónica: host en minúsculas sin 'www.', ruta sin '/' final, sin query ni fragmento."""
+    if not url:
+        return None
+    p = urlparse(url if '://' in url else f"http://{url}")
+    host = (p.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if not host:
+        return None
+    return host + p.path.rstrip('/')
+
+
+class CacheScraping:
+    """
+    Caché de resultados thread-safe respaldada por SQLite.
+
+    - ruta: fichero SQLite.
+    - ttl_dias: antigüedad máxima de una entrada para considerarla válida.
+    - max_entradas: tamaño máximo; se expulsan las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, ruta=SCRAPE_CACHE_PATH, ttl_dias=TTL_DIAS, max_entradas=MAX_ENTRADAS):
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.ruta = ruta
+        self.ttl = ttl_dias * 86400
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(ruta), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS scrape_cache (
+                clave TEXT PRIMARY KEY,
+                dominio TEXT,
+                columnas TEXT NOT NULL,
+                nivel TEXT,
+                creado REAL NOT NULL,
+                accedido REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scrape_accedido ON scrape_cache(accedido)")
+        self._conn.commit()
+        self.stats = {"aciertos": 0, "fallos": 0, "escrituras": 0}
+        self.purgar()
+
+    def obtener_muchos(self, urls):
+        """Busca varias URLs de una vez. Retorna {url: columnas} solo con las vigentes."""
+        por_clave = {}
+        for url in urls:
+            clave = clave_cache(url)
+            if clave:
+                por_clave.setdefault(clave, []).append(url)
+        claves = list(por_clave)
+        limite = time.time() - self.ttl
+        encontrados = {}
+        with self._lock:
+            for i in range(0, len(claves), _LOTE_SQL):
+                lote = claves[i:i + _LOTE_SQL]
+                marcas = ",".join("?" * len(lote))
+                filas = self._conn.execute(
+                    f"SELECT clave, columnas FROM scrape_cache WHERE creado >= ? AND clave IN ({marcas})",
+                    [limite, *lote],
+                ).fetchall()
+                for clave, columnas in filas:
+                    for url in por_clave[clave]:
+                        encontrados[url] = json.loads(columnas)
+            if encontrados:
+                ahora = time.time()
+                claves_hit = list({clave_cache(u) for u in encontrados})
+                for i in range(0, len(claves_hit), _LOTE_SQL):
+                    lote = claves_hit[i:i + _LOTE_SQL]
+                    marcas = ",".join("?" * len(lote))
+                    self._conn.execute(
+                        f"UPDATE scrape_cache SET accedido = ? WHERE clave IN ({marcas})", [ahora, *lote]
+                    )
+                self._conn.commit()
+            self.stats["aciertos"] += len(encontrados)
+            self.stats["fallos"] += len(urls) - len(encontrados)
+        return encontrados
+
+    def obtener(self, url):
+        return self.obtener_muchos([url]).get(url)
+
+    def guardar(self, url, columnas, nivel=None):
+        clave = clave_cache(url)
+        if not clave:
+            return
+        ahora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrape_cache (clave, dominio, columnas, nivel, creado, accedido) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (clave, clave.split('/', 1)[0], json.dumps(columnas, ensure_ascii=False), nivel, ahora, ahora),
+            )
+            self._conn.commit()
+            self.stats["escrituras"] += 1
+
+    def purgar(self):
+        """Elimina las entradas caducadas y, si se supera el tamaño máximo, las menos usadas."""
+        with self._lock:
+            caducadas = self._conn.execute(
+                "DELETE FROM scrape_cache WHERE creado < ?", (time.time() - self.ttl,)
+            ).rowcount
+            total = self._conn.execute("SELECT COUNT(*) FROM scrape_cache").fetchone()[0]
+            sobrantes = max(0, total - self.max_entradas)
+            if sobrantes:
+                self._conn.execute(
+                    "DELETE FROM scrape_cache WHERE clave IN "
+                    "(SELECT clave FROM scrape_cache ORDER BY accedido ASC LIMIT ?)",
+                    (sobrantes,),
+                )
+            self._conn.commit()
+        if caducadas or sobrantes:
+            logging.info(f"[CACHE] Purgadas {caducadas} entradas caducadas y {sobrantes} por tamaño.")
+
+    def cerrar(self):
+        self.purgar()
+        with self._lock:
+            self._conn.close()
+        logging.info(f"[CACHE] Estadísticas: {self.stats}")
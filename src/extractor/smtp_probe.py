@@ -0,0 +1,241 @@
+"""
+smtp_probe.py - Sondeos SMTP con sesiones reutilizadas y límites por servidor MX.
+
+En modo ultra-avanzado se comprueba que el MX responde y que acepta el buzón
+(RCPT TO). Cientos de emails comparten MX (Google Workspace, Microsoft 365), así
+que abrir una conexión por comprobación es lento y acaba en bloqueos. El
+sondeador mantiene un pequeño pool de sesiones por MX y las reutiliza (un solo
+MAIL FROM y varios RCPT TO por sesión), limita las sesiones simultáneas y el ritmo de
+comandos por MX, espera con backoff exponencial ante respuestas 4xx
+(greylisting) y recuerda durante un tiempo si cada MX está vivo y si sigue
+aplicando greylisting, para no repetir el backoff con cada email del dominio.
+
+El puerto es configurable para probarlo contra un servidor SMTP local.
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+PUERTO_SMTP = 25
+TIMEOUT_SMTP = 5
+MAX_SESIONES_POR_MX = 2      # Conexiones simultáneas por servidor MX
+INTERVALO_MIN_MX = 0.2       # Segundos mínimos entre dos comandos RCPT al mismo MX
+COMANDOS_POR_SESION = 50     # RCPT TO por sesión antes de renovar la conexión (muy por debajo del límite de 100)
+REINTENTOS_4XX = 2
+ESPERA_4XX = 5.0             # Espera inicial ante un 4xx; se duplica en cada reintento
+ESPERA_4XX_MAX = 60.0
+TTL_VIVO = 3600
+TTL_CAIDO = 300
+TTL_GREYLISTING = 600        # Tras agotar los reintentos 4xx, el MX no se vuelve a sondear durante este tiempo
+
+BUZON_VALIDO = "Válido"
+BUZON_INEXISTENTE = "No existe"
+BUZON_SIN_COMPROBAR = "Sin comprobar"  # MX caído, greylisting persistente o error de red: no concluyente
+
+
+class _Greylisting(Exception):
+    pass
+
+
+class SondeadorSMTP:
+    """
+    Sondeos SMTP thread-safe agrupados por servidor MX.
+
+    - max_sesiones_por_mx / intervalo_min: concurrencia y ritmo de comandos por MX.
+    - puerto / timeout: conexión SMTP.
+    - reintentos_4xx / espera_4xx: backoff ante greylisting.
+    """
+
+    def __init__(self, max_sesiones_por_mx=MAX_SESIONES_POR_MX, intervalo_min=INTERVALO_MIN_MX, puerto=PUERTO_SMTP,
+                 timeout=TIMEOUT_SMTP, reintentos_4xx=REINTENTOS_4XX, espera_4xx=ESPERA_4XX):
+        self.max_sesiones_por_mx = max(1, max_sesiones_por_mx)
+        self.intervalo_min = max(0.0, intervalo_min)
+        self.puerto = puerto
+        self.timeout = timeout
+        self.reintentos_4xx = reintentos_4xx
+        self.espera_4xx = espera_4xx
+        self._cond = threading.Condition()
+        self._activas = Counter()           # mx -> sesiones prestadas
+        self._libres = defaultdict(list)    # mx -> [(smtp, comandos)]
+        self._proximo = {}                  # mx -> instante (monotonic) del próximo comando permitido
+        self._vivos = {}                    # mx -> (caduca, vivo)
+        self._greylisting = {}              # mx -> instante (monotonic) hasta el que no se sondea
+        self.stats = Counter()
+
+    def _contar(self, clave):
+        with self._cond:
+            self.stats[clave] += 1
+
+    # --- Vida del MX ---
+
+    def _vida_en_cache(self, mx):
+        with self._cond:
+            entrada = self._vivos.get(mx)
+            if entrada is not None and entrada[0] > time.monotonic():
+                return entrada[1]
+        return None
+
+    def _anotar_vida(self, mx, vivo):
+        with self._cond:
+            self._vivos[mx] = (time.monotonic() + (TTL_VIVO if vivo else TTL_CAIDO), vivo)
+            if not vivo:
+                self.stats['mx_caidos'] += 1
+
+    def esta_vivo(self, mx):
+        """True si el MX acepta conexiones SMTP (saludo 220 y EHLO). El resultado se recuerda por MX."""
+        mx = mx.lower().rstrip('.')
+        vivo = self._vida_en_cache(mx)
+        if vivo is not None:
+            self._contar('vida_en_cache')
+            return vivo
+        try:
+            with self._sesion(mx):
+                return True  # Conectar (o reutilizar una sesión abierta) ya prueba que está vivo
+        except _Greylisting:
+            return True  # Responde, aunque de momento no acepte transacciones
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    # --- Sesiones ---
+
+    def _conectar(self, mx):
+        smtp = smtplib.SMTP(timeout=self.timeout)
+        try:
+            codigo, _ = smtp.connect(mx, self.puerto)
+            if codigo != 220:
+                raise smtplib.SMTPConnectError(codigo, "saludo inesperado")
+            smtp.ehlo_or_helo_if_needed()
+            codigo, _ = smtp.mail('')  # Remitente nulo, como en las comprobaciones de rebote
+            if 400 <= codigo < 500:
+                raise _Greylisting(codigo)
+            if codigo >= 500:
+                raise smtplib.SMTPSenderRefused(codigo, "MAIL FROM rechazado", '')
+        except Exception:
+            _cerrar(smtp)
+            raise
+        self._contar('conexiones')
+        return smtp
+
+    @contextmanager
+    def _sesion(self, mx):
+        """Presta una sesión del MX (abierta y tras MAIL FROM), respetando el límite de sesiones."""
+        with self._cond:
+            while self._activas[mx] >= self.max_sesiones_por_mx:
+                self._cond.wait()
+            self._activas[mx] += 1
+            libre = self._libres[mx].pop() if self._libres[mx] else None
+        devolver = None
+        try:
+            if libre is not None:
+                smtp, comandos = libre
+                self._contar('reutilizadas')
+            else:
+                try:
+                    smtp, comandos = self._conectar(mx), 0
+                except _Greylisting:
+                    self._anotar_vida(mx, True)  # Responde, aunque de momento no acepte transacciones
+                    raise
+                except (smtplib.SMTPException, OSError):
+                    self._anotar_vida(mx, False)
+                    raise
+                self._anotar_vida(mx, True)
+            sesion = {'smtp': smtp, 'comandos': comandos}
+            try:
+                yield sesion
+            except (smtplib.SMTPException, OSError):
+                _cerrar(smtp)  # Sesión en estado desconocido: no se reutiliza
+                raise
+            if sesion['comandos'] < COMANDOS_POR_SESION:
+                devolver = (smtp, sesion['comandos'])
+            else:
+                _cerrar(smtp)
+        finally:
+            with self._cond:
+                self._activas[mx] -= 1
+                if devolver is not None:
+                    self._libres[mx].append(devolver)
+                self._cond.notify_all()
+
+    def _esperar_turno(self, mx):
+        with self._cond:
+            ahora = time.monotonic()
+            inicio = max(ahora, self._proximo.get(mx, 0.0))
+            self._proximo[mx] = inicio + self.intervalo_min
+        if inicio > ahora:
+            time.sleep(inicio - ahora)
+
+    def _aplazar(self, mx, segundos):
+        """Greylisting: ningún hilo vuelve a preguntar a este MX hasta pasados `segundos`."""
+        with self._cond:
+            self._proximo[mx] = max(self._proximo.get(mx, 0.0), time.monotonic() + segundos)
+
+    # --- Buzones ---
+
+    def _en_greylisting(self, mx):
+        with self._cond:
+            return self._greylisting.get(mx, 0.0) > time.monotonic()
+
+    def _rcpt(self, mx, email, reintentar=True):
+        try:
+            self._esperar_turno(mx)  # Antes de la sesión: el backoff también frena las reconexiones
+            with self._sesion(mx) as sesion:
+                codigo, _ = sesion['smtp'].rcpt(email)
+                sesion['comandos'] += 1
+        except smtplib.SMTPServerDisconnected:
+            if not reintentar:
+                raise
+            return self._rcpt(mx, email, reintentar=False)  # El servidor cerró una sesión inactiva
+        self._contar('sondeos')
+        if 400 <= codigo < 500:
+            raise _Greylisting(codigo)
+        return codigo
+
+    def comprobar_buzon(self, mx, email):
+        """Resultado de RCPT TO para el email en su MX: BUZON_VALIDO, BUZON_INEXISTENTE o BUZON_SIN_COMPROBAR."""
+        mx = mx.lower().rstrip('.')
+        if self._vida_en_cache(mx) is False:
+            return BUZON_SIN_COMPROBAR
+        if self._en_greylisting(mx):
+            self._contar('greylisting_en_cache')
+            return BUZON_SIN_COMPROBAR
+        espera = self.espera_4xx
+        for intento in range(self.reintentos_4xx + 1):
+            try:
+                codigo = self._rcpt(mx, email)
+            except _Greylisting:
+                self._contar('greylisting')
+                if intento == self.reintentos_4xx:
+                    with self._cond:
+                        self._greylisting[mx] = time.monotonic() + TTL_GREYLISTING
+                    break
+                self._aplazar(mx, espera)
+                espera = min(espera * 2, ESPERA_4XX_MAX)
+                continue
+            except (smtplib.SMTPException, OSError) as e:
+                logging.info(f"[SMTP] Error comprobando {email} en {mx}: {e}")
+                return BUZON_SIN_COMPROBAR
+            if codigo in (250, 251):
+                return BUZON_VALIDO
+            return BUZON_INEXISTENTE if codigo >= 500 else BUZON_SIN_COMPROBAR
+        return BUZON_SIN_COMPROBAR
+
+    def cerrar(self):
+        """Cierra las sesiones abiertas (QUIT). El sondeador puede seguir usándose después."""
+        with self._cond:
+            libres = [smtp for sesiones in self._libres.values() for smtp, _ in sesiones]
+            self._libres.clear()
+        for smtp in libres:
+            _cerrar(smtp)
+        if self.stats:
+            logging.info(f"[SMTP] Estadísticas: {dict(self.stats)}")
+
+
+def _cerrar(smtp):
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
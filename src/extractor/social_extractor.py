@@ -1,11 +1,61 @@
-import time
 import logging
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
 
 from .utils import setup_driver
+from .page_snapshot import registrar_extractor, capturar_selenium
+
+
+def _red_social(u):
+    """Devuelve la red social a la que pertenece la URL o None si no es un perfil válido."""
+    # Facebook: perfiles/páginas, no compartidos
+    if "facebook.com/" in u and "sharer" not in u and "share" not in u and len(u) < 100:
+        return "facebook"
+    # Instagram: perfiles, no compartir o stories
+    elif "instagram.com/" in u and "share" not in u and "stories" not in u and len(u) < 100:
+        return "instagram"
+    # LinkedIn: /in/ o /company/, no compartir
+    elif (
+        "linkedin.com/" in u and
+        ("/in/" in u or "/company/" in u) and
+        "share" not in u and
+        "sharing" not in u and
+        len(u) < 100
+    ):
+        return "linkedin"
+    # X / Twitter: perfiles, no compartir o intent
+    elif (
+        ("x.com/" in u or "twitter.com/" in u) and
+        "share" not in u and
+        "intent" not in u and
+        len(u) < 100
+    ):
+        return "x"
+    return None
+
+
+def clasificar_enlaces_sociales(urls):
+    """
+    Clasifica una lista de URLs en perfiles de facebook, instagram, linkedin y x
+    en una sola pasada, eliminando duplicados sobre la marcha.
+
+    Retorna dict solo con las redes encontradas y sus URLs (en orden de aparición).
+    """
+    found = {}
+    vistos = set()
+    for u in urls:
+        if not u or u in vistos:
+            continue
+        vistos.add(u)
+        red = _red_social(u)
+        if red:
+            found.setdefault(red, []).append(u)
+    return found
+
+
+@registrar_extractor('redes')
+def extractor_redes(snapshot, **_):
+    """Plug-in de extracción de redes sociales sobre un snapshot de página."""
+    return clasificar_enlaces_sociales(snapshot['enlaces'])
 
 
 def extract_essential_social_links_from_url(
@@ -17,7 +67,7 @@ def extract_essential_social_links_from_url(
     Extrae enlaces esenciales a redes sociales desde la URL dada.
     - url: dirección HTTP/HTTPS.
     - driver: instancia Selenium opcional (reutilizable).
-    - wait_timeout: tiempo máximo a esperar por <a>.
+    - wait_timeout: tiempo máximo a esperar por <body>.
 
     Retorna dict con claves 'facebook','instagram','linkedin','x' y listas de URLs.
     """
@@ -34,50 +84,12 @@ def extract_essential_social_links_from_url(
         logging.info(f"Iniciando extracción de redes sociales para URL: {url}")
         print(f"\n🌐 Procesando URL: {url}")
         print("⏳ Cargando página...")
-        driver.get(url)
-        # Espera explícita a que al menos un enlace <a> esté presente
-        WebDriverWait(driver, wait_timeout).until(
-            EC.presence_of_all_elements_located((By.TAG_NAME, 'a'))
-        )
-        # Opcional: desplazar hasta el final para cargar contenido dinámico
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(1)
+        snapshot = capturar_selenium(url, driver, wait_timeout=wait_timeout)
         print("✅ Página cargada y enlaces listos.")
 
-        links = driver.find_elements(By.TAG_NAME, 'a')
-        print(f"🔍 {len(links)} enlaces encontrados. Filtrando redes sociales...")
-
-        urls = [link.get_attribute('href') for link in links if link.get_attribute('href')]
-        found = {"facebook": [], "instagram": [], "linkedin": [], "x": []}
-
-        for u in urls:
-            # Facebook: perfiles/páginas, no compartidos
-            if "facebook.com/" in u and "sharer" not in u and "share" not in u and len(u) < 100:
-                found["facebook"].append(u)
-            # Instagram: perfiles, no compartir o stories
-            elif "instagram.com/" in u and "share" not in u and "stories" not in u and len(u) < 100:
-                found["instagram"].append(u)
-            # LinkedIn: /in/ o /company/, no compartir
-            elif (
-                "linkedin.com/" in u and
-                ("/in/" in u or "/company/" in u) and
-                "share" not in u and
-                "sharing" not in u and
-                len(u) < 100
-            ):
-                found["linkedin"].append(u)
-            # X / Twitter: perfiles, no compartir o intent
-            elif (
-                ("x.com/" in u or "twitter.com/" in u) and
-                "share" not in u and
-                "intent" not in u and
-                len(u) < 100
-            ):
-                found["x"].append(u)
-
-        # Eliminar duplicados
-        for key in found:
-            found[key] = list(set(found[key]))
+        urls = snapshot['enlaces']
+        print(f"🔍 {len(urls)} enlaces encontrados. Filtrando redes sociales...")
+        found = clasificar_enlaces_sociales(urls)
 
         redes_encontradas = [k for k, v in found.items() if v]
         if redes_encontradas:
@@ -86,7 +98,7 @@ def extract_essential_social_links_from_url(
             print(f"ℹ️ No se encontraron redes sociales en {url}")
 
         logging.info(f"Redes sociales extraídas: {found}")
-        return {k: v for k, v in found.items() if v}
+        return found
 
     except TimeoutException:
         print(f"⏱️ Timeout al cargar {url}")
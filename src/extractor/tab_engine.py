@@ -0,0 +1,337 @@
+"""
+tab_engine.py - Motor de scraping con varias pestañas por navegador.
+
+En lugar de un Chrome completo por hilo, cada navegador mantiene varias pestañas
+cargando páginas a la vez. Los drivers se crean con pageLoadStrategy 'none', de
+modo que driver.get() vuelve enseguida: se lanza la carga en cada pestaña libre y
+después se sondea document.readyState de todas ellas. El procesado de cada
+snapshot (extractores, verificación) se delega a un pool de hilos para que el
+navegador siga cargando páginas mientras tanto.
+
+Como driver.get() vuelve antes de que la navegación se confirme, el
+readyState inicial puede ser el del documento anterior (about:blank o la web
+de la tarea previa). Antes de cada carga se marca ese documento, y la pestaña
+solo se da por cargada cuando la marca ha desaparecido.
+
+El motor puede vivir toda una ejecución: iniciar() arranca los navegadores,
+enviar() encola cargas de cualquier archivo con su propia función de procesado y
+cerrar() espera a las pendientes. La cola es acotada, así que quien envía va al
+ritmo de las pestañas; procesar() es el atajo para un lote de tareas.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .driver_pool import rss_driver_mb, MAX_URLS_POR_DRIVER
+from .page_snapshot import leer_snapshot_dom
+
+PESTANAS_POR_NAVEGADOR = 4
+INTERVALO_SONDEO = 0.05   # Segundos entre rondas de sondeo de pestañas
+INTERVALO_RSS = 2.0       # Segundos entre mediciones de memoria
+HILOS_EXTRACCION = 8
+TAREAS_EN_COLA_POR_PESTANA = 2  # Tareas esperando en la cola compartida por pestaña
+MARCA_DOCUMENTO_ANTERIOR = "__documentoAnterior"  # Propiedad de window que solo existe en el documento previo
+
+
+class MotorPestanas:
+    """
+    Carga páginas en paralelo usando varias pestañas en pocos navegadores.
+
+    - fabrica: función sin argumentos que crea un driver con pageLoadStrategy 'none'.
+    - navegadores: número de procesos de navegador.
+    - pestanas: pestañas simultáneas por navegador.
+    - wait_timeout: segundos máximos por página; al vencer se lee el DOM parcial.
+    - preparar_pestana: función(driver) opcional que se aplica a cada pestaña nueva
+      (p. ej. el bloqueo de recursos por DevTools, que es por pestaña).
+    - hosts: PlanificadorHosts opcional; cada carga ocupa un turno de su dominio
+      mientras está en la pestaña.
+    """
+
+    def __init__(self, fabrica, navegadores=1, pestanas=PESTANAS_POR_NAVEGADOR, wait_timeout=10,
+                 max_paginas_por_navegador=None, preparar_pestana=None, hosts=None):
+        self.fabrica = fabrica
+        self.preparar_pestana = preparar_pestana
+        self.hosts = hosts
+        self.navegadores = max(1, navegadores)
+        self.pestanas = max(1, pestanas)
+        self.wait_timeout = wait_timeout
+        self.max_paginas_por_navegador = max_paginas_por_navegador or MAX_URLS_POR_DRIVER * self.pestanas
+        self._lock = threading.Lock()
+        self._rss = {}  # hilo -> último RSS medido de su navegador
+        self.stats = {"paginas": 0, "timeouts": 0, "errores": 0, "reinicios": 0,
+                      "segundos": 0.0, "rss_max_mb": 0.0}
+
+    def _anotar(self, clave, valor=1):
+        with self._lock:
+            self.stats[clave] += valor
+
+    def _medir_rss(self, driver):
+        with self._lock:
+            self._rss[threading.get_ident()] = rss_driver_mb(driver)
+            self.stats["rss_max_mb"] = max(self.stats["rss_max_mb"], sum(self._rss.values()))
+
+    def _abrir_navegador(self):
+        driver = self.fabrica()
+        handles = [driver.current_window_handle]
+        for _ in range(self.pestanas - 1):
+            driver.switch_to.new_window('tab')
+            if self.preparar_pestana:
+                self.preparar_pestana(driver)
+            handles.append(driver.current_window_handle)
+        return driver, handles
+
+    def _recoger(self, driver, handle, url):
+        driver.switch_to.window(handle)
+        try:
+            driver.execute_script("window.stop();")
+        except Exception:
+            pass
+        return leer_snapshot_dom(url, driver)
+
+    def _entregar(self, tarea, snapshot):
+        """Pasa el snapshot de una tarea (clave, url, procesar) al pool de extracción."""
+        clave, _, procesar = tarea
+        self._extraccion.submit(self._ejecutar, procesar, clave, snapshot)
+
+    @staticmethod
+    def _ejecutar(procesar, clave, snapshot):
+        try:
+            procesar(clave, snapshot)
+        except Exception as e:
+            logging.error(f"[PESTAÑAS] Error procesando {clave}: {e}")
+
+    def _vaciar_cola(self):
+        """Entrega sin snapshot las tareas que quedan en la cola (no queda navegador que las cargue)."""
+        while True:
+            try:
+                tarea = self._cola.get_nowait()
+            except queue.Empty:
+                return
+            if tarea is not None:
+                self._entregar(tarea, None)
+
+    def _terminar(self, tarea, snapshot, testigo):
+        """Libera el turno del dominio (si lo hay) y entrega el snapshot de la tarea."""
+        if testigo is not None:
+            self.hosts.liberar(testigo, fallo=snapshot is None)
+        self._entregar(tarea, snapshot)
+
+    def _bucle_seguro(self):
+        # Estado del navegador del hilo, visible aquí para no perder tareas si falla
+        estado = {'driver': None, 'handles': [], 'activas': {}, 'aplazadas': deque()}
+        try:
+            self._bucle_navegador(estado)
+        except Exception as e:
+            # Las tareas que queden en la cola las recogen los demás navegadores
+            logging.error(f"[PESTAÑAS] Navegador detenido por error: {e}")
+            self._anotar("errores")
+            for tarea, _, testigo in estado['activas'].values():
+                self._terminar(tarea, None, testigo)
+            for tarea, _ in estado['aplazadas']:
+                self._entregar(tarea, None)
+            with self._lock:
+                self._vivos -= 1
+                self._caido = not self._vivos
+            if self._caido:
+                self._vaciar_cola()
+        finally:
+            self._cerrar_navegador(estado)
+
+    def _cerrar_navegador(self, estado):
+        driver = estado['driver']
+        estado['driver'], estado['handles'] = None, []
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception as e:
+                logging.error(f"Error cerrando driver: {e}")
+
+    def _lanzar(self, estado, tarea, desde):
+        """
+        Lanza la carga de la tarea en una pestaña libre, abriendo el navegador si hace falta.
+        Retorna False sin lanzarla si su dominio no tiene turno libre (hosts).
+        """
+        url = tarea[1]
+        testigo = None
+        if self.hosts is not None:
+            testigo = self.hosts.ocupar(url, desde)
+            if testigo is None:
+                return False
+        if estado['driver'] is None:
+            try:
+                estado['driver'], estado['handles'] = self._abrir_navegador()
+            except Exception:
+                self._terminar(tarea, None, testigo)
+                raise
+        driver = estado['driver']
+        handle = next(h for h in estado['handles'] if h not in estado['activas'])
+        try:
+            driver.switch_to.window(handle)
+            # Marca en el documento actual: desaparece cuando la navegación nueva se confirma
+            driver.execute_script(f"window.{MARCA_DOCUMENTO_ANTERIOR} = true;")
+            driver.get(url)  # Con pageLoadStrategy 'none' no bloquea
+            estado['activas'][handle] = (tarea, time.monotonic(), testigo)
+        except Exception as e:
+            logging.info(f"[PESTAÑAS] Error lanzando {url}: {e}")
+            self._anotar("errores")
+            self._terminar(tarea, None, testigo)
+        return True
+
+    def _bucle_navegador(self, estado):
+        """
+        Bucle de un navegador: toma tareas de la cola compartida hasta recibir None.
+        El navegador se abre con la primera tarea. Las tareas cuyo dominio no tiene
+        turno libre esperan en 'aplazadas' (como mucho una por pestaña) sin ocupar
+        pestaña, y se reintentan en cada ronda antes de tomar más de la cola.
+        """
+        activas = estado['activas']      # handle -> (tarea, inicio, testigo)
+        aplazadas = estado['aplazadas']  # (tarea, desde)
+        paginas = 0
+        ultima_medicion = 0.0
+        agotada = False
+        while activas or aplazadas or not agotada:
+            # Lanzar cargas en las pestañas libres: primero las aplazadas, en orden
+            for _ in range(len(aplazadas)):
+                if len(activas) >= self.pestanas:
+                    break
+                tarea, desde = aplazadas.popleft()
+                if not self._lanzar(estado, tarea, desde):
+                    aplazadas.append((tarea, desde))
+            # Después la cola; sin nada en curso ni aplazado se espera a la siguiente tarea
+            while not agotada and len(activas) < self.pestanas and len(aplazadas) < self.pestanas:
+                try:
+                    tarea = self._cola.get(block=not activas and not aplazadas)
+                except queue.Empty:
+                    break
+                if tarea is None:
+                    agotada = True
+                    break
+                desde = time.monotonic()
+                if not self._lanzar(estado, tarea, desde):
+                    aplazadas.append((tarea, desde))
+
+            # Sondear las pestañas en curso
+            driver = estado['driver']
+            for handle, (tarea, inicio, testigo) in list(activas.items()):
+                url = tarea[1]
+                try:
+                    driver.switch_to.window(handle)
+                    estado_carga = driver.execute_script(
+                        f"return window.{MARCA_DOCUMENTO_ANTERIOR} ? 'anterior' : document.readyState"
+                    )
+                    vencida = time.monotonic() - inicio > self.wait_timeout
+                    if estado_carga != "complete" and not vencida:
+                        continue
+                    if vencida and estado_carga != "complete":
+                        self._anotar("timeouts")
+                    if estado_carga == "anterior":
+                        # La navegación no llegó a confirmarse: el DOM es el de la tarea anterior
+                        snapshot = None
+                    else:
+                        snapshot = self._recoger(driver, handle, url)
+                        self._anotar("paginas")
+                except Exception as e:
+                    logging.info(f"[PESTAÑAS] Error leyendo {url}: {e}")
+                    self._anotar("errores")
+                    snapshot = None
+                del activas[handle]
+                paginas += 1
+                self._terminar(tarea, snapshot, testigo)
+
+            if driver is not None and time.monotonic() - ultima_medicion > INTERVALO_RSS:
+                self._medir_rss(driver)
+                ultima_medicion = time.monotonic()
+
+            # Reciclar el navegador cuando ha cargado demasiadas páginas: se reabre con la siguiente tarea
+            if paginas >= self.max_paginas_por_navegador and not activas:
+                self._cerrar_navegador(estado)
+                paginas = 0
+                self._anotar("reinicios")
+            elif activas or aplazadas:
+                time.sleep(INTERVALO_SONDEO)
+
+    def iniciar(self):
+        """
+        Arranca los hilos de los navegadores, que atienden las tareas de enviar()
+        hasta cerrar(). Cada navegador se abre al recibir su primera tarea.
+        """
+        self._cola = queue.Queue(maxsize=self.navegadores * self.pestanas * TAREAS_EN_COLA_POR_PESTANA)
+        self._extraccion = ThreadPoolExecutor(max_workers=HILOS_EXTRACCION)
+        self._vivos = self.navegadores
+        self._caido = False
+        self._inicio = time.monotonic()
+        self._hilos = [threading.Thread(target=self._bucle_seguro, daemon=True) for _ in range(self.navegadores)]
+        for hilo in self._hilos:
+            hilo.start()
+        return self
+
+    def _poner(self, tarea):
+        """Encola esperando hueco; False si ya no queda ningún navegador que la atienda."""
+        while not self._caido:
+            try:
+                self._cola.put(tarea, timeout=INTERVALO_RSS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def enviar(self, clave, url, procesar):
+        """
+        Encola la carga de url; procesar(clave, snapshot) se ejecuta en un hilo al
+        terminar (snapshot None si la carga falló). Si la cola está llena espera, de
+        modo que quien envía va al ritmo de las pestañas.
+        """
+        tarea = (clave, url, procesar)
+        if not self._poner(tarea):
+            self._entregar(tarea, None)
+        elif self._caido:
+            self._vaciar_cola()  # El último navegador cayó mientras se encolaba
+
+    def cerrar(self):
+        """Espera a las tareas enviadas y a su procesado, y cierra los navegadores."""
+        for _ in self._hilos:
+            self._poner(None)
+        for hilo in self._hilos:
+            hilo.join()
+        self._extraccion.shutdown(wait=True)
+        self.stats["segundos"] = time.monotonic() - self._inicio
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+
+    def procesar(self, tareas, procesar):
+        """
+        Carga las URLs de `tareas` y procesa cada snapshot.
+
+        - tareas: iterable de (clave, url).
+        - procesar: función(clave, snapshot) ejecutada en un hilo; snapshot es None si
+          la carga falló.
+
+        Retorna dict {clave: valor devuelto por procesar}.
+        """
+        resultados = {}
+
+        def guardar(clave, snapshot):
+            resultados[clave] = procesar(clave, snapshot)
+
+        with self:
+            for clave, url in tareas:
+                self.enviar(clave, url, guardar)
+        return resultados
+
+    def resumen(self):
+        """Páginas por segundo (desde iniciar()) y RSS por página concurrente."""
+        segundos = self.stats["segundos"] or 1e-9
+        concurrentes = self.navegadores * self.pestanas
+        return {
+            "paginas_por_seg": self.stats["paginas"] / segundos,
+            "rss_mb_por_pagina": self.stats["rss_max_mb"] / concurrentes,
+            **self.stats,
+        }
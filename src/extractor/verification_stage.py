@@ -0,0 +1,175 @@
+"""
+verification_stage.py - Etapa de verificación de emails, separada del scraping.
+
+Los hilos de scraping solo cargan páginas: la columna 'email' de cada fila sale
+con los candidatos en bruto que encuentra la regex. Al cerrar un archivo, esta
+etapa (en el hilo finalizador, con su propio event loop en verificar_lote)
+deduplica los candidatos de todo el archivo, los ordena por dominio, los
+verifica por lotes y deja en cada fila solo los válidos.
+
+Los candidatos se guardan en data/candidates/<archivo>.csv antes de verificar,
+así que la verificación puede repetirse con otro modo (--verify) sin volver a
+scrapear.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from src.settings import CANDIDATOS_DIR
+from src.utils.status_manager import update_status
+from src.utils.tablas_intermedias import guardar_csv_tipado, leer_csv_tipado
+from .email_prefilter import filtrar_candidatos
+from .email_verifier import (
+    verificar_lote, determinar_estado, estadisticas_cache, activar_almacen, desactivar_almacen, cerrar_sesiones_smtp,
+    configurar_sondeo
+)
+from .smtp_probe import PUERTO_SMTP, MAX_SESIONES_POR_MX, INTERVALO_MIN_MX
+from .verification_store import AlmacenVerificaciones, TTL_DIAS as TTL_VERIFICACION_DIAS
+
+MODO_VERIFICACION = "avanzado"
+MODOS_VERIFICACION = ("normal", "avanzado", "ultra-avanzado")
+COLUMNA_EMAIL = "email"
+EMAILS_POR_LOTE = 1000  # Emails por llamada a verificar_lote (ordenados por dominio)
+ETAPAS_POSTERIORES = ('excluded', 'demo_generated')  # Etapas que parten de data/outputs
+
+
+def separar_emails(celda):
+    if not isinstance(celda, str):
+        return []
+    return [e.strip() for e in celda.split(',') if e.strip()]
+
+
+def _dominio(email):
+    return email.rsplit('@', 1)[-1].lower()
+
+
+def verificar_emails(df, modo=MODO_VERIFICACION, columna=COLUMNA_EMAIL, nombre_archivo=""):
+    """
+    Sustituye los candidatos de `columna` por los emails válidos según `modo`.
+    Los candidatos que descarta el prefiltro local no se verifican.
+    Retorna (DataFrame, stats) con candidatos, únicos, descartados por regla, válidos y segundos.
+    """
+    if columna not in df.columns:
+        return df, {}
+    inicio = time.time()
+    listas = df[columna].map(separar_emails)
+    unicos = sorted({e for lista in listas for e in lista}, key=lambda e: (_dominio(e), e))
+    aceptados, rechazos = filtrar_candidatos(unicos)
+    validos = set()
+    for i in range(0, len(aceptados), EMAILS_POR_LOTE):
+        verificados = verificar_lote(aceptados[i:i + EMAILS_POR_LOTE], modo=modo)
+        validos.update(e for e, resultados in verificados.items()
+                       if determinar_estado(resultados, modo=modo) == 'Válido')
+    df = df.copy()
+    df[columna] = listas.map(lambda lista: ', '.join(e for e in lista if e in validos))
+    stats = {
+        'candidatos': int(listas.map(len).sum()),
+        'unicos': len(unicos),
+        'descartados': dict(rechazos),
+        'validos': len(validos),
+        'segundos': round(time.time() - inicio, 2),
+    }
+    descartados = ", ".join(f"{regla}: {n}" for regla, n in rechazos.most_common()) or "ninguno"
+    print(f"[VERIFICACIÓN] {nombre_archivo} → {stats['candidatos']} candidatos ({stats['unicos']} únicos), "
+          f"{stats['validos']} válidos en modo {modo} ({stats['segundos']}s). Descartados sin red: {descartados}.")
+    logging.info(f"Verificación de emails en {nombre_archivo} ({modo}): {stats}")
+    return df, stats
+
+
+def _ruta_candidatos(nombre_archivo):
+    return CANDIDATOS_DIR / f"{os.path.splitext(nombre_archivo)[0]}.csv"
+
+
+def guardar_candidatos(df, nombre_archivo):
+    """
+    Guarda el resultado del scraping, con los emails sin verificar, para poder re-verificarlo.
+    Los tipos de las columnas se guardan aparte para que --verify no convierta teléfonos o
+    códigos postales en números.
+    """
+    CANDIDATOS_DIR.mkdir(parents=True, exist_ok=True)
+    guardar_csv_tipado(df, _ruta_candidatos(nombre_archivo))
+
+
+def leer_candidatos(nombre_archivo):
+    df = leer_csv_tipado(_ruta_candidatos(nombre_archivo))
+    if COLUMNA_EMAIL in df.columns:
+        df[COLUMNA_EMAIL] = df[COLUMNA_EMAIL].fillna('')
+    return df
+
+
+@contextmanager
+def almacen_verificaciones(modo=MODO_VERIFICACION, usar=True, leer=True, ttl_dias=TTL_VERIFICACION_DIAS,
+                           puerto_smtp=PUERTO_SMTP, sesiones_smtp_por_mx=MAX_SESIONES_POR_MX,
+                           intervalo_smtp=INTERVALO_MIN_MX):
+    """
+    Activa el almacén persistente de verificaciones durante el bloque y muestra las estadísticas al salir.
+    - usar: False desactiva el almacén (solo caché en memoria).
+    - leer: False solo escribe (refrescar los resultados guardados).
+    - puerto_smtp / sesiones_smtp_por_mx / intervalo_smtp: sondeador SMTP de la
+      ejecución (ultra-avanzado), que se crea al entrar y se cierra al salir.
+    """
+    configurar_sondeo(puerto=puerto_smtp, max_sesiones_por_mx=sesiones_smtp_por_mx, intervalo_min=intervalo_smtp)
+    almacen = None
+    if usar:
+        almacen = AlmacenVerificaciones(ttl_dias=ttl_dias)
+        if leer:
+            almacen.cargar(modo=modo)
+        activar_almacen(almacen, leer=leer)
+    try:
+        yield almacen
+    finally:
+        cerrar_sesiones_smtp()
+        verificacion = estadisticas_cache()
+        print(f"[VERIFICACIÓN] Caché DNS: {verificacion['dns']['aciertos']} aciertos, {verificacion['dns']['fallos']} fallos; "
+              f"veredictos por dominio: {verificacion['veredictos']['aciertos']} aciertos, {verificacion['veredictos']['fallos']} fallos.")
+        logging.info(f"[VERIFICACIÓN] Estadísticas de caché: {verificacion}")
+        smtp = verificacion['smtp']
+        if smtp:
+            print(f"[SMTP] {smtp.get('conexiones', 0)} conexiones, {smtp.get('reutilizadas', 0)} sesiones reutilizadas, "
+                  f"{smtp.get('sondeos', 0)} buzones comprobados, {smtp.get('greylisting', 0)} respuestas 4xx, "
+                  f"{smtp.get('mx_caidos', 0)} MX sin respuesta.")
+        if almacen is not None:
+            desactivar_almacen()
+            print(f"[VERIFICACIÓN] Almacén: {almacen.stats['cargados']} registros cargados, "
+                  f"{almacen.stats['aciertos_email']} emails y {almacen.stats['aciertos_dominio']} dominios sin volver a verificar.")
+            almacen.cerrar()
+
+
+def run_verificacion(modo=MODO_VERIFICACION, single_file=None, usar_almacen=True, leer_almacen=True,
+                     ttl_verificacion=TTL_VERIFICACION_DIAS, puerto_smtp=PUERTO_SMTP,
+                     sesiones_smtp_por_mx=MAX_SESIONES_POR_MX, intervalo_smtp=INTERVALO_MIN_MX):
+    """
+    Vuelve a verificar los candidatos guardados en data/candidates y regenera el
+    Excel de data/outputs, sin scrapear de nuevo. La exclusión y la demo de cada
+    archivo vuelven a quedar pendientes.
+    """
+    if modo not in MODOS_VERIFICACION:
+        raise ValueError(f"Modo de verificación no soportado: {modo}. Use uno de {MODOS_VERIFICACION}.")
+    if not CANDIDATOS_DIR.is_dir():
+        print("❌ No hay candidatos guardados: ejecuta antes el scraping.")
+        return
+    archivos = [single_file] if single_file else sorted(
+        f"{ruta.stem}.csv" for ruta in CANDIDATOS_DIR.glob("*.csv")
+    )
+    from .generador_excel import generar_excel
+    regenerados = 0
+    with almacen_verificaciones(modo, usar=usar_almacen, leer=leer_almacen, ttl_dias=ttl_verificacion,
+                                puerto_smtp=puerto_smtp, sesiones_smtp_por_mx=sesiones_smtp_por_mx,
+                                intervalo_smtp=intervalo_smtp):
+        for nombre in archivos:
+            try:
+                df, stats = verificar_emails(leer_candidatos(nombre), modo=modo, nombre_archivo=nombre)
+                generar_excel(df, nombre)
+                update_status(nombre, 'verificacion', {'modo': modo, **stats})
+                # El Excel de outputs ha cambiado: la exclusión y la demo deben rehacerse a partir de él
+                for etapa in ETAPAS_POSTERIORES:
+                    update_status(nombre, etapa, False)
+                regenerados += 1
+            except Exception as e:
+                logging.error(f"Error re-verificando {nombre}: {e}")
+                print(f"❌ Error re-verificando {nombre}: {e}")
+    if regenerados:
+        print(f"[VERIFICACIÓN] {regenerados} archivos regenerados en outputs: su exclusión y su demo quedan "
+              f"pendientes (--exclude, --mask).")
@@ -0,0 +1,170 @@
+"""
+verification_store.py - Almacén persistente (SQLite) de verificaciones de email.
+
+Las ejecuciones mensuales vuelven a encontrar casi los mismos emails y dominios.
+El almacén guarda, por modo de verificación, el resultado de cada email y el
+veredicto de cada dominio con su fecha. Al empezar la etapa se cargan de una vez
+en memoria los registros vigentes, de modo que todo lo ya visto se resuelve con
+una consulta local en lugar de DNS y SMTP. Las escrituras se agrupan en lotes.
+
+Los veredictos negativos (dominio o MX inválidos) caducan antes que los
+positivos: pueden deberse a un fallo pasajero de DNS.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from src.settings import CACHE_DIR
+
+VERIFICACIONES_PATH = CACHE_DIR / "verificaciones.sqlite"
+TTL_DIAS = 30
+TTL_NEGATIVO_DIAS = 1
+ESCRITURAS_POR_LOTE = 500
+
+
+def veredicto_negativo(resultados):
+    return resultados.get('Dominio', 'Válido') != 'Válido' or resultados.get('MX', 'Válido') != 'Válido'
+
+
+class AlmacenVerificaciones:
+    """
+    Almacén thread-safe de verificaciones por email y por dominio.
+
+    - ruta: fichero SQLite.
+    - ttl_dias / ttl_negativo_dias: antigüedad máxima de un resultado positivo / negativo.
+    """
+
+    def __init__(self, ruta=VERIFICACIONES_PATH, ttl_dias=TTL_DIAS, ttl_negativo_dias=TTL_NEGATIVO_DIAS):
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl_dias * 86400
+        self.ttl_negativo = min(ttl_negativo_dias, ttl_dias) * 86400
+        self._lock = threading.Lock()
+        self._emails = {}    # (email, modo) -> resultados
+        self._dominios = {}  # (dominio, modo) -> resultados
+        self._pendientes_emails = []
+        self._pendientes_dominios = []
+        self._conn = sqlite3.connect(str(ruta), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS emails (
+                email TEXT NOT NULL,
+                modo TEXT NOT NULL,
+                resultados TEXT NOT NULL,
+                estado TEXT,
+                negativo INTEGER NOT NULL,
+                fecha REAL NOT NULL,
+                PRIMARY KEY (email, modo)
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS dominios (
+                dominio TEXT NOT NULL,
+                modo TEXT NOT NULL,
+                resultados TEXT NOT NULL,
+                negativo INTEGER NOT NULL,
+                fecha REAL NOT NULL,
+                PRIMARY KEY (dominio, modo)
+            )"""
+        )
+        self._conn.commit()
+        self.stats = {"cargados": 0, "aciertos_email": 0, "aciertos_dominio": 0, "escrituras": 0}
+
+    def _limites(self):
+        ahora = time.time()
+        return ahora - self.ttl, ahora - self.ttl_negativo
+
+    def purgar(self):
+        limite, limite_negativo = self._limites()
+        with self._lock:
+            for tabla in ("emails", "dominios"):
+                self._conn.execute(
+                    f"DELETE FROM {tabla} WHERE fecha < ? OR (negativo = 1 AND fecha < ?)",
+                    (limite, limite_negativo),
+                )
+            self._conn.commit()
+
+    def cargar(self, modo=None):
+        """Carga en memoria los registros vigentes (de un modo o de todos). Retorna cuántos."""
+        self.purgar()
+        condicion, parametros = ("WHERE modo = ?", (modo,)) if modo else ("", ())
+        with self._lock:
+            for email, m, resultados in self._conn.execute(
+                f"SELECT email, modo, resultados FROM emails {condicion}", parametros
+            ):
+                self._emails[(email, m)] = json.loads(resultados)
+            for dominio, m, resultados in self._conn.execute(
+                f"SELECT dominio, modo, resultados FROM dominios {condicion}", parametros
+            ):
+                self._dominios[(dominio, m)] = json.loads(resultados)
+            self.stats["cargados"] = len(self._emails) + len(self._dominios)
+        logging.info(f"[VERIFICACIÓN] Almacén cargado: {len(self._emails)} emails, {len(self._dominios)} dominios.")
+        return self.stats["cargados"]
+
+    def obtener_email(self, email, modo):
+        with self._lock:
+            resultados = self._emails.get((email.lower(), modo))
+            if resultados is not None:
+                self.stats["aciertos_email"] += 1
+            return resultados
+
+    def contiene_email(self, email, modo):
+        with self._lock:
+            return (email.lower(), modo) in self._emails
+
+    def contiene_dominio(self, dominio, modo):
+        with self._lock:
+            return (dominio.lower(), modo) in self._dominios
+
+    def obtener_dominio(self, dominio, modo):
+        with self._lock:
+            resultados = self._dominios.get((dominio.lower(), modo))
+            if resultados is not None:
+                self.stats["aciertos_dominio"] += 1
+            return resultados
+
+    def guardar_email(self, email, modo, resultados, estado):
+        clave = (email.lower(), modo)
+        with self._lock:
+            self._emails[clave] = resultados
+            self._pendientes_emails.append(
+                (*clave, json.dumps(resultados, ensure_ascii=False), estado,
+                 int(veredicto_negativo(resultados)), time.time())
+            )
+            self._volcar_si_lleno()
+
+    def guardar_dominio(self, dominio, modo, resultados):
+        clave = (dominio.lower(), modo)
+        with self._lock:
+            self._dominios[clave] = resultados
+            self._pendientes_dominios.append(
+                (*clave, json.dumps(resultados, ensure_ascii=False), int(veredicto_negativo(resultados)), time.time())
+            )
+            self._volcar_si_lleno()
+
+    def _volcar_si_lleno(self):
+        if len(self._pendientes_emails) + len(self._pendientes_dominios) >= ESCRITURAS_POR_LOTE:
+            self._volcar()
+
+    def _volcar(self):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO emails (email, modo, resultados, estado, negativo, fecha) VALUES (?, ?, ?, ?, ?, ?)",
+            self._pendientes_emails,
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO dominios (dominio, modo, resultados, negativo, fecha) VALUES (?, ?, ?, ?, ?)",
+            self._pendientes_dominios,
+        )
+        self._conn.commit()
+        self.stats["escrituras"] += len(self._pendientes_emails) + len(self._pendientes_dominios)
+        self._pendientes_emails = []
+        self._pendientes_dominios = []
+
+    def cerrar(self):
+        with self._lock:
+            self._volcar()
+            self._conn.close()
+        logging.info(f"[VERIFICACIÓN] Estadísticas del almacén: {self.stats}")
@@ -1,5 +1,8 @@
 """
-web_scraper.py - Módulo para extracción de emails y redes sociales usando Selenium.
+web_scraper.py - Módulo para extracción de emails y redes sociales.
+
+Motor escalonado: primero una descarga HTTP ligera y, solo si la página parece
+renderizada por JavaScript o no aporta resultados, el navegador Selenium.
 """
 
 import os
@@ -7,17 +10,37 @@ import sys
 import time
 import logging
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import pandas as pd
 import psutil
 import multiprocessing
 from .utils import setup_driver as _shared_setup_driver
-from .email_extractor import extract_emails_from_url
-from .social_extractor import extract_essential_social_links_from_url
+from .page_snapshot import capturar_http, capturar_selenium, ejecutar_extractores
+from .http_fetcher import parece_renderizado_js
+from .async_scraper import scrapear_async, MAX_CONCURRENCIA_ASYNC
+from .driver_pool import DriverPool, MAX_URLS_POR_DRIVER, MAX_RSS_MB
+from .tab_engine import MotorPestanas, PESTANAS_POR_NAVEGADOR
+from .scrape_cache import CacheScraping, CACHE_USE, CACHE_BYPASS, CACHE_MODES
+from .page_archive import ArchivoPaginas
+from .dns_preflight import PreflightDNS, ESTADOS_MUERTOS, ESTADO_SIN_WEB
+from .host_scheduler import PlanificadorHosts, intercalar, MAX_POR_HOST, RETARDO_MIN_HOST
+from .checkpoint import CheckpointFilas
+from .load_profile import PERFIL_COMPLETO, obtener_perfil, aplicar_perfil_opciones, aplicar_perfil_driver
+from .verification_store import TTL_DIAS as TTL_VERIFICACION_DIAS
+from .email_prefilter import filtrar_candidatos
+from .verification_stage import (
+    MODO_VERIFICACION, MODOS_VERIFICACION, verificar_emails, guardar_candidatos, almacen_verificaciones
+)
+from .smtp_probe import PUERTO_SMTP, MAX_SESIONES_POR_MX, INTERVALO_MIN_MX
+# Importar los extractores los registra como plug-ins de snapshot
+from . import email_extractor, social_extractor  # noqa: F401
 from src.settings import (
     BASE_DIR, INPUTS_DIR, OUTPUTS_DIR, CLEAN_INPUTS_DIR, TXT_CONFIG_DIR, LOGS_DIR, HOJA_DATA
 )
-from src.utils.status_manager import load_status, save_status, update_status, get_next_scraping_index, is_stage_done, log_error
+from src.utils.status_manager import load_status, save_status, update_status, is_stage_done, log_error
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.edge.service import Service as EdgeService
@@ -35,23 +58,33 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-# Thread-local para los drivers
-thread_local = threading.local()
-DRIVERS = []
-
 # Restaurar configuración original del driver
 
-def _shared_setup_driver(browser="chrome", proxy=None):
-    """Configura el driver del navegador con soporte para múltiples navegadores y rotación de User-Agent."""
+def _shared_setup_driver(browser="chrome", proxy=None, page_load_strategy=None, perfil_carga=PERFIL_COMPLETO):
+    """
+    Configura el driver del navegador con soporte para múltiples navegadores y rotación de User-Agent.
+    perfil_carga: 'completo' o 'ligero' (headless, carga 'eager' y bloqueo de recursos pesados).
+    page_load_strategy: fuerza 'normal', 'eager' o 'none' sobre el perfil (el motor de pestañas usa 'none').
+    """
+    perfil = obtener_perfil(perfil_carga)
+    driver = _crear_navegador(browser, proxy, page_load_strategy or perfil["page_load_strategy"], perfil)
+    aplicar_perfil_driver(driver, perfil)
+    return driver
+
+def _crear_navegador(browser, proxy, page_load_strategy, perfil):
     user_agent = UserAgent().random  # Generar un User-Agent aleatorio
     if browser == "chrome":
         options = ChromeOptions()
+        options.page_load_strategy = page_load_strategy
+        aplicar_perfil_opciones(options, browser, perfil)
         options.add_argument(f"--user-agent={user_agent}")
         if proxy:
             options.add_argument(f"--proxy-server={proxy}")
         return webdriver.Chrome(service=ChromeService(), options=options)
     elif browser == "firefox":
         options = FirefoxOptions()
+        options.page_load_strategy = page_load_strategy
+        aplicar_perfil_opciones(options, browser, perfil)
         options.set_preference("general.useragent.override", user_agent)
         if proxy:
             options.set_preference("network.proxy.type", 1)
@@ -60,6 +93,8 @@ def _shared_setup_driver(browser="chrome", proxy=None):
         return webdriver.Firefox(service=FirefoxService(), options=options)
     elif browser == "edge":
         options = EdgeOptions()
+        options.page_load_strategy = page_load_strategy
+        aplicar_perfil_opciones(options, browser, perfil)
         options.add_argument(f"--user-agent={user_agent}")
         if proxy:
             options.add_argument(f"--proxy-server={proxy}")
@@ -67,18 +102,65 @@ def _shared_setup_driver(browser="chrome", proxy=None):
     else:
         raise ValueError("Navegador no soportado. Use 'chrome', 'firefox' o 'edge'.")
 
-# Modificar _init_thread_driver para aceptar múltiples navegadores y proxies
-
-def _init_thread_driver(browser="chrome", proxy=None):
-    drv = _shared_setup_driver(browser=browser, proxy=proxy)
+def _crear_driver(browser="chrome", proxy=None, page_load_strategy=None, perfil_carga=PERFIL_COMPLETO):
+    drv = _shared_setup_driver(browser=browser, proxy=proxy, page_load_strategy=page_load_strategy, perfil_carga=perfil_carga)
     drv.set_page_load_timeout(30)  # Configurar timeout de carga de página
     drv.implicitly_wait(10)  # Configurar espera implícita
-    thread_local.driver = drv
-    DRIVERS.append(drv)
+    return drv
+
+def crear_pool_drivers(max_drivers, browser="chrome", proxy=None, perfil_carga=PERFIL_COMPLETO,
+                       max_urls_por_driver=MAX_URLS_POR_DRIVER, max_rss_mb=MAX_RSS_MB, proxy_list=None):
+    """
+    Crea el pool de navegadores del scraper (los drivers se abren bajo demanda).
+    proxy_list: si se indica, cada navegador nuevo usa un proxy al azar de la lista.
+    """
+    return DriverPool(
+        lambda: _crear_driver(browser=browser, proxy=random.choice(proxy_list) if proxy_list else proxy,
+                              perfil_carga=perfil_carga),
+        max_drivers,
+        max_urls_por_driver=max_urls_por_driver,
+        max_rss_mb=max_rss_mb,
+    )
+
+def crear_motor_pestanas(navegadores, pestanas=PESTANAS_POR_NAVEGADOR, wait_timeout=10, browser="chrome",
+                         proxy_list=None, perfil_carga=PERFIL_COMPLETO, hosts=None):
+    """
+    Crea el motor de pestañas del scraper (los navegadores se abren con su primera carga).
+    proxy_list: si se indica, cada navegador nuevo usa un proxy al azar de la lista.
+    hosts: PlanificadorHosts cuyos turnos por dominio respetan también las pestañas.
+    """
+    perfil = obtener_perfil(perfil_carga)
+    return MotorPestanas(
+        lambda: _crear_driver(browser=browser, proxy=random.choice(proxy_list) if proxy_list else None,
+                              page_load_strategy="none", perfil_carga=perfil_carga),
+        navegadores=navegadores,
+        pestanas=pestanas,
+        wait_timeout=wait_timeout,
+        preparar_pestana=lambda driver: aplicar_perfil_driver(driver, perfil),
+        hosts=hosts,
+    )
 
-EMAIL_VERIFICATION_MODE = "avanzado"
+EMAIL_VERIFICATION_MODE = MODO_VERIFICACION
 MAX_WORKERS = 4
-MAX_URLS_PER_SESSION = 50  # Reiniciar navegador después de procesar 50 URLs
+
+# Niveles del motor de scraping (para el informe por archivo)
+NIVEL_HTTP = "http"
+NIVEL_SELENIUM = "selenium"
+NIVEL_SIN_WEB = "sin_web"
+NIVEL_ERROR = "error"
+NIVEL_CACHE = "cache"
+NIVEL_ARCHIVO = "archivo"
+NIVEL_SIN_ARCHIVO = "sin_archivo"
+NIVEL_DNS_MUERTO = "dns_muerto"
+_niveles_lock = threading.Lock()
+
+# Motores de scraping seleccionables con run_extraction(motor=...)
+MOTOR_HIBRIDO = "hibrido"    # Hilos: HTTP ligero y Selenium como respaldo
+MOTOR_SELENIUM = "selenium"  # Hilos: siempre Selenium
+MOTOR_ASYNC = "async"        # asyncio para el HTML estático; Selenium solo para lo que se escale
+MOTOR_PESTANAS = "pestanas"  # HTTP ligero y, como respaldo, varias pestañas por navegador
+MOTOR_OFFLINE = "offline"    # Sin red: re-ejecuta los extractores sobre el archivo de páginas
+MOTORES = (MOTOR_HIBRIDO, MOTOR_SELENIUM, MOTOR_ASYNC, MOTOR_PESTANAS, MOTOR_OFFLINE)
 
 def cargar_lista_desde_txt(nombre_archivo):
     ruta = TXT_CONFIG_DIR / nombre_archivo
@@ -100,128 +182,585 @@ def get_optimal_workers():
     ram_gb = psutil.virtual_memory().total / (1024**3)
     return max(1, min(cpu_count, int(ram_gb // 2)))
 
-def procesar_sitio(row, wait_timeout=10):
+COLUMNAS_RESULTADO = ['email', 'facebook', 'instagram', 'linkedin', 'x']
+
+# Lectura en streaming: filas del CSV por bloque y filas esperando en el pool por hilo
+FILAS_POR_BLOQUE = 1000
+FILAS_EN_VUELO_POR_HILO = 2
+# Con los motores sin un navegador por hilo (pestañas, offline) los hilos solo esperan red o disco
+HILOS_POR_WORKER_SIN_NAVEGADOR = 4
+
+def _nuevo_contexto(cache=None, archivo=None, checkpoint=None, dns=None):
+    """
+    Estado compartido por los hilos mientras se procesa un archivo.
+    - cache: CacheScraping de resultados (o None).
+    - archivo: ArchivoPaginas donde guardar el HTML de cada página (o None).
+    - checkpoint: CheckpointFilas al que se emite cada fila resuelta.
+    - dns: PreflightDNS para descartar dominios muertos (o None).
+    """
+    return {'niveles': Counter(), 'carga': Counter(), 'cache': cache, 'archivo': archivo, 'checkpoint': checkpoint,
+            'dns': dns}
+
+def _emitir(ctx, idx, fila):
+    """Entrega una fila resuelta: se escribe en el checkpoint y no se retiene en memoria."""
+    ctx['checkpoint'].escribir(idx, fila)
+
+def _fila_vacia(row):
+    return {**row, **{col: '' for col in COLUMNAS_RESULTADO}}
+
+def _fila_resultado(row, columnas):
+    resultado = _fila_vacia(row)
+    for col, valores in columnas.items():
+        resultado[col] = ', '.join(valores)
+    return resultado
+
+def _registrar_nivel(ctx, nivel):
+    if ctx is None:
+        return
+    with _niveles_lock:
+        ctx['niveles'][nivel] += 1
+
+def _fila_sin_web(row, ctx):
+    _registrar_nivel(ctx, NIVEL_SIN_WEB)
+    return _fila_vacia(row)
+
+def _fila_error(row, ctx):
+    _registrar_nivel(ctx, NIVEL_ERROR)
+    return _fila_vacia(row)
+
+def _fila_extraida(row, url, columnas, nivel, ctx):
+    """Fila resuelta tras cargar la página: anota el nivel y guarda el resultado en caché."""
+    _registrar_nivel(ctx, nivel)
+    if ctx is not None and ctx['cache'] is not None:
+        ctx['cache'].guardar(url, columnas, nivel)
+    return _fila_resultado(row, columnas)
+
+def _registrar_carga(ctx, snapshot):
+    """Acumula bytes transferidos y tiempo de carga de una página cargada en navegador."""
+    metricas = snapshot.get('metricas') or {}
+    logging.info(f"[CARGA] {snapshot['url']}: {metricas.get('bytes', 0)} bytes, {metricas.get('ms', 0)} ms")
+    if ctx is None:
+        return
+    with _niveles_lock:
+        carga = ctx['carga']
+        carga['paginas'] += 1
+        carga['bytes'] += int(metricas.get('bytes') or 0)
+        carga['ms'] += int(metricas.get('ms') or 0)
+
+def _resumen_carga(nombre_archivo, carga):
+    if not carga.get('paginas'):
+        return
+    paginas = carga['paginas']
+    print(f"[CARGA] {nombre_archivo} → {paginas} páginas en navegador, "
+          f"media {carga['bytes'] / paginas / 1024:.0f} KB y {carga['ms'] / paginas:.0f} ms por página.")
+    logging.info(f"Métricas de carga en {nombre_archivo}: {dict(carga)}")
+
+def _extraer(snapshot, ctx=None):
+    """
+    Ejecuta los extractores sobre el snapshot, archivándolo antes si está activado.
+    Los emails salen sin verificar: se verifican al cerrar el archivo (verification_stage.py).
+    """
+    if ctx is not None and ctx['archivo'] is not None and snapshot['nivel'] != NIVEL_ARCHIVO:
+        try:
+            ctx['archivo'].guardar(snapshot)
+        except Exception as e:
+            logging.warning(f"[ARCHIVO] No se pudo archivar {snapshot['url']}: {e}")
+    return ejecutar_extractores(snapshot)
+
+def _normalizar_url(row):
+    """Devuelve la URL de la columna 'website' con esquema, o None si no es válida."""
+    raw = row.get('website', '')
+    if pd.isna(raw) or not isinstance(raw, str) or not raw.strip():
+        return None
+    url = raw.strip()
+    # Intentar corregir URLs que no comiencen con http:// o https://
+    if not url.lower().startswith(('http://', 'https://')):
+        url = f"http://{url}"
+    return url
+
+def _columnas_http(snapshot, ctx=None):
+    """
+    Ejecuta los extractores sobre un snapshot HTTP.
+    Retorna las columnas extraídas o None si hay que escalar a Selenium.
+    """
+    if snapshot is None or parece_renderizado_js(snapshot['html'], snapshot.get('texto_visible')):
+        return None
+    columnas = _extraer(snapshot, ctx)
+    # Los candidatos que el prefiltro descartará (logo@2x.png...) no cuentan como resultado
+    utiles = {**columnas, 'email': filtrar_candidatos(columnas.get('email') or [])[0]}
+    if not any(utiles.values()):
+        return None
+    return columnas
+
+def _turno_host(ctx, url):
+    """Turno de cortesía del dominio de la URL (o nada si no hay planificador de hosts)."""
+    hosts = ctx['planificador']['hosts'] if ctx is not None and ctx.get('planificador') else None
+    return hosts.turno(url) if hosts is not None else nullcontext({})
+
+def _procesar_sitio_http(url, wait_timeout, ctx=None):
+    """Nivel rápido: descarga el HTML sin navegador y ejecuta los extractores."""
+    with _turno_host(ctx, url) as turno:
+        snapshot = capturar_http(url, timeout=wait_timeout)
+        turno['fallo'] = snapshot is None
+    return _columnas_http(snapshot, ctx)
+
+def procesar_sitio(row, pool, wait_timeout=10, http_first=True, ctx=None):
+    """
+    Extrae emails y redes sociales de la web de la fila.
+    La página se carga una sola vez y todos los extractores registrados trabajan
+    sobre ese mismo snapshot.
+    - pool: DriverPool del que tomar prestado un navegador si hace falta Selenium.
+    - http_first: intentar antes la descarga HTTP ligera y usar Selenium solo como respaldo.
+    - ctx: contexto del archivo (_nuevo_contexto) para niveles, métricas de carga y caché.
+    """
     try:
-        raw = row.get('website', '')
-        if pd.isna(raw) or not isinstance(raw, str):
+        url = _normalizar_url(row)
+        if url is None:
             logging.warning(f"Fila ignorada: columna 'website' vacía o no válida. Fila: {row}")
-            return {**row, 'email':'', 'facebook':'', 'instagram':'', 'linkedin':'', 'x':''}
-        url = raw.strip()
-
-        # Intentar corregir URLs que no comiencen con http:// o https://
-        if not url.lower().startswith(('http://', 'https://')):
-            url = f"http://{url}"
+            return _fila_sin_web(row, ctx)
 
         logging.info(f"Procesando URL: {url}")
 
-        emails = extract_emails_from_url(
-            url,
-            modo_verificacion=EMAIL_VERIFICATION_MODE,
-            driver=thread_local.driver,
-            wait_timeout=wait_timeout
-        )
-        redes = extract_essential_social_links_from_url(
-            url,
-            driver=thread_local.driver,
-            wait_timeout=wait_timeout
-        )
-        return {
-            **row,
-            'email':      ', '.join(emails),
-            'facebook':   ', '.join(redes.get('facebook', [])),
-            'instagram':  ', '.join(redes.get('instagram', [])),
-            'linkedin':   ', '.join(redes.get('linkedin', [])),
-            'x':          ', '.join(redes.get('x', [])),
-        }
+        if http_first:
+            columnas = _procesar_sitio_http(url, wait_timeout, ctx)
+            if columnas is not None:
+                return _fila_extraida(row, url, columnas, NIVEL_HTTP, ctx)
+            logging.info(f"[HTTP] Sin resultados o página JS en {url}, escalando a Selenium.")
+
+        # El turno del dominio se pide con el navegador ya en mano, para no ocuparlo mientras se espera un driver
+        with pool.driver() as driver, _turno_host(ctx, url):
+            snapshot = capturar_selenium(url, driver, wait_timeout=wait_timeout)
+        _registrar_carga(ctx, snapshot)
+        columnas = _extraer(snapshot, ctx)
+        logging.info(f"Extraído de {url}: {columnas}")
+        return _fila_extraida(row, url, columnas, NIVEL_SELENIUM, ctx)
     except Exception as e:
         logging.error(f"Error procesando sitio {row.get('website')}: {e}")
-        return {**row, 'email':'', 'facebook':'', 'instagram':'', 'linkedin':'', 'x':''}
+        return _fila_error(row, ctx)
+
+def _separar_filas(filas, ctx):
+    """
+    Emite directamente las filas (idx, row) sin web válida.
+    Retorna (tareas, filas_por_idx) con las que hay que cargar.
+    """
+    tareas = []
+    por_idx = {}
+    for idx, row in filas:
+        url = _normalizar_url(row)
+        if url is None:
+            _emitir(ctx, idx, _fila_sin_web(row, ctx))
+            continue
+        por_idx[idx] = (row, url)
+        tareas.append((idx, url))
+    return tareas, por_idx
+
+def _filtrar_dns(filas, ctx):
+    """
+    Comprobación DNS previa de un bloque: anota 'estado_web' en cada fila y emite
+    directamente, vacías, las que apuntan a dominios inexistentes o sin dirección.
+    Retorna las filas (idx, row) que siguen adelante.
+    """
+    hosts = {}
+    for idx, row in filas:
+        url = _normalizar_url(row)
+        hosts[idx] = (urlparse(url).hostname or '').lower() if url else None
+    estados = ctx['dns'].comprobar([h for h in hosts.values() if h])
+    pendientes = []
+    for idx, row in filas:
+        estado = estados.get(hosts[idx], ESTADO_SIN_WEB) if hosts[idx] else ESTADO_SIN_WEB
+        row['estado_web'] = estado
+        if estado in ESTADOS_MUERTOS:
+            logging.info(f"[DNS] {row.get('website')} descartada: {estado}")
+            _registrar_nivel(ctx, NIVEL_DNS_MUERTO)
+            _emitir(ctx, idx, _fila_vacia(row))
+        else:
+            pendientes.append((idx, row))
+    return pendientes
+
+def _filas_desde_cache(filas, ctx):
+    """
+    Resuelve desde la caché persistente las filas ya scrapeadas recientemente.
+    Retorna las filas (idx, row) pendientes.
+    """
+    cache = ctx['cache']
+    urls = {idx: _normalizar_url(row) for idx, row in filas}
+    encontrados = cache.obtener_muchos([u for u in urls.values() if u])
+    pendientes = []
+    for idx, row in filas:
+        columnas = encontrados.get(urls[idx])
+        if columnas is None:
+            pendientes.append((idx, row))
+        else:
+            _registrar_nivel(ctx, NIVEL_CACHE)
+            _emitir(ctx, idx, _fila_resultado(row, columnas))
+    return pendientes
+
+def _procesar_filas_async(filas, wait_timeout, ctx, max_concurrencia=MAX_CONCURRENCIA_ASYNC):
+    """
+    Pasa las filas (idx, row) por el motor asyncio, emitiendo las resueltas con HTML estático.
+    Retorna las (idx, row) que necesitan navegador porque la página parece JS o no dio resultados.
+    """
+    tareas, por_idx = _separar_filas(filas, ctx)
+
+    def procesar(idx, snapshot):
+        columnas = _columnas_http(snapshot, ctx)
+        if columnas is None:
+            return False
+        row, url = por_idx[idx]
+        _emitir(ctx, idx, _fila_extraida(row, url, columnas, NIVEL_HTTP, ctx))
+        return True
+
+    resueltas = scrapear_async(tareas, procesar, max_concurrencia=max_concurrencia, timeout=wait_timeout,
+                               hosts=ctx['planificador']['hosts'])
+    pendientes = [(idx, row) for idx, (row, _) in por_idx.items() if not resueltas.get(idx)]
+    logging.info(f"[ASYNC] {len(por_idx) - len(pendientes)} filas resueltas, {len(pendientes)} escaladas a Selenium.")
+    return pendientes
+
+def _procesar_filas_pestanas(filas, wait_timeout, ctx):
+    """
+    Envía las filas (idx, row) al pool global para el nivel HTTP; las que no
+    resuelve pasan al motor de pestañas compartido, que las emite al terminar.
+    """
+    motor = ctx['planificador']['pestanas']
+
+    def nivel_pestanas(row, url, idx, snapshot):
+        try:
+            if snapshot is None:
+                _emitir(ctx, idx, _fila_error(row, ctx))
+                return
+            _registrar_carga(ctx, snapshot)
+            _emitir(ctx, idx, _fila_extraida(row, url, _extraer(snapshot, ctx), NIVEL_SELENIUM, ctx))
+        except Exception as e:
+            logging.error(f"[PESTAÑAS] Error procesando {url}: {e}")
+            _emitir(ctx, idx, _fila_error(row, ctx))
+        finally:
+            _anotar_tarea(ctx, -1)
+
+    def nivel_http(row, url, idx):
+        try:
+            columnas = _procesar_sitio_http(url, wait_timeout, ctx)
+            if columnas is not None:
+                _emitir(ctx, idx, _fila_extraida(row, url, columnas, NIVEL_HTTP, ctx))
+                return
+        except Exception as e:
+            # Un fallo de un sitio no detiene el archivo: la fila pasa a las pestañas
+            log_error(ctx['nombre'], 'scraping', row.get('website', ''), str(e))
+        # La fila sigue contando en el archivo hasta que su pestaña la emite; si la
+        # cola de pestañas está llena, este hilo espera y frena el nivel HTTP
+        _anotar_tarea(ctx, 1)
+        motor.enviar(idx, url, lambda idx, snapshot: nivel_pestanas(row, url, idx, snapshot))
+
+    _enviar_tareas(filas, ctx, nivel_http)
+
+def _procesar_filas_offline(filas, ctx):
+    """
+    Re-extrae las filas (idx, row) desde el archivo de páginas, sin red de scraping.
+    Las filas cuya web no está archivada quedan vacías con nivel 'sin_archivo'.
+    """
+    def reextraer(row, url, idx):
+        snapshot = ctx['archivo'].cargar(url)
+        if snapshot is None:
+            _registrar_nivel(ctx, NIVEL_SIN_ARCHIVO)
+            fila = _fila_vacia(row)
+        else:
+            try:
+                fila = _fila_extraida(row, url, _extraer(snapshot, ctx), NIVEL_ARCHIVO, ctx)
+            except Exception as e:
+                logging.error(f"[ARCHIVO] Error re-extrayendo {url}: {e}")
+                fila = _fila_error(row, ctx)
+        _emitir(ctx, idx, fila)
+
+    _enviar_tareas(filas, ctx, reextraer)
+
+def _enviar_tareas(filas, ctx, fn):
+    """
+    Emite las filas (idx, row) sin web y envía las demás con _enviar_acotado como
+    fn(row, url, idx), alternando dominios.
+    """
+    tareas, por_idx = _separar_filas(filas, ctx)
+    tareas = intercalar(tareas, lambda tarea: tarea[1])
+    tareas.reverse()
+    while tareas:
+        idx, url = tareas.pop()
+        row, _ = por_idx.pop(idx)  # La fila solo la retiene ya su tarea
+        _enviar_acotado(ctx, fn, row, url, idx)
+
+def _resumen_pestanas(motor):
+    resumen = motor.resumen()
+    print(f"[PESTAÑAS] {resumen['paginas']} páginas en {resumen['segundos']:.1f}s "
+          f"({resumen['paginas_por_seg']:.2f} páginas/s), "
+          f"{resumen['rss_mb_por_pagina']:.0f} MB de RSS por página concurrente "
+          f"({motor.navegadores} navegadores x {motor.pestanas} pestañas).")
+    logging.info(f"[PESTAÑAS] Resumen: {resumen}")
+
+@contextmanager
+def planificador_global(workers, browser="chrome", proxy_list=None, perfil_carga=PERFIL_COMPLETO,
+                        max_por_host=MAX_POR_HOST, retardo_host=RETARDO_MIN_HOST, motor=MOTOR_HIBRIDO,
+                        pestanas=PESTANAS_POR_NAVEGADOR, wait_timeout=10):
+    """
+    Recursos compartidos por todos los archivos de una ejecución.
+
+    Las filas de todos los archivos entran en la misma cola de hilos y usan el
+    mismo pool de navegadores (o, con el motor de pestañas, el mismo MotorPestanas),
+    que sigue caliente de un archivo al siguiente; la cola del final de un archivo
+    se solapa con el principio del siguiente. Cada archivo se cierra (Excel,
+    estado) en un hilo aparte cuando termina su última fila.
+    Las cargas (HTTP, navegador y pestañas) respetan la concurrencia y el retardo
+    por dominio de max_por_host y retardo_host; el motor offline no hace peticiones.
+    Al terminar se guardan las estadísticas por dominio en logs/.
+    """
+    hosts = PlanificadorHosts(max_por_host=max_por_host, retardo_min=retardo_host)
+    hilos = workers * HILOS_POR_WORKER_SIN_NAVEGADOR if motor in (MOTOR_PESTANAS, MOTOR_OFFLINE) else workers
+    motor_pestanas = crear_motor_pestanas(
+        workers, pestanas=pestanas, wait_timeout=wait_timeout, browser=browser, proxy_list=proxy_list,
+        perfil_carga=perfil_carga, hosts=hosts
+    ) if motor == MOTOR_PESTANAS else None
+    with crear_pool_drivers(workers, browser=browser, proxy_list=proxy_list, perfil_carga=perfil_carga) as pool, \
+            ThreadPoolExecutor(max_workers=1) as finalizador, \
+            (motor_pestanas or nullcontext()), \
+            ThreadPoolExecutor(max_workers=hilos) as executor:
+        # Al salir se espera primero a las filas, luego a las pestañas, a los cierres de archivo y por último a los navegadores
+        yield {
+            'pool': pool,
+            'executor': executor,
+            'en_vuelo': threading.BoundedSemaphore(hilos * FILAS_EN_VUELO_POR_HILO),
+            'finalizador': finalizador,
+            'hosts': hosts,
+            'pestanas': motor_pestanas,
+        }
+    if motor_pestanas is not None:
+        _resumen_pestanas(motor_pestanas)
+    lentos = [h for h in hosts.resumen(5) if h['fallos'] or h['espera_media_s'] >= 1]
+    if lentos:
+        print("[HOSTS] Dominios con más fallos o esperas: " + ", ".join(
+            f"{h['dominio']} ({h['fallos']}/{h['peticiones']} fallos, {h['espera_media_s']}s de espera)" for h in lentos))
+    hosts.guardar_resumen(LOGS_DIR / "hosts_stats.json")
+    if pool.stats['creados']:
+        print(f"[SCRAPER] Navegadores: {pool.stats['creados']} abiertos, {pool.stats['reciclados']} reciclados, {pool.stats['descartados']} descartados.")
 
-def reiniciar_sesion():
-    """Cierra y reinicia la sesión del navegador."""
+def _anotar_tarea(ctx, delta):
+    """Lleva la cuenta de filas del archivo en el pool; cierra el archivo al terminar la última."""
+    with ctx['lock']:
+        ctx['en_pool'] += delta
+        cerrar = ctx['leido'] and ctx['en_pool'] == 0 and not ctx['cerrado']
+        if cerrar:
+            ctx['cerrado'] = True
+    if cerrar:
+        ctx['planificador']['finalizador'].submit(_finalizar_archivo, ctx)
+
+def _marcar_leido(ctx, completo=True):
+    """Se han enviado todas las filas del archivo (o se abandonó su lectura si completo=False)."""
+    with ctx['lock']:
+        ctx['leido'] = True
+        ctx['completo'] = completo
+    _anotar_tarea(ctx, 0)
+
+def _finalizar_archivo(ctx):
+    """
+    Verifica los emails candidatos del archivo, genera su Excel a partir del
+    checkpoint y marca la etapa como hecha. Se ejecuta en el hilo finalizador,
+    así que los navegadores siguen con el siguiente archivo mientras tanto.
+    """
+    nombre_archivo = ctx['nombre']
+    checkpoint = ctx['checkpoint']
+    checkpoint.cerrar()
+    if not ctx['completo']:
+        return  # Lectura interrumpida: el checkpoint queda para --resume
     try:
-        if hasattr(thread_local, 'driver'):
-            thread_local.driver.quit()
+        niveles = ctx['niveles']
+        resumen_niveles = ", ".join(f"{k}: {v}" for k, v in sorted(niveles.items())) or "sin filas"
+        print(f"[SCRAPER] {nombre_archivo} → filas por nivel: {resumen_niveles}")
+        logging.info(f"Filas por nivel en {nombre_archivo}: {dict(niveles)}")
+        update_status(nombre_archivo, 'niveles', dict(niveles))
+        _resumen_carga(nombre_archivo, ctx['carga'])
+        df_res = checkpoint.leer_dataframe()
+        print(f"[DEBUG] DataFrame de resultados generado con {len(df_res)} filas.")
+        if RENOMBRAR_COLUMNAS:
+            df_res.rename(columns=RENOMBRAR_COLUMNAS, inplace=True)
+        if NUEVO_ORDEN:
+            cols_validas = [c for c in NUEVO_ORDEN if c in df_res.columns]
+            if cols_validas:
+                df_res = df_res.reindex(columns=cols_validas)
+        if not df_res.empty:
+            from .generador_excel import generar_excel
+            guardar_candidatos(df_res, nombre_archivo)
+            df_res, stats = verificar_emails(df_res, modo=ctx['modo_verificacion'], nombre_archivo=nombre_archivo)
+            update_status(nombre_archivo, 'verificacion', {'modo': ctx['modo_verificacion'], **stats})
+            print(f"[DEBUG] Llamando a generar_excel para {nombre_archivo}")
+            generar_excel(df_res, nombre_archivo)
+        else:
+            print(f"[WARNING] DataFrame vacío, no se genera archivo para {nombre_archivo}")
+        checkpoint.eliminar()
+        update_status(nombre_archivo, 'scraped', True)
     except Exception as e:
-        logging.error(f"Error cerrando sesión del navegador: {e}")
-    finally:
-        _init_thread_driver()
+        logging.error(f"Error generando la salida de {nombre_archivo}: {e}")
+        log_error(nombre_archivo, 'scraping', '', str(e))
 
-def procesar_archivo(nombre_archivo, modo_prueba=False, max_workers=None, wait_timeout=10, resume=False):
+def procesar_archivo(nombre_archivo, modo_prueba=False, max_workers=None, wait_timeout=10, resume=False, motor=MOTOR_HIBRIDO, max_concurrencia_async=MAX_CONCURRENCIA_ASYNC, browser="chrome", proxy=None, pestanas=PESTANAS_POR_NAVEGADOR, perfil_carga=PERFIL_COMPLETO, cache=None, cache_mode=CACHE_USE, archivo=None, planificador=None, dns=None, modo_verificacion=EMAIL_VERIFICATION_MODE, max_por_host=MAX_POR_HOST, retardo_host=RETARDO_MIN_HOST):
+    """
+    Scrapea un archivo de clean_inputs y genera su Excel en outputs.
+    - planificador: recursos compartidos (planificador_global). Si se indica, la
+      función vuelve en cuanto todas las filas están encoladas y el archivo se cierra
+      en segundo plano; si no, se crea uno propio (con max_por_host y retardo_host)
+      y se espera a que termine.
+    """
+    if planificador is None:
+        workers = max_workers if max_workers else get_optimal_workers()
+        with planificador_global(workers, browser=browser, proxy_list=[proxy] if proxy else None,
+                                 perfil_carga=perfil_carga, max_por_host=max_por_host, retardo_host=retardo_host,
+                                 motor=motor, pestanas=pestanas, wait_timeout=wait_timeout) as propio:
+            return procesar_archivo(nombre_archivo, modo_prueba, workers, wait_timeout, resume, motor,
+                                    max_concurrencia_async, browser, proxy, pestanas, perfil_carga, cache,
+                                    cache_mode, archivo, planificador=propio, dns=dns,
+                                    modo_verificacion=modo_verificacion)
     path_in  = CLEAN_INPUTS_DIR / nombre_archivo
     path_out = OUTPUTS_DIR / nombre_archivo
+    # Archivos que no hay que scrapear: se marcan igualmente como hechos para no reabrirlos
     if path_out.exists() and not resume:
+        update_status(nombre_archivo, 'scraped', True)
         return
-    df = pd.read_csv(path_in)
-    if 'website' not in df.columns:
+    columnas = list(pd.read_csv(path_in, nrows=0).columns)
+    if 'website' not in columnas:
+        update_status(nombre_archivo, 'scraped', True)
         return
     # Registrar más detalles sobre las columnas eliminadas
-    logging.info(f"Columnas en el archivo original: {list(df.columns)}")
+    logging.info(f"Columnas en el archivo original: {columnas}")
     logging.info(f"Columnas a eliminar (configuración): {COLUMNAS_A_ELIMINAR}")
-    columnas_a_eliminar = [c for c in COLUMNAS_A_ELIMINAR if c in df.columns]
+    columnas_a_eliminar = [c for c in COLUMNAS_A_ELIMINAR if c in columnas]
     logging.info(f"Columnas eliminadas: {columnas_a_eliminar}")
-    df.drop(columns=columnas_a_eliminar, inplace=True)
-    if modo_prueba:
-        df = df.head(20)
-    rows = df.to_dict(orient='records')
-    # Reanudación por índice
-    start_idx = get_next_scraping_index(nombre_archivo) if resume else 0
-    resultados = []
+    # Reanudación por ids de fila ya guardados en el checkpoint
+    checkpoint = CheckpointFilas(nombre_archivo)
+    if resume:
+        completados = checkpoint.ids_completados()
+        if completados:
+            print(f"[CHECKPOINT] {nombre_archivo}: {len(completados)} filas ya completadas.")
+    else:
+        checkpoint.reiniciar()
+        completados = set()
+    # En modo 'bypass' la caché ni se lee ni se escribe
+    ctx = _nuevo_contexto(cache if cache_mode != CACHE_BYPASS else None, archivo, checkpoint,
+                          dns if motor != MOTOR_OFFLINE else None)
+    ctx.update(nombre=nombre_archivo, planificador=planificador, lock=threading.Lock(),
+               en_pool=0, leido=False, completo=False, cerrado=False, modo_verificacion=modo_verificacion)
+    logging.info(f"Procesando archivo: {nombre_archivo}")
+    completo = False
+    try:
+        filas_leidas = 0
+        for bloque in _leer_bloques(path_in, columnas_a_eliminar, modo_prueba):
+            filas_leidas += len(bloque)
+            pendientes = [(idx, row) for idx, row in bloque if idx not in completados]
+            del bloque
+            _procesar_pendientes(nombre_archivo, pendientes, ctx, wait_timeout, motor, max_concurrencia_async,
+                                 cache_mode)
+        logging.info(f"Número de filas leídas: {filas_leidas}")
+        completo = True
+    finally:
+        # Si la lectura se interrumpe, lo ya resuelto queda igualmente en el checkpoint
+        _marcar_leido(ctx, completo)
+
+def _leer_bloques(path_in, columnas_a_eliminar, modo_prueba=False):
+    """
+    Lee el CSV por bloques de FILAS_POR_BLOQUE filas.
+    Genera listas de (idx, row), con idx la posición de la fila en el archivo.
+    """
+    inicio = 0
+    lector = pd.read_csv(path_in, chunksize=FILAS_POR_BLOQUE, nrows=20 if modo_prueba else None)
+    for df in lector:
+        df = df.drop(columns=columnas_a_eliminar)
+        yield list(enumerate(df.to_dict(orient='records'), start=inicio))
+        inicio += len(df)
+
+def _enviar_acotado(ctx, fn, *args):
+    """
+    Envía una fila del archivo al pool global esperando antes a que haya hueco.
+    El futuro no se guarda: el hueco se libera al terminar y la fila deja de estar en memoria.
+    """
+    planificador = ctx['planificador']
+    en_vuelo = planificador['en_vuelo']
+    en_vuelo.acquire()
+    _anotar_tarea(ctx, 1)
+    try:
+        futuro = planificador['executor'].submit(fn, *args)
+    except BaseException:
+        en_vuelo.release()
+        _anotar_tarea(ctx, -1)
+        raise
+
+    def terminado(f):
+        en_vuelo.release()
+        if not f.cancelled() and f.exception() is not None:
+            logging.error(f"Error en el procesamiento de una fila: {f.exception()}")
+        _anotar_tarea(ctx, -1)
+
+    futuro.add_done_callback(terminado)
+
+def _procesar_pendientes(nombre_archivo, pendientes, ctx, wait_timeout, motor, max_concurrencia_async, cache_mode):
+    """
+    Resuelve un bloque de filas (idx, row) pendientes con el motor elegido, emitiendo cada una al checkpoint.
+    Con los motores de hilos la función vuelve en cuanto el bloque está encolado (con contrapresión).
+    """
+    # Dominios muertos fuera antes de gastar caché, HTTP o navegador en ellos
+    if ctx['dns'] is not None:
+        pendientes = _filtrar_dns(pendientes, ctx)
+    # En offline se quiere aplicar las reglas actuales: no se sirve nada de la caché
+    if ctx['cache'] is not None and cache_mode == CACHE_USE and motor != MOTOR_OFFLINE:
+        pendientes = _filas_desde_cache(pendientes, ctx)
+    http_first = motor == MOTOR_HIBRIDO
+    pool = ctx['planificador']['pool']
+    if motor == MOTOR_ASYNC:
+        pendientes = _procesar_filas_async(pendientes, wait_timeout, ctx, max_concurrencia=max_concurrencia_async)
+    if motor == MOTOR_OFFLINE:
+        _procesar_filas_offline(pendientes, ctx)
+        return
+    if motor == MOTOR_PESTANAS:
+        # Nivel HTTP en hilos y, para lo que no resuelva, pestañas en vez de un navegador por hilo
+        _procesar_filas_pestanas(pendientes, wait_timeout, ctx)
+        return
     def process_with_retry(row, idx, retries=2):
         for attempt in range(retries):
             try:
-                res = procesar_sitio(row, wait_timeout=wait_timeout)
-                update_status(nombre_archivo, 'scraping_index', idx+1)
-                return res
+                res = procesar_sitio(row, pool, wait_timeout=wait_timeout, http_first=http_first, ctx=ctx)
+                logging.info(f"Resultado procesado: {res}")
+                _emitir(ctx, idx, res)
+                return
             except Exception as e:
                 log_error(nombre_archivo, 'scraping', row.get('website',''), str(e))
                 time.sleep(2)
-        return {**row, 'email':'', 'facebook':'', 'instagram':'', 'linkedin':'', 'x':''}
-    workers = max_workers if max_workers else get_optimal_workers()
-    urls_procesadas = 0
-    # Agregar más registros de log en procesar_archivo
-    logging.info(f"Procesando archivo: {nombre_archivo}")
-    logging.info(f"Número de filas a procesar: {len(rows)}")
-    with ThreadPoolExecutor(max_workers=workers, initializer=_init_thread_driver) as executor:
-        futures = {executor.submit(process_with_retry, row, idx): idx for idx, row in enumerate(rows[start_idx:], start=start_idx)}
-        # Dentro del bucle de procesamiento
-        for future in as_completed(futures):
-            try:
-                resultado = future.result()
-                logging.info(f"Resultado procesado: {resultado}")
-                resultados.append(resultado)
-                urls_procesadas += 1
-                if urls_procesadas % MAX_URLS_PER_SESSION == 0:
-                    logging.info("Reiniciando sesión del navegador después de procesar 50 URLs.")
-                    reiniciar_sesion()
-            except Exception as e:
-                logging.error(f"Error en el procesamiento de una fila: {e}")
-    for drv in DRIVERS:
-        try:
-            drv.quit()
-        except Exception as e:
-            logging.error(f"Error cerrando driver: {e}")
-    df_res = pd.DataFrame(resultados)
-    print(f"[DEBUG] DataFrame de resultados generado con {len(df_res)} filas.")
-    if RENOMBRAR_COLUMNAS:
-        df_res.rename(columns=RENOMBRAR_COLUMNAS, inplace=True)
-    if NUEVO_ORDEN:
-        cols_validas = [c for c in NUEVO_ORDEN if c in df_res.columns]
-        if cols_validas:
-            df_res = df_res.reindex(columns=cols_validas)
-    if not df_res.empty:
-        from .generador_excel import generar_excel
-        print(f"[DEBUG] Llamando a generar_excel para {nombre_archivo}")
-        generar_excel(df_res, nombre_archivo)
-    else:
-        print(f"[WARNING] DataFrame vacío, no se genera archivo para {nombre_archivo}")
-    update_status(nombre_archivo, 'scraping_index', 0)  # Reset index
+        _emitir(ctx, idx, _fila_vacia(row))
+    logging.info(f"Filas del bloque a procesar: {len(pendientes)}")
+    # Alternar dominios para no lanzar a la vez las filas consecutivas de una misma cadena
+    pendientes = intercalar(pendientes, lambda fila: _normalizar_url(fila[1]) or '')
+    pendientes.reverse()
+    while pendientes:
+        idx, row = pendientes.pop()  # La fila solo la retiene ya su tarea
+        _enviar_acotado(ctx, process_with_retry, row, idx)
 
-def run_extraction(overwrite=False, test_mode=False, max_workers=None, wait_timeout=10, resume=False, single_file=None, browser="chrome", proxy_list=None):
+def run_extraction(overwrite=False, test_mode=False, max_workers=None, wait_timeout=10, resume=False, single_file=None, browser="chrome", proxy_list=None, motor=MOTOR_HIBRIDO, max_concurrencia_async=MAX_CONCURRENCIA_ASYNC, pestanas=PESTANAS_POR_NAVEGADOR, perfil_carga=PERFIL_COMPLETO, cache_mode=CACHE_USE, archivar_paginas=False, max_por_host=MAX_POR_HOST, retardo_host=RETARDO_MIN_HOST, comprobar_dns=True, ttl_verificacion=TTL_VERIFICACION_DIAS, modo_verificacion=EMAIL_VERIFICATION_MODE, puerto_smtp=PUERTO_SMTP, sesiones_smtp_por_mx=MAX_SESIONES_POR_MX, intervalo_smtp=INTERVALO_MIN_MX):
     """
     Ejecuta el proceso de extracción de datos web.
     Si single_file está definido, solo procesa ese archivo.
+    motor: 'hibrido' (HTTP + Selenium), 'selenium' (solo navegador), 'async'
+    (asyncio para HTML estático, escalando a Selenium solo lo necesario) o
+    'pestanas' (HTTP + varias pestañas por navegador como respaldo).
+    perfil_carga: 'completo' o 'ligero' para los navegadores (ver load_profile.py).
+    cache_mode: 'use', 'refresh' o 'bypass' para la caché persistente de resultados.
+    archivar_paginas: guardar el HTML de cada página en data/page_archive.
+    El motor 'offline' no descarga nada: re-ejecuta los extractores sobre ese archivo.
+    max_por_host / retardo_host: cargas simultáneas y segundos entre cargas por dominio.
+    comprobar_dns: resolver antes los hosts y no scrapear los dominios muertos (columna 'estado_web').
+    ttl_verificacion: días de validez de las verificaciones de email guardadas en
+    data/cache/verificaciones.sqlite (el almacén sigue también cache_mode).
+    modo_verificacion: 'normal', 'avanzado' o 'ultra-avanzado' para la etapa de
+    verificación de emails (repetible sin scrapear con verification_stage.run_verificacion).
+    puerto_smtp / sesiones_smtp_por_mx / intervalo_smtp: puerto y límites por MX de
+    los sondeos SMTP de ultra-avanzado.
     """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor no soportado: {motor}. Use uno de {MOTORES}.")
+    if cache_mode not in CACHE_MODES:
+        raise ValueError(f"Modo de caché no soportado: {cache_mode}. Use uno de {CACHE_MODES}.")
+    if modo_verificacion not in MODOS_VERIFICACION:
+        raise ValueError(f"Modo de verificación no soportado: {modo_verificacion}. Use uno de {MODOS_VERIFICACION}.")
     import time
     inicio = time.time()
     workers = max_workers if max_workers else get_optimal_workers()
@@ -230,24 +769,52 @@ def run_extraction(overwrite=False, test_mode=False, max_workers=None, wait_time
         print(f"❌ No existe clean_inputs.")
         return
     archivos = [single_file] if single_file else [f for f in os.listdir(CLEAN_INPUTS_DIR) if f.lower().endswith('.csv')]
-    for nombre in archivos:
-        try:
-            if not overwrite and is_stage_done(nombre, 'scraped'):
-                print(f"[SKIP] {nombre} ya scrapeado.")
-                continue
-            print(f"\n▶️ Procesando: {nombre}")
-            proxy = random.choice(proxy_list) if proxy_list else None
-            _init_thread_driver(browser=browser, proxy=proxy)
-            procesar_archivo(nombre, modo_prueba=test_mode, max_workers=workers, wait_timeout=wait_timeout, resume=resume)
-            update_status(nombre, 'scraped', True)
-        except KeyboardInterrupt:
-            print('✋ Proceso cancelado por el usuario.')
-            return
-        except Exception as e:
-            log_error(nombre, 'scraping', '', str(e))
+    cache = CacheScraping() if cache_mode != CACHE_BYPASS else None
+    archivo = ArchivoPaginas() if (archivar_paginas or motor == MOTOR_OFFLINE) else None
+    dns = PreflightDNS() if comprobar_dns and motor != MOTOR_OFFLINE else None
+    try:
+        with almacen_verificaciones(modo_verificacion, usar=cache_mode != CACHE_BYPASS, leer=cache_mode == CACHE_USE,
+                                    ttl_dias=ttl_verificacion, puerto_smtp=puerto_smtp,
+                                    sesiones_smtp_por_mx=sesiones_smtp_por_mx, intervalo_smtp=intervalo_smtp):
+            _procesar_archivos(archivos, cache, archivo, overwrite, test_mode, workers, wait_timeout, resume, browser,
+                               proxy_list, motor, max_concurrencia_async, pestanas, perfil_carga, cache_mode,
+                               max_por_host, retardo_host, dns, modo_verificacion)
+    finally:
+        if dns is not None:
+            print(f"[DNS] {dns.stats['consultados']} hosts consultados, {dns.stats['muertos']} hosts muertos "
+                  f"({dns.stats['cache_negativa']} desde la caché negativa), {dns.stats['desconocidos']} sin respuesta.")
+            dns.cerrar()
+        if archivo is not None:
+            print(f"[ARCHIVO] {archivo.stats['guardadas']} páginas archivadas ({archivo.stats['objetos_nuevos']} objetos nuevos), {archivo.stats['leidas']} leídas.")
+            archivo.cerrar()
+        if cache is not None:
+            print(f"[CACHE] {cache.stats['aciertos']} aciertos, {cache.stats['fallos']} fallos, {cache.stats['escrituras']} escrituras.")
+            cache.cerrar()
     duracion = time.time() - inicio
     print(f"✅ Fin en {duracion:.2f}s.")
 
+def _procesar_archivos(archivos, cache, archivo, overwrite, test_mode, workers, wait_timeout, resume, browser,
+                       proxy_list, motor, max_concurrencia_async, pestanas, perfil_carga, cache_mode,
+                       max_por_host=MAX_POR_HOST, retardo_host=RETARDO_MIN_HOST, dns=None,
+                       modo_verificacion=EMAIL_VERIFICATION_MODE):
+    # Un único pool de hilos y navegadores para todos los archivos
+    with planificador_global(workers, browser=browser, proxy_list=proxy_list, perfil_carga=perfil_carga,
+                             max_por_host=max_por_host, retardo_host=retardo_host, motor=motor, pestanas=pestanas,
+                             wait_timeout=wait_timeout) as planificador:
+        for nombre in archivos:
+            try:
+                if not overwrite and is_stage_done(nombre, 'scraped'):
+                    print(f"[SKIP] {nombre} ya scrapeado.")
+                    continue
+                print(f"\n▶️ Procesando: {nombre}")
+                proxy = random.choice(proxy_list) if proxy_list else None
+                procesar_archivo(nombre, modo_prueba=test_mode, max_workers=workers, wait_timeout=wait_timeout, resume=resume, motor=motor, max_concurrencia_async=max_concurrencia_async, browser=browser, proxy=proxy, pestanas=pestanas, perfil_carga=perfil_carga, cache=cache, cache_mode=cache_mode, archivo=archivo, planificador=planificador, dns=dns, modo_verificacion=modo_verificacion)
+            except KeyboardInterrupt:
+                print('✋ Proceso cancelado por el usuario.')
+                return
+            except Exception as e:
+                log_error(nombre, 'scraping', '', str(e))
+
 if __name__ == "__main__":
     print("[INFO] Ejecutando scraping sobre archivos en clean_inputs...")
     run_extraction(overwrite=True, test_mode=True)
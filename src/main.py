@@ -3,17 +3,23 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import argparse
 from extractor.web_scraper import run_extraction
+from extractor.verification_stage import run_verificacion
 from cleaner.exclusion_filter import run_filter
 from demo.demo_generator import run_demo
 from extractor.limpiar_csv_lote import main as clean_main
 
 
+def _lista_csv(valor):
+    return [v.strip() for v in valor.split(',') if v.strip()] if valor else None
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Pipeline CSVExtractorProyectV2: limpieza, scraping, exclusión, enmascarado, demo."
     )
     parser.add_argument('--clean', action='store_true', help='Ejecutar solo limpieza de archivos en ./data/inputs → ./data/clean_inputs')
     parser.add_argument('--scrap', action='store_true', help='Ejecutar solo scraping sobre ./data/clean_inputs → ./data/outputs')
+    parser.add_argument('--verify', action='store_true', help='Ejecutar solo la verificación de emails sobre los candidatos de ./data/candidates → ./data/outputs (sin scrapear)')
     parser.add_argument('--exclude', action='store_true', help='Ejecutar solo exclusión de emails/generación imágenes → ./data/exclusions_outputs')
     parser.add_argument('--mask', action='store_true', help='Ejecutar solo enmascarado/demos → ./data/demo_outputs')
     parser.add_argument('--all', action='store_true', help='Ejecutar TODO el flujo completo')
@@ -22,6 +28,28 @@ def main():
     parser.add_argument('--resume', action='store_true', help='Reanudar etapas incompletas')
     parser.add_argument('--clean-logs', action='store_true', help='Borra todos los archivos de la carpeta logs/')
     parser.add_argument('--wait-timeout', type=int, default=10, help='Timeout de espera por página (segundos)')
+    parser.add_argument('--engine', choices=['hibrido', 'selenium', 'async', 'pestanas', 'offline'], default='hibrido',
+                        help='Motor de scraping: hibrido (HTTP + Selenium), selenium (solo navegador), async (asyncio + Selenium de respaldo), pestanas (HTTP + varias pestañas por navegador) u offline (re-extraer desde el archivo de páginas)')
+    parser.add_argument('--async-concurrency', type=int, default=200, help='Descargas simultáneas del motor async')
+    parser.add_argument('--load-profile', choices=['completo', 'ligero'], default='completo',
+                        help='Perfil de carga del navegador: completo o ligero (headless, eager y bloqueo de imágenes/CSS/analítica)')
+    parser.add_argument('--cache-mode', choices=['use', 'refresh', 'bypass'], default='use',
+                        help='Caché persistente de scraping: use (leer y escribir), refresh (solo reescribir) o bypass (desactivada)')
+    parser.add_argument('--archive-pages', action='store_true', help='Guardar el HTML de cada página en data/page_archive para re-extraer con --engine offline')
+    parser.add_argument('--tabs', type=int, default=4, help='Pestañas simultáneas por navegador con --engine pestanas')
+    parser.add_argument('--per-host', type=int, default=2, help='Cargas simultáneas máximas por dominio')
+    parser.add_argument('--verification-mode', choices=['normal', 'avanzado', 'ultra-avanzado'], default='avanzado',
+                        help='Verificación de emails: normal (formato y dominio), avanzado (+ MX) o ultra-avanzado (+ SPF, DMARC, DKIM, SMTP y buzón)')
+    parser.add_argument('--verification-ttl', type=int, default=30, help='Días de validez de las verificaciones de email guardadas')
+    parser.add_argument('--smtp-port', type=int, default=25, help='Puerto de los sondeos SMTP de ultra-avanzado')
+    parser.add_argument('--smtp-per-mx', type=int, default=2, help='Sesiones SMTP simultáneas máximas por servidor MX')
+    parser.add_argument('--smtp-interval', type=float, default=0.2, help='Segundos mínimos entre dos comandos RCPT al mismo MX')
+    parser.add_argument('--skip-dns-check', action='store_true', help='No comprobar el DNS de las webs antes de scrapear')
+    parser.add_argument('--exclusion-lists', help='Listas de exclusión a usar, separadas por comas (p. ej. nombres,spam); por defecto todas')
+    parser.add_argument('--skip-exclusion-lists', help='Listas de exclusión a desactivar, separadas por comas')
+    parser.add_argument('--exclusion-langs', help='Idiomas de las listas de spam a usar, separados por comas (p. ej. EN,IT); las listas sin idioma siempre se usan')
+    parser.add_argument('--constant-memory', action='store_true', help='Escribir los Excel de exclusión en modo constant_memory (hojas de datos muy grandes)')
+    parser.add_argument('--host-delay', type=float, default=0.5, help='Segundos mínimos entre dos cargas del mismo dominio')
     args = parser.parse_args()
 
     if args.clean_logs:
@@ -44,7 +72,7 @@ def main():
         return
 
     # Si no se pasa ningún flag, mostrar ayuda
-    if not any([args.clean, args.scrap, args.exclude, args.mask, args.all]):
+    if not any([args.clean, args.scrap, args.verify, args.exclude, args.mask, args.all]):
         parser.print_help()
         return
 
@@ -59,7 +87,33 @@ def main():
             overwrite=args.overwrite or args.all,
             test_mode=args.test,
             resume=args.resume,
-            wait_timeout=args.wait_timeout
+            wait_timeout=args.wait_timeout,
+            motor=args.engine,
+            max_concurrencia_async=args.async_concurrency,
+            pestanas=args.tabs,
+            perfil_carga=args.load_profile,
+            cache_mode=args.cache_mode,
+            archivar_paginas=args.archive_pages,
+            max_por_host=args.per_host,
+            retardo_host=args.host_delay,
+            comprobar_dns=not args.skip_dns_check,
+            ttl_verificacion=args.verification_ttl,
+            modo_verificacion=args.verification_mode,
+            puerto_smtp=args.smtp_port,
+            sesiones_smtp_por_mx=args.smtp_per_mx,
+            intervalo_smtp=args.smtp_interval
+        )
+
+    if args.verify and not args.all:
+        print("\n==== VERIFICACIÓN DE EMAILS ====")
+        run_verificacion(
+            modo=args.verification_mode,
+            usar_almacen=args.cache_mode != 'bypass',
+            leer_almacen=args.cache_mode == 'use',
+            ttl_verificacion=args.verification_ttl,
+            puerto_smtp=args.smtp_port,
+            sesiones_smtp_por_mx=args.smtp_per_mx,
+            intervalo_smtp=args.smtp_interval
         )
 
     if args.all or args.exclude:
@@ -67,7 +121,11 @@ def main():
         run_filter(
             overwrite=args.overwrite or args.all,
             test_mode=args.test,
-            resume=args.resume
+            resume=args.resume,
+            listas=_lista_csv(args.exclusion_lists),
+            omitir_listas=_lista_csv(args.skip_exclusion_lists),
+            idiomas=_lista_csv(args.exclusion_langs),
+            memoria_constante=args.constant_memory
         )
 
     if args.all or args.mask:
@@ -18,8 +18,8 @@ import time
 import pandas as pd
 from concurrent.futures import ThreadPoolExecutor
 from extractor.utils import setup_driver
-from extractor.email_extractor import extract_emails_from_url
-from extractor.social_extractor import extract_essential_social_links_from_url
+from extractor.page_snapshot import capturar_selenium, ejecutar_extractores
+from extractor import email_extractor, social_extractor  # noqa: F401 (registran los extractores)
 
 # Lista de URLs de prueba
 test_urls = [
@@ -33,17 +33,9 @@ wait_timeout_options = [5, 10, 15]
 
 # Función de prueba para un solo URL y driver
 def run_once(url, wait_timeout, driver):
-    extract_emails_from_url(
-        url,
-        driver=driver,
-        wait_timeout=wait_timeout,
-        modo_verificacion='avanzado'
-    )
-    extract_essential_social_links_from_url(
-        url,
-        driver=driver,
-        wait_timeout=wait_timeout
-    )
+    # Una sola carga de página compartida por todos los extractores
+    snapshot = capturar_selenium(url, driver, wait_timeout=wait_timeout)
+    ejecutar_extractores(snapshot)
 
 results = []
 for workers in worker_options:
@@ -0,0 +1,121 @@
+"""
+Comprobación del sondeador SMTP de ultra-avanzado contra un servidor SMTP local.
+
+Sin argumentos arranca un servidor de prueba propio en 127.0.0.1 (acepta todos
+los buzones salvo nadie@, que rechaza con 550, y responde 451 la primera vez a
+gris@) y comprueba: MX vivo, reutilización de sesiones con el límite por MX,
+buzón inexistente, reintento tras greylisting y MX sin respuesta.
+
+Para probar contra otro servidor local, por ejemplo aiosmtpd:
+    python -m aiosmtpd -n -l 127.0.0.1:8025
+    python src/scripts/probar_smtp.py --puerto 8025 --email info@ejemplo.es
+"""
+
+import argparse
+import os
+import socketserver
+import sys
+import threading
+from collections import Counter
+
+# Asegura que Python encuentre el paquete src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.extractor.email_verifier import configurar_sondeo
+from src.extractor.smtp_probe import BUZON_VALIDO, BUZON_INEXISTENTE, BUZON_SIN_COMPROBAR
+
+SESIONES_POR_MX = 2
+
+
+class _ServidorPrueba(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Manejador)
+        self.conexiones = 0
+        self.rcpt = Counter()
+
+
+class _Manejador(socketserver.StreamRequestHandler):
+    def responder(self, linea):
+        self.wfile.write(linea.encode() + b"\r\n")
+
+    def handle(self):
+        servidor = self.server
+        servidor.conexiones += 1
+        self.responder("220 prueba ESMTP")
+        for linea in self.rfile:
+            comando = linea.decode(errors="replace").strip()
+            verbo = comando[:4].upper()
+            if verbo == "RCPT":
+                servidor.rcpt[comando] += 1
+                if "nadie@" in comando:
+                    self.responder("550 buzón inexistente")
+                elif "gris@" in comando and servidor.rcpt[comando] == 1:
+                    self.responder("451 greylisting, vuelva a intentarlo")
+                else:
+                    self.responder("250 ok")
+            elif verbo == "QUIT":
+                self.responder("221 adiós")
+                return
+            else:
+                self.responder("250 ok")
+
+
+def _comprobar(descripcion, obtenido, esperado):
+    correcto = obtenido == esperado
+    print(f"{'✅' if correcto else '❌'} {descripcion}: {obtenido}" + ("" if correcto else f" (se esperaba {esperado})"))
+    return correcto
+
+
+def probar_servidor_propio():
+    servidor = _ServidorPrueba()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    puerto = servidor.server_address[1]
+    sondeo = configurar_sondeo(puerto=puerto, max_sesiones_por_mx=SESIONES_POR_MX, intervalo_min=0.01)
+    sondeo.espera_4xx = 0.2  # Para no esperar los 5 s del backoff real
+    resultados = [
+        _comprobar("MX vivo", sondeo.esta_vivo("127.0.0.1"), True),
+        _comprobar("Buzones válidos", {sondeo.comprobar_buzon("127.0.0.1", f"u{i}@prueba.es") for i in range(20)},
+                   {BUZON_VALIDO}),
+        _comprobar("Conexiones para 20 buzones", servidor.conexiones <= SESIONES_POR_MX, True),
+        _comprobar("Buzón inexistente", sondeo.comprobar_buzon("127.0.0.1", "nadie@prueba.es"), BUZON_INEXISTENTE),
+        _comprobar("Buzón tras greylisting", sondeo.comprobar_buzon("127.0.0.1", "gris@prueba.es"), BUZON_VALIDO),
+        _comprobar("Respuestas 4xx", sondeo.stats["greylisting"], 1),
+        # 127.0.0.2 es loopback pero el servidor solo escucha en 127.0.0.1
+        _comprobar("MX sin respuesta", sondeo.esta_vivo("127.0.0.2"), False),
+        _comprobar("Buzón en MX sin respuesta", sondeo.comprobar_buzon("127.0.0.2", "a@prueba.es"),
+                   BUZON_SIN_COMPROBAR),
+    ]
+    sondeo.cerrar()
+    servidor.shutdown()
+    print(f"[SMTP] {servidor.conexiones} conexiones al servidor de prueba; estadísticas: {dict(sondeo.stats)}")
+    return all(resultados)
+
+
+def probar_servidor_externo(host, puerto, emails):
+    sondeo = configurar_sondeo(puerto=puerto, max_sesiones_por_mx=SESIONES_POR_MX)
+    print(f"MX {host}:{puerto} vivo: {sondeo.esta_vivo(host)}")
+    for email in emails:
+        print(f"{email}: {sondeo.comprobar_buzon(host, email)}")
+    sondeo.cerrar()
+    print(f"[SMTP] Estadísticas: {dict(sondeo.stats)}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprueba el sondeador SMTP contra un servidor SMTP local.")
+    parser.add_argument('--host', default="127.0.0.1", help='Servidor SMTP externo (con --puerto)')
+    parser.add_argument('--puerto', type=int, help='Puerto de un servidor SMTP ya arrancado; sin él se usa uno propio')
+    parser.add_argument('--email', action='append', default=[], help='Buzón a comprobar en el servidor externo (repetible)')
+    args = parser.parse_args()
+    if args.puerto:
+        correcto = probar_servidor_externo(args.host, args.puerto, args.email or ["info@ejemplo.es"])
+    else:
+        correcto = probar_servidor_propio()
+    sys.exit(0 if correcto else 1)
+
+
+if __name__ == "__main__":
+    main()
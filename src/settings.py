@@ -14,10 +14,16 @@ TXT_CONFIG_DIR = CONFIG_DIR / "txt_config"
 EXCLUSIONES_FOLDER = TXT_CONFIG_DIR / "xclusiones_email"
 XCLUSION_INPUTS_DIR = OUTPUTS_DIR  # Usar data/outputs como entrada para exclusión
 XCLUSION_OUTPUTS_DIR = DATA_DIR / "exclusions_outputs"  # Usar data/exclusions_outputs como salida
+EXCLUIDOS_DIR = DATA_DIR / "exclusions_audit"  # Emails excluidos con su lista y token (fuera de la entrada de la demo)
 DEMO_INPUTS_DIR = XCLUSION_OUTPUTS_DIR  # Usar exclusiones_outputs como entrada para demo
 DEMO_OUTPUTS_DIR = DATA_DIR / "demo_outputs"  # Usar data/demo_outputs como salida
+CACHE_DIR = DATA_DIR / "cache"  # Cachés persistentes entre ejecuciones (no se borran con --clean-logs)
+ARCHIVE_DIR = DATA_DIR / "page_archive"  # HTML descargado, para re-extraer sin volver a scrapear
+CHECKPOINT_DIR = DATA_DIR / "checkpoints"  # Filas ya scrapeadas de cada archivo, para --resume
+CANDIDATOS_DIR = DATA_DIR / "candidates"  # Resultado del scraping con los emails sin verificar, para --verify
 
 # Hojas y otros nombres comunes
 HOJA_DATA = "data"
 HOJA_STATS = "statistics"
+HOJA_COPYRIGHT = "copyright"  # Aviso legal: una línea por celda, sin cabecera
 IMAGE_SIZE = (1200, 630)
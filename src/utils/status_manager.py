@@ -3,12 +3,16 @@ status_manager.py - Manejo de estado y errores persistente para reanudación de
 """
 import json
 import os
+import threading
 from datetime import datetime
 from pathlib import Path
 
 STATUS_PATH = Path(__file__).resolve().parent.parent.parent / 'logs' / 'status.json'
 ERROR_LOG_PATH = Path(__file__).resolve().parent.parent.parent / 'logs' / 'error_log.txt'
 
+# Serializa lectura-modificación-escritura de status.json entre hilos
+_status_lock = threading.RLock()
+
 
 def load_status():
     if STATUS_PATH.exists():
@@ -18,10 +22,17 @@ def load_status():
 
 def save_status(status):
     STATUS_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(STATUS_PATH, 'w', encoding='utf-8') as f:
+    # Escritura atómica: un lector nunca ve el JSON a medio escribir
+    tmp = STATUS_PATH.with_suffix('.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
         json.dump(status, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, STATUS_PATH)
 
 def update_status(filename, stage, value, extra=None):
+    with _status_lock:
+        _update_status(filename, stage, value, extra)
+
+def _update_status(filename, stage, value, extra=None):
     status = load_status()
     if filename not in status:
         status[filename] = {
@@ -0,0 +1,134 @@
+"""
+tablas_intermedias.py - Hojas de cada entregable en formato columnar, para pasar datos entre etapas.
+
+Las etapas (scraping → exclusión → demo) se pasaban los datos leyendo el .xlsx de
+la etapa anterior, y parsear XLSX es con diferencia la E/S más lenta del pipeline.
+Cada etapa que escribe un Excel guarda además sus hojas junto a él, en
+<archivo>.tablas/: un fichero por hoja y un esquema.json con el orden de las hojas,
+los tipos de cada columna y la huella (mtime y tamaño) del Excel escrito. La
+etapa siguiente lee las tablas y solo recurre al Excel si no existen o si el
+Excel ha cambiado después (editado a mano), de modo que el Excel queda como
+artefacto final.
+
+Formato: Parquet si está instalado pyarrow; si no, CSV con los tipos de cada
+columna guardados en el esquema.
+"""
+
+import importlib.util
+import json
+import logging
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+VERSION_TABLAS = 1
+FORMATO_PARQUET = "parquet"
+FORMATO_CSV = "csv"
+_TIPOS_TEXTO = ("object", "str", "string")
+
+
+def formato_disponible():
+    return FORMATO_PARQUET if importlib.util.find_spec("pyarrow") else FORMATO_CSV
+
+
+def ruta_tablas(ruta_excel):
+    """Carpeta de las tablas de un Excel: data/outputs/x.xlsx -> data/outputs/x.tablas"""
+    return Path(ruta_excel).with_suffix(".tablas")
+
+
+def _huella(ruta_excel):
+    st = Path(ruta_excel).stat()
+    return {'mtime_ns': st.st_mtime_ns, 'tamano': st.st_size}
+
+
+def _guardar_hoja(df, ruta, formato):
+    """Guarda una hoja; retorna el formato usado (CSV si pyarrow no admite alguna columna)."""
+    if formato == FORMATO_PARQUET:
+        try:
+            df.to_parquet(ruta.with_suffix(".parquet"), index=False)
+            return FORMATO_PARQUET
+        except (ImportError, ValueError, TypeError) as e:  # p. ej. columna object con números y textos
+            logging.info(f"[TABLAS] {ruta.name} se guarda como CSV: {e}")
+    df.to_csv(ruta.with_suffix(".csv"), index=False, encoding="utf-8")
+    return FORMATO_CSV
+
+
+def guardar_tablas(hojas, ruta_excel, formato=None):
+    """
+    Guarda las hojas ({nombre: DataFrame}) junto al Excel ya escrito en ruta_excel.
+    Se escriben en una carpeta temporal que sustituye a la anterior al terminar.
+    """
+    formato = formato or formato_disponible()
+    destino = ruta_tablas(ruta_excel)
+    tmp = destino.with_name(destino.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    esquema = {'version': VERSION_TABLAS, 'excel': _huella(ruta_excel), 'hojas': []}
+    for i, (nombre, df) in enumerate(hojas.items()):
+        df = df.rename(columns=str)  # Parquet solo admite nombres de columna de texto
+        fichero = f"{i:02d}"
+        usado = _guardar_hoja(df, tmp / fichero, formato)
+        esquema['hojas'].append({
+            'nombre': nombre,
+            'fichero': f"{fichero}.{usado}",
+            'columnas': {col: str(tipo) for col, tipo in df.dtypes.items()},
+        })
+    with open(tmp / "esquema.json", 'w', encoding='utf-8') as f:
+        json.dump(esquema, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(destino, ignore_errors=True)
+    tmp.replace(destino)
+
+
+def _leer_hoja(ruta, columnas):
+    if ruta.suffix == ".parquet":
+        return pd.read_parquet(ruta)
+    tipos, fechas = {}, []
+    for col, tipo in columnas.items():
+        if tipo.startswith("datetime"):
+            fechas.append(col)
+        else:
+            tipos[col] = str if tipo in _TIPOS_TEXTO else tipo
+    return pd.read_csv(ruta, dtype=tipos, parse_dates=fechas, keep_default_na=False, na_values=[""],
+                       float_precision="round_trip", encoding="utf-8")
+
+
+def guardar_csv_tipado(df, ruta):
+    """CSV de una sola tabla con los tipos de sus columnas en <ruta>.tipos.json, para leerlo con leer_csv_tipado."""
+    ruta = Path(ruta)
+    tmp = ruta.with_name(ruta.name + ".tmp")
+    df.to_csv(tmp, index=False, encoding="utf-8")
+    with open(ruta.with_name(ruta.name + ".tipos.json"), 'w', encoding='utf-8') as f:
+        json.dump({str(col): str(tipo) for col, tipo in df.dtypes.items()}, f, ensure_ascii=False, indent=2)
+    tmp.replace(ruta)
+
+
+def leer_csv_tipado(ruta):
+    """Lee un CSV de guardar_csv_tipado con sus tipos; sin fichero de tipos, todas las columnas como texto."""
+    ruta = Path(ruta)
+    ruta_tipos = ruta.with_name(ruta.name + ".tipos.json")
+    if not ruta_tipos.exists():
+        return pd.read_csv(ruta, dtype=str, keep_default_na=False, encoding="utf-8")
+    with open(ruta_tipos, encoding='utf-8') as f:
+        return _leer_hoja(ruta, json.load(f))
+
+
+def leer_tablas(ruta_excel):
+    """
+    {nombre: DataFrame} con las hojas guardadas junto al Excel, en su orden, o None
+    si no hay tablas, son ilegibles o el Excel ha cambiado desde que se guardaron.
+    """
+    carpeta = ruta_tablas(ruta_excel)
+    ruta_esquema = carpeta / "esquema.json"
+    if not ruta_esquema.exists() or not Path(ruta_excel).exists():
+        return None
+    try:
+        with open(ruta_esquema, encoding='utf-8') as f:
+            esquema = json.load(f)
+        if esquema.get('version') != VERSION_TABLAS or esquema.get('excel') != _huella(ruta_excel):
+            logging.info(f"[TABLAS] {Path(ruta_excel).name} ha cambiado: se lee el Excel.")
+            return None
+        return {hoja['nombre']: _leer_hoja(carpeta / hoja['fichero'], hoja['columnas']) for hoja in esquema['hojas']}
+    except (OSError, ValueError, KeyError, ImportError) as e:
+        logging.warning(f"[TABLAS] No se pudieron leer las tablas de {Path(ruta_excel).name}, se lee el Excel: {e}")
+        return None